@@ -40,15 +40,32 @@
 # - moved moveWindowsConfig to pilcore
 # 25.04.2026
 # - parameter "nohelp" renamed to "use-system-browser"
+# 19.10.2026
+# - index and search options for LIF image files added
+# - check option for LIF image files added
+# - archive options for LIF image files added
+# - view option for scope capture files added
+# - analyze option for scope capture files added
+# - info option shows the number of frames dropped by the scope
 #
 import os
 import sys
 import shutil
 import argparse
+import json
+import datetime
 from .pyilpermain import main
 from .pilglobals import PILGLOBALS
 from .pilconfig import cls_pilconfig, PilConfigError
 from .pilcore import buildconfigfilename, moveWindowsConfig
+from .lifutils import LifError
+from .lifindex import cls_LifIndex, getLifIndexFilename
+from .lifcheck import checkLifBatch, findLifImages
+from .lifcore import dict_medium_layout
+from .lifarchive import cls_LifArchive
+from .scopecapture import cls_ScopeCaptureReader, ScopeCaptureError
+from .scopecore import DISPLAY_MNEMONIC, DISPLAY_HEX, DISPLAY_BOTH
+from .scopeanalyzer import analyzeCapture, writeCsvReport
 from pyilper import __version__, __isProduction__
 
 # copy configuration data from devel to production and vice versa
@@ -115,6 +132,124 @@ def copyConfig(args):
       count+=1
    print(count,"files copied. Restart pyILPER without the 'cc' option now")
 
+#
+# index all LIF image files of a directory tree or search the index
+#
+def runLifIndex(args):
+   lifindex= cls_LifIndex(getLifIndexFilename(args.instance))
+   try:
+      lifindex.open()
+      if args.index:
+         lifindex.setProgress(lambda done, total: print("\r{:d}/{:d}".format(done,total),end="",flush=True))
+         total, scanned, removed= lifindex.scan(args.index)
+         print("\r",end="")
+         print(total,"LIF image files found,",scanned,"indexed,",removed,"removed from index")
+      if args.search:
+         for path, name, typename, length, datetime, h in lifindex.search(args.search):
+            print("{:10s} {:12s} {:8d} {:17s} {}".format(name,typename,length,datetime,path))
+   except LifError as e:
+      print("Error: ",e.msg+': '+e.add_msg)
+   finally:
+      lifindex.close()
+
+#
+# check LIF image files and print the result as JSON document, returns 0 if
+# all images are ok
+#
+def runLifCheck(args):
+   paths= findLifImages(args.check)
+   try:
+      summary= checkLifBatch(paths,args.medium,args.fix)
+   except LifError as e:
+      print("Error: ",e.msg+': '+e.add_msg,file=sys.stderr)
+      return 1
+   json.dump(summary,sys.stdout,indent=1)
+   print("")
+   if summary["failed"] != 0:
+      return 1
+   return 0
+
+#
+# add LIF image files to an archive, restore an image or list the archive
+#
+def runLifArchive(args):
+   archive= cls_LifArchive(args.archive)
+   try:
+      archive.open()
+      if args.add:
+         total= 0
+         stored= 0
+         for path in findLifImages(args.add):
+            size, n= archive.addImage(path)
+            print(path,size,"bytes,",n,"bytes stored")
+            total+= size
+            stored+= n
+         print(total,"bytes added,",stored,"bytes stored")
+      elif args.restore:
+         archive.restoreImage(args.restore[0],args.restore[1])
+      else:
+         for name in archive.getImages():
+            print(name)
+   except LifError as e:
+      print("Error: ",e.msg+': '+e.add_msg,file=sys.stderr)
+      return 1
+   return 0
+
+#
+# show a scope capture file: print a summary, analyze the capture or export a
+# time range to the text format of the scope log. Times are seconds after the
+# start of the capture
+#
+def runScopeCapture(args):
+   reader= cls_ScopeCaptureReader(args.capture)
+   displaymode= {"mnemonic": DISPLAY_MNEMONIC, "hex": DISPLAY_HEX, "both": DISPLAY_BOTH}[args.displaymode]
+   try:
+      reader.open()
+      if args.info:
+         print(reader.getFrameCount(),"frames in",reader.getBlockCount(),"blocks")
+         print(reader.getDroppedCount(),"frames dropped in",reader.getGapCount(),"gaps")
+         if reader.getStartTime() is not None:
+            print("Start:",datetime.datetime.fromtimestamp(reader.getStartTime()).strftime("%Y-%m-%d %H:%M:%S.%f"))
+            print("End:  ",datetime.datetime.fromtimestamp(reader.getEndTime()).strftime("%Y-%m-%d %H:%M:%S.%f"))
+         return 0
+      if args.analyze:
+         report= analyzeCapture(reader,args.interval)
+         if args.output:
+            output= open(args.output,"w",encoding="UTF-8")
+         else:
+            output= sys.stdout
+         try:
+            if args.report== "csv":
+               writeCsvReport(report,output)
+            else:
+               json.dump(report,output,indent=1)
+               output.write("\n")
+         finally:
+            if output is not sys.stdout:
+               output.close()
+         return 0
+      start= None
+      end= None
+      if reader.getStartTime() is not None:
+         if args.start is not None:
+            start= reader.getStartTime()+ args.start
+         if args.end is not None:
+            end= reader.getStartTime()+ args.end
+      if args.output:
+         with open(args.output,"a",encoding="UTF-8") as output:
+            reader.exportText(output,start,end,args.filter,displaymode)
+      else:
+         reader.exportText(sys.stdout,start,end,args.filter,displaymode)
+   except ScopeCaptureError as e:
+      print("Error: ",e.msg+': '+e.add_msg,file=sys.stderr)
+      return 1
+   except OSError as e:
+      print("Error: ",e.strerror,file=sys.stderr)
+      return 1
+   finally:
+      reader.close()
+   return 0
+
 class ValidateScale(argparse.Action):
     def __call__(self, parser, namespace, values, option_string=None):
         if values < 1.0 or values > 4.0:
@@ -132,6 +267,24 @@ def start():
    parser.add_argument('--diag','-diag',action='store_true',help=argparse.SUPPRESS)
    parser.add_argument('--scale','-scale',type=float,action=ValidateScale,help="Force scaling for high-DPI displays. 1.0<=SCALE<=4.0")
    parser.add_argument('--v','-v',action='store_true',help="Show pyILPER version")
+   parser.add_argument('--index','-index',metavar="DIR",help="Index all LIF image files of the directory tree DIR")
+   parser.add_argument('--search','-search',metavar="PATTERN",help="Search the LIF image file index for file names matching PATTERN (wildcards * and ?)")
+   parser.add_argument('--check','-check',nargs='+',metavar="PATH",help="Check LIF image files, directories are searched for *.dat and *.lif files")
+   parser.add_argument('--fix','-fix',action='store_true',help="Fix the header of the checked LIF image files")
+   parser.add_argument('--archive','-archive',metavar="DIR",help="LIF image file archive, lists the archived images if neither --add nor --restore is specified")
+   parser.add_argument('--add','-add',nargs='+',metavar="PATH",help="Add LIF image files to the archive, directories are searched for *.dat and *.lif files")
+   parser.add_argument('--restore','-restore',nargs=2,metavar=("NAME","FILE"),help="Restore the archived image NAME to FILE")
+   parser.add_argument('--medium','-medium',choices=list(dict_medium_layout.keys()),help="Medium type used to fix the header, default: derived from the file size")
+   parser.add_argument('--capture','-capture',metavar="FILE",help="Show the scope capture file FILE in the text format of the scope log")
+   parser.add_argument('--info','-info',action='store_true',help="Show number of frames, start and end time of the scope capture file")
+   parser.add_argument('--start','-start',type=float,metavar="SECONDS",help="Show frames from SECONDS after the start of the capture")
+   parser.add_argument('--end','-end',type=float,metavar="SECONDS",help="Show frames up to SECONDS after the start of the capture")
+   parser.add_argument('--filter','-filter',default="",metavar="FILTER",help="Show only frames which pass the scope filter FILTER, e.g. \"TAD, SDA\" or \"!IDY, !RDY\"")
+   parser.add_argument('--displaymode','-displaymode',choices=["mnemonic","hex","both"],default="mnemonic",help="Display mode of the frames")
+   parser.add_argument('--output','-output',metavar="FILE",help="Append the frames to FILE instead of showing them, write the analysis report to FILE")
+   parser.add_argument('--analyze','-analyze',action='store_true',help="Analyze the scope capture file: transactions, bytes per talker and listener, service requests, errors and throughput")
+   parser.add_argument('--report','-report',choices=["json","csv"],default="json",help="Format of the analysis report")
+   parser.add_argument('--interval','-interval',type=float,default=1.0,metavar="SECONDS",help="Time interval of the throughput in the analysis report")
    args=parser.parse_args()
 #
 #  show version
@@ -157,6 +310,27 @@ def start():
       copyConfig(args)
       sys.exit(1) 
 #
+#  run -capture command
+#
+   if args.capture:
+      sys.exit(runScopeCapture(args))
+#
+#  run -archive command
+#
+   if args.archive:
+      sys.exit(runLifArchive(args))
+#
+#  run -check command
+#
+   if args.check:
+      sys.exit(runLifCheck(args))
+#
+#  run -index and -search commands
+#
+   if args.index or args.search:
+      runLifIndex(args)
+      sys.exit(0)
+#
 #  set scaling, if specified
 #
    if args.scale:
@@ -0,0 +1,268 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# LIF image file archive
+# (c) 2026 Joachim Siebold
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# LIF image file archive class -------------------------------------------------
+#
+# Changelog
+# 19.10.2026
+# - initial version
+# - blobs are verified with their hash, restoreImage removes the temporary
+#   file on any error
+# - the manifest schema is checked before an image is restored
+#
+# The archive stores many LIF image files without duplicates. An archive is
+# a directory with two subdirectories:
+#
+# blobs:     the contents of the files and of all other non zero regions of
+#            the images, the name of a blob is the SHA-256 hash of its
+#            contents (blobs/ab/abcdef...). A file which is contained in many
+#            images is stored only once.
+# manifests: one manifest (JSON) for every image (NAME.lifm). It contains the
+#            size of the image and the list of extents [offset, length, hash]
+#            the image is made of. Regions which are not covered by an
+#            extent are zero.
+#
+# Images are restored byte by byte identical, the zero regions of an image
+# are not written and remain sparse.
+#
+import os
+import json
+import hashlib
+from .lifutils import cls_LifFile, cls_LifDirSnapshot, LifError
+
+LIF_ARCHIVE_VERSION=1
+LIF_ARCHIVE_EXTENSION=".lifm"
+LIF_ARCHIVE_HASHCHARS=frozenset("0123456789abcdef")
+
+#
+# check the schema of a manifest: the size of the image and the extents
+# [offset, length, hash] within the image, returns True if the manifest is
+# valid
+#
+def isValidManifest(manifest):
+   if not isinstance(manifest,dict) or manifest.get("version") != LIF_ARCHIVE_VERSION:
+      return False
+   size= manifest.get("size")
+   extents= manifest.get("extents")
+   if type(size) is not int or size < 0 or not isinstance(extents,list):
+      return False
+   for e in extents:
+      if not isinstance(e,list) or len(e) != 3:
+         return False
+      offset, length, h= e
+      if type(offset) is not int or type(length) is not int:
+         return False
+      if offset < 0 or length < 0 or offset+ length > size:
+         return False
+      if not isinstance(h,str) or len(h) != 64 or not LIF_ARCHIVE_HASHCHARS.issuperset(h):
+         return False
+   return True
+
+class cls_LifArchive:
+
+   def __init__(self,archivedir):
+      self.archivedir= archivedir
+      self.blobdir= os.path.join(archivedir,"blobs")
+      self.manifestdir= os.path.join(archivedir,"manifests")
+#
+#  create the archive directories
+#
+   def open(self):
+      try:
+         os.makedirs(self.blobdir,exist_ok=True)
+         os.makedirs(self.manifestdir,exist_ok=True)
+      except OSError as e:
+         raise LifError("Cannot create archive",e.strerror)
+
+   def getManifestFilename(self,name):
+      return os.path.join(self.manifestdir,name+LIF_ARCHIVE_EXTENSION)
+
+   def __blobpath__(self,h):
+      return os.path.join(self.blobdir,h[0:2],h)
+#
+#  store a blob if it does not exist, returns the hash and the number of
+#  bytes written
+#
+   def __putblob__(self,data):
+      h= hashlib.sha256(data).hexdigest()
+      path= self.__blobpath__(h)
+      if os.path.exists(path):
+         return h, 0
+      os.makedirs(os.path.dirname(path),exist_ok=True)
+      tmpfile= path+".tmp"
+      with open(tmpfile,"wb") as f:
+         f.write(data)
+      os.replace(tmpfile,path)
+      return h, len(data)
+
+   def __getblob__(self,h,length):
+      try:
+         with open(self.__blobpath__(h),"rb") as f:
+            data= f.read()
+      except OSError as e:
+         raise LifError("Cannot read archive blob",h)
+      if len(data) != length:
+         raise LifError("Archive blob has wrong size",h)
+      if hashlib.sha256(data).hexdigest() != h:
+         raise LifError("Archive blob is corrupted",h)
+      return data
+#
+#  get the file extents [offset, length] of a LIF image file in ascending
+#  order. Header and directory are one extent, files which overlap are
+#  left to the non zero regions.
+#
+   def __fileextents__(self,path,size):
+      lif= cls_LifFile()
+      lif.set_filename(path)
+      try:
+         lif.lifopen(True)
+      except LifError:
+         return []
+      try:
+         snapshot= cls_LifDirSnapshot(lif)
+         extents= [[0,(lif.dir_start+ lif.dir_length)* 256]]
+         for e in snapshot.entries:
+            if e is not None:
+               extents.append([e[2]* 256, e[3]* 256])
+      except LifError:
+         return []
+      finally:
+         lif.lifclose()
+      extents.sort()
+      result=[]
+      end= 0
+      for offset, length in extents:
+         if offset < end or offset >= size:
+            continue
+         length= min(length,size- offset)
+         result.append([offset, length])
+         end= offset+ length
+      return result
+#
+#  split a region into runs of non zero records, returns [offset, length]
+#
+   def __nonzero__(self,data,offset,length):
+      runs=[]
+      start= None
+      for i in range(offset,offset+length,256):
+         n= min(256,offset+length-i)
+         if data[i:i+n].count(0) != n:
+            if start is None:
+               start= i
+         elif start is not None:
+            runs.append([start, i- start])
+            start= None
+      if start is not None:
+         runs.append([start, offset+ length- start])
+      return runs
+#
+#  add a LIF image file to the archive as name, returns the image size and
+#  the number of new bytes stored in the archive
+#
+   def addImage(self,path,name=None):
+      if name is None:
+         name= os.path.basename(path)
+      try:
+         with open(path,"rb") as f:
+            data= f.read()
+      except OSError as e:
+         raise LifError("Cannot read file",e.strerror)
+      size= len(data)
+      regions=[]
+      end= 0
+      for offset, length in self.__fileextents__(path,size):
+         regions.extend(self.__nonzero__(data,end,offset- end))
+         regions.append([offset, length])
+         end= offset+ length
+      regions.extend(self.__nonzero__(data,end,size- end))
+      stored= 0
+      extents=[]
+      try:
+         for offset, length in regions:
+            h, n= self.__putblob__(data[offset:offset+length])
+            stored+= n
+            extents.append([offset, length, h])
+         manifest= {"version": LIF_ARCHIVE_VERSION, "name": name, "size": size, "extents": extents}
+         tmpfile= self.getManifestFilename(name)+".tmp"
+         with open(tmpfile,"w") as f:
+            json.dump(manifest,f)
+         os.replace(tmpfile,self.getManifestFilename(name))
+      except OSError as e:
+         raise LifError("Cannot write archive",e.strerror)
+      return [size, stored]
+#
+#  list the names of the archived images
+#
+   def getImages(self):
+      try:
+         names= os.listdir(self.manifestdir)
+      except OSError as e:
+         raise LifError("Cannot read archive",e.strerror)
+      return sorted([n[:-len(LIF_ARCHIVE_EXTENSION)] for n in names if n.endswith(LIF_ARCHIVE_EXTENSION)])
+
+   def getManifest(self,name):
+      try:
+         with open(self.getManifestFilename(name),"r") as f:
+            manifest= json.load(f)
+      except OSError as e:
+         raise LifError("Cannot read manifest",e.strerror)
+      except ValueError as e:
+         raise LifError("Invalid manifest",name)
+      if isinstance(manifest,dict) and manifest.get("version") != LIF_ARCHIVE_VERSION:
+         raise LifError("Unsupported manifest version",name)
+      if not isValidManifest(manifest):
+         raise LifError("Invalid manifest",name)
+      return manifest
+#
+#  restore an image to outputfile. The image is written to a temporary file
+#  which replaces outputfile at the end, the temporary file is removed if
+#  the image cannot be restored.
+#
+   def restoreImage(self,name,outputfile):
+      manifest= self.getManifest(name)
+      tmpfile= outputfile+".tmp"
+      done= False
+      try:
+         with open(tmpfile,"wb") as f:
+            f.truncate(manifest["size"])
+            for offset, length, h in manifest["extents"]:
+               f.seek(offset)
+               f.write(self.__getblob__(h,length))
+         os.replace(tmpfile,outputfile)
+         done= True
+      except OSError as e:
+         raise LifError("Cannot write file",e.strerror)
+      finally:
+         if not done:
+            try:
+               os.remove(tmpfile)
+            except OSError:
+               pass
+#
+# restore an image from its manifest file, used by the drive to mount an
+# archived image. Returns the name of the restored LIF image file
+#
+def restoreFromManifest(manifestfile,outputdir):
+   manifestdir= os.path.dirname(os.path.abspath(manifestfile))
+   archive= cls_LifArchive(os.path.dirname(manifestdir))
+   name= os.path.basename(manifestfile)[:-len(LIF_ARCHIVE_EXTENSION)]
+   outputfile= os.path.join(outputdir,name)
+   archive.restoreImage(name,outputfile)
+   return outputfile
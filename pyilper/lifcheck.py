@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# LIF image file integrity check
+# (c) 2026 Joachim Siebold
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# LIF image file check functions -----------------------------------------------
+#
+# Changelog
+# 19.10.2026
+# - initial version
+# - the directory is read only if it is within the file, added the dirrange
+#   check
+#
+# Checks a batch of LIF image files in a pool of worker processes:
+#
+# magic:     the file is not a LIF image file
+# layout:    tracks, surfaces and blocks are equal (HP firmware bug)
+# version:   LIF version is not 1
+# label:     garbage in label field
+# dirlength: garbage in the directory length
+# directory: the directory is not within the medium
+# dirrange:  the directory is beyond the end of the file
+# overlap:   a file overlaps the directory or another file
+# mediumend: a file is allocated past the end of the medium
+#
+# The header problems (layout, version, label, dirlength) can be fixed, the
+# same fixes are applied by the drive if record 0 is written. The layout is
+# taken from the specified medium type or derived from the file size.
+#
+# Used by the command line: python -m pyilper --check FILE|DIR ... [--fix]
+#
+import os
+import functools
+from .pilglobals import PILGLOBALS
+from .lifcore import *
+from .lifutils import cls_LifLock, LifError, runLifPool
+from .lifindex import LIF_INDEX_EXTENSIONS
+
+dict_check_message={"magic":"not a LIF image file","layout":"tracks, surfaces and blocks are equal","version":"LIF version is not 1","label":"garbage in label field","dirlength":"garbage in directory length","directory":"directory is not within the medium","dirrange":"directory out of range","overlap":"file overlaps","mediumend":"file is allocated past the end of the medium"}
+
+#
+# problem description, name is the name of the affected file(s)
+#
+def getProblem(check,name=""):
+   return {"check": check, "file": name, "message": dict_check_message[check]}
+#
+# get the medium layout [tracks, surfaces, blocks] of a lifutils medium type
+# with the given file size, returns None if there is no matching medium type
+#
+def getMediumLayout(size):
+   for layout in dict_medium_layout.values():
+      if layout[0]* layout[1]* layout[2]* 256 == size:
+         return layout
+   return None
+#
+# find all LIF image files of the given files and directory trees
+#
+def findLifImages(paths):
+   found=[]
+   for path in paths:
+      if not os.path.isdir(path):
+         found.append(path)
+         continue
+      for dirpath, dirnames, filenames in os.walk(path):
+         for filename in sorted(filenames):
+            if filename.lower().endswith(LIF_INDEX_EXTENSIONS):
+               found.append(os.path.join(dirpath,filename))
+   return found
+#
+# check the directory, returns a list of problems. The directory is read only
+# if it is within the file, a garbage directory length never reads more than
+# the file.
+#
+def checkLifDirectory(fd,dir_start,dir_length,total_records,size):
+   problems=[]
+   if dir_start < 1 or dir_start+ dir_length > total_records:
+      return [getProblem("directory")]
+   if dir_start+ dir_length > size// 256:
+      return [getProblem("dirrange")]
+   os.lseek(fd,dir_start* 256,os.SEEK_SET)
+   buf= os.read(fd,dir_length* 256)
+   n= len(buf)// LIF_DIRENTRY_SIZE
+   files=[]
+   for e in LIF_DIRENTRY.iter_unpack(buf[:n*LIF_DIRENTRY_SIZE]):
+      name, ftype, start_block, alloc_blocks, dt, vol, impl= e
+      if ftype == 0xFFFF:
+         break
+      if ftype == 0x0000:
+         continue
+      name= name.rstrip(b" ").decode("latin-1")
+      if start_block < dir_start+ dir_length:
+         problems.append(getProblem("overlap","directory, "+name))
+      if start_block+ alloc_blocks > total_records:
+         problems.append(getProblem("mediumend",name))
+      files.append([start_block, start_block+ alloc_blocks, name])
+   files.sort()
+   for i in range(1,len(files)):
+      if files[i][0] < files[i-1][1]:
+         problems.append(getProblem("overlap",files[i-1][2]+", "+files[i][2]))
+   return problems
+#
+# check one LIF image file and fix the header problems if fix is True.
+# Returns a dict with the path, the list of problems and the list of fixed
+# problems
+#
+def checkLifImage(path,medium,fix):
+   result={"path": path, "problems": [], "fixed": []}
+   if fix:
+      mode= os.O_RDWR
+   else:
+      mode= os.O_RDONLY
+   if PILGLOBALS.isWindows:
+      mode|= os.O_BINARY
+   try:
+      fd= os.open(path,mode)
+   except OSError as e:
+      result["error"]= e.strerror
+      return result
+#
+#  lock the whole file, a pyILPER drive in another process must not write
+#  the medium while we check or fix it
+#
+   lock= cls_LifLock(path,0,0,fix)
+   try:
+      lock.acquire(fd)
+      size= os.fstat(fd).st_size
+      header= bytearray(os.read(fd,256))
+      if len(header) < 256 or header[0x00]!= 0x80 or header[0x01]!= 0x00:
+         result["problems"].append(getProblem("magic"))
+         return result
+      problems= checkLifHeader(header)
+      if fix and problems != []:
+         if medium is None:
+            layout= getMediumLayout(size)
+         else:
+            layout= dict_medium_layout[medium]
+         fixed= fixLifHeader(header,layout)
+         if fixed != []:
+            os.lseek(fd,0,os.SEEK_SET)
+            os.write(fd,header)
+         result["fixed"]= fixed
+         problems= checkLifHeader(header)
+      result["problems"]= [getProblem(p) for p in problems]
+#
+#     size of the medium from the header, if the layout is invalid use the
+#     file size
+#
+      if "layout" in problems:
+         total_records= size// 256
+      else:
+         total_records= getLifInt(header,24,4)* getLifInt(header,28,4)* getLifInt(header,32,4)
+      result["problems"].extend(checkLifDirectory(fd,getLifInt(header,8,4),getLifInt(header,16,4),total_records,size))
+   except LifError as e:
+      result["error"]= e.msg+": "+e.add_msg
+   except OSError as e:
+      result["error"]= e.strerror
+#
+#  an unexpected error fails this image but never the batch
+#
+   except Exception as e:
+      result["error"]= "Unexpected error: "+repr(e)
+   finally:
+      lock.release()
+      os.close(fd)
+   return result
+
+def checkLifImages(todo,medium,fix):
+   return [checkLifImage(path,medium,fix) for path in todo]
+#
+# check a batch of LIF image files, small batches are checked in-process.
+# Returns a dict with the results of all images and the number of checked,
+# fixed and failed images. An image failed if it has problems left or could
+# not be read. progress is called with the number of checked images.
+#
+def checkLifBatch(paths,medium=None,fix=False,progress=None):
+   results=[]
+   for r in runLifPool(functools.partial(checkLifImages,medium=medium,fix=fix),paths):
+      results.extend(r)
+      if progress is not None:
+         progress(len(results),len(paths))
+   summary={"checked": len(results), "fixed": 0, "failed": 0, "images": results}
+   for r in results:
+      if r["fixed"] != []:
+         summary["fixed"]+=1
+      if r["problems"] != [] or "error" in r:
+         summary["failed"]+=1
+   return summary
@@ -54,10 +54,17 @@
 # - set required version of lifutils to 2.0.0
 # 12.12.2024 jsi
 # - hepax xrom file moved to new "category system extensions"
+# 19.10.2026
+# - added medium layout table, putLifDateTime and createLifMedium
+# - added directory entry struct layout, file length table dict_finfo_length
+#   and getLifTypeLen
+# - added checkLifHeader and fixLifHeader (moved from pildrive.py)
 #
 # core constants and functions to handle lif image files
 #
 
+import os
+import struct
 import pathlib
 
 
@@ -73,6 +80,19 @@ DEVICE_XROMS=[["Card Reader","cardrdr"],["HP-IL Development","devil"],["HP-IL","
 
 ALLDEVICE_XROM=["All HP Devices","hpdevices"]
 
+#
+# medium layouts (tracks, surfaces, blocks) of the lifutils medium types
+#
+dict_medium_layout={"cass":[2,1,256],"disk":[77,2,16],"hdrive1":[80,2,16],"hdrive2":[125,1,64],"hdrive4":[125,2,64],"hdrive8":[125,4,64],"hdrive16":[125,8,64]}
+#
+# number of records filled with 0xFF if a drive formats a medium
+#
+LIF_FORMAT_FILL_RECORDS=127
+#
+# chunk size for writing the 0xFF fill of a medium
+#
+LIF_FILL_CHUNKSIZE=65536
+
 #
 # Minimum Version number of LIFUTILS
 #
@@ -145,6 +165,9 @@ def getLifInt(data,offset,length):
 def bcdtodec(c):
    return(((c&0xf0)>>4)*10 +(c &0x0f))
 
+def dectobcd(d):
+   return(((d//10)<<4) | (d %10))
+
 #
 # get time and date from a byte string
 #
@@ -157,6 +180,16 @@ def getLifDateTime(b,offset):
    sec=bcdtodec(b[offset+5])
    return("{:02d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(day,month,year,hour,minute,sec))
 #
+# store a time tuple as LIF date and time (yy mm dd hh mm ss) into a byte array
+#
+def putLifDateTime(b,offset,t):
+   b[offset]=dectobcd(t.tm_year % 100)
+   b[offset+1]=dectobcd(t.tm_mon)
+   b[offset+2]=dectobcd(t.tm_mday)
+   b[offset+3]=dectobcd(t.tm_hour)
+   b[offset+4]=dectobcd(t.tm_min)
+   b[offset+5]=dectobcd(t.tm_sec)
+#
 # get a lif string, also those that contain a blank in between
 #
 def getLifString(data,offset,length):
@@ -172,3 +205,107 @@ def getLifString(data,offset,length):
          str_list.append(chr(data[offset+i]))
       return "".join(str_list)
  
+#
+# directory entry: name, file type, start block, allocated blocks, date/time,
+# volume flag/number, implementation field (4 bytes)
+#
+LIF_DIRENTRY=struct.Struct(">10sHII6s2s4s")
+LIF_DIRENTRY_SIZE=LIF_DIRENTRY.size
+#
+# logical file length, computed from the allocated blocks and the
+# implementation field of the directory entry
+#
+def lifLengthBlocks(alloc_blocks,impl):
+   return alloc_blocks* 256
+
+def lifLengthNibbles(alloc_blocks,impl):
+   return ((impl[0] + (impl[1] <<8) + (impl[2]<<16))+1)//2
+
+def lifLengthSdata(alloc_blocks,impl):
+   return ((impl[0] << 8) + impl[1])*8
+
+def lifLengthData71(alloc_blocks,impl):
+   return (impl[0] + (impl[1] <<8)) * (impl[2] + (impl[3]<<8))
+
+def lifLengthRegs41(alloc_blocks,impl):
+   return (((impl[0] << 8) + impl[1])*8)+1
+
+def lifLengthPgm41(alloc_blocks,impl):
+   return ((impl[0] << 8) + impl[1])+1
+
+dict_finfo_length={0x0001:lifLengthBlocks,0xE0D1:lifLengthBlocks,0x00FF:lifLengthNibbles,0xE0D0:lifLengthSdata,0xE0F0:lifLengthData71,0xE0F1:lifLengthData71,0xE204:lifLengthNibbles,0xE205:lifLengthNibbles,0xE206:lifLengthNibbles,0xE207:lifLengthNibbles,0xE208:lifLengthNibbles,0xE209:lifLengthNibbles,0xE20A:lifLengthNibbles,0xE20B:lifLengthNibbles,0xE20C:lifLengthNibbles,0xE20D:lifLengthNibbles,0xE214:lifLengthNibbles,0xE215:lifLengthNibbles,0xE216:lifLengthNibbles,0xE217:lifLengthNibbles,0xE218:lifLengthBlocks,0xE219:lifLengthBlocks,0xE21A:lifLengthBlocks,0xE21B:lifLengthBlocks,0xE21C:lifLengthNibbles,0xE222:lifLengthNibbles,0xE224:lifLengthNibbles,0xE22E:lifLengthNibbles,0xE020:lifLengthRegs41,0xE030:lifLengthRegs41,0xE040:lifLengthRegs41,0xE050:lifLengthRegs41,0xE060:lifLengthRegs41,0xE070:lifLengthRegs41,0xE080:lifLengthPgm41,0xE052:lifLengthBlocks,0xE053:lifLengthBlocks,0xE058:lifLengthBlocks,0xE089:lifLengthBlocks,0xE08A:lifLengthBlocks,0xE0FE:lifLengthBlocks,0xE088:lifLengthBlocks,0xE08B:lifLengthBlocks}
+#
+# get type name and logical length of a file, returns [type, length]
+#
+def getLifTypeLen(ftype,alloc_blocks,impl):
+   f= dict_finfo_length.get(ftype)
+   if f is None:
+      return ["0x{:4X}".format(ftype), alloc_blocks* 256]
+   finfo= get_finfo_type(ftype)
+   if finfo is None:
+      t= "0x{:4X}".format(ftype)
+   else:
+      t= finfo[0]
+   return [t, f(alloc_blocks,impl)]
+#
+# create a medium of total_records records on the open file descriptor fd.
+# The file is truncated, the first fill_records records are filled with 0xFF
+# in large chunks and the file is then extended to the medium size with
+# ftruncate. The extended region reads as zero and stays sparse on file
+# systems that support it. Raises OSError.
+#
+def createLifMedium(fd,total_records,fill_records):
+   os.ftruncate(fd,0)
+   os.lseek(fd,0,os.SEEK_SET)
+   remaining= fill_records*256
+   chunk= memoryview(b"\xFF"* min(remaining,LIF_FILL_CHUNKSIZE))
+   while remaining > 0:
+      remaining-= os.write(fd,chunk[:remaining])
+   os.ftruncate(fd,max(total_records,fill_records)*256)
+#
+# check the header (record 0) of a LIF version 1 medium for the errors of
+# some HP-IL controllers. Returns a list of problems:
+# "layout":    tracks, surfaces and blocks are equal (HP firmware bug)
+# "version":   LIF version is not 1 (HP41 initialized images)
+# "label":     garbage in label field (HP41 initialized images)
+# "dirlength": bit 0x40 set in the directory length, only with a garbage label
+#
+def checkLifHeader(header):
+   problems=[]
+   if header[0x00]!= 0x80 or header[0x01]!= 0x00:
+      return problems
+   tracks= getLifInt(header,24,4)
+   surfaces=getLifInt(header,28,4)
+   blocks=getLifInt(header,32,4)
+   if tracks == surfaces and surfaces == blocks:
+      problems.append("layout")
+   if header[0x14]!= 0x00 or header[0x15]!= 0x01:
+      problems.append("version")
+   if header[0x02] != 0x20 and (header[0x02] < 0x41 or header[0x02] > 0x5A):
+      problems.append("label")
+      if header[0x12] & 0x40 != 0:
+         problems.append("dirlength")
+   return problems
+#
+# fix the problems found by checkLifHeader in place. The medium layout
+# [tracks, surfaces, blocks] is only fixed if layout is not None.
+# Returns the list of fixed problems
+#
+def fixLifHeader(header,layout):
+   problems= checkLifHeader(header)
+   if "layout" in problems:
+      if layout is None:
+         problems.remove("layout")
+      else:
+         putLifInt(header,24,4,layout[0])
+         putLifInt(header,28,4,layout[1])
+         putLifInt(header,32,4,layout[2])
+   if "version" in problems:
+      header[0x14]= 0x00 
+      header[0x15]= 0x01
+   if "label" in problems:
+      for i in range(6):
+         header[i+0x02]=0x20
+   if "dirlength" in problems:
+      header[0x12] &= ~0x40
+   return problems
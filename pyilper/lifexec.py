@@ -125,9 +125,36 @@
 # - refactoring of global variables
 # 05.04.2026 jsi
 # - Pylint error fixes
+# 19.10.2026
+# - cls_lifinit initializes the medium in-process with initLifMedium
+# - pack, purge, rename, label, raw import and export are done in-process
+#   by cls_LifEngine, the first stage of exec_double_export and the second
+#   stage of exec_double_import run in-process
+# - exec_double_import reads the output of the conversion from a pipe while
+#   the command is running instead of a temporary file, cls_chk_import
+#   examines the directory entry at the head of the stream. The head and the
+#   remaining output are read on the worker pool
+# - LIF engine operations and external commands run on a worker thread pool,
+#   the GUI thread shows an application modal progress dialog and keeps
+#   processing events. Operations that modify the medium hold the disk lock
+#   of the drive. All exceptions of an operation are raised again on the
+#   GUI thread
+# - no user input is processed until the progress dialog is shown
+# - added cls_lifbulkimport and cls_lifbulkexport to import all files of a
+#   directory and to export all files to a directory or a zip file. The
+#   names of the exported files are sanitized and made unique, existing
+#   files are not overwritten
+# - added cls_lifsearch to search the index of all LIF image files of the
+#   working directory
+# - cls_lifview caches the listings in memory and on disk (cls_LifViewCache)
 #
+
 import subprocess
-import tempfile
+import threading
+import hashlib
+import collections
+import concurrent.futures
+import zipfile
 import os
 import pathlib
 from .pilglobals import PILGLOBALS
@@ -137,7 +164,9 @@ if PILGLOBALS.QT_Bindings=="PyQt5":
    from PyQt5 import QtCore, QtGui, QtWidgets
 
 from .lifcore import *
-from .pilcore import decode_version
+from .lifutils import LifError, initLifMedium, cls_LifEngine
+from .lifindex import cls_LifIndex, getLifIndexFilename
+from .pilcore import decode_version, buildconfigfilename
 from .pilcharconv import barrconv
 from .pilpdf import cls_pdfprinter
 from .pilconfig import PILCONFIG
@@ -258,11 +287,148 @@ def check_errormessages(parent,ret):
    msgBox.destroy()
    return
 #
+# LIF worker pool ------------------------------------------------------------
+#
+# LIF engine operations and external commands run on a thread of a
+# QThreadPool and not on the GUI thread. The GUI thread runs a local event
+# loop until the operation has finished, timers and the queues of the other
+# tabs are still processed. A progress dialog is shown if the operation takes
+# longer than LIF_WORKER_SHOWDELAY ms. Its cancel button calls the cancel
+# function of the operation, if there is none the dialog cannot be cancelled.
+# Until the dialog is shown the local event loop does not process user input,
+# the input is delivered later and is blocked by the modal dialog. No second
+# operation can be started while the first is running.
+#
+# Drive lock handoff: if a drive is specified, the worker acquires the disk
+# lock of the drive before the operation starts and releases it when the
+# operation has finished. The drive thread waits for the lock and never
+# sees a partially modified medium.
+#
+LIF_WORKER_THREADS=2
+LIF_WORKER_SHOWDELAY=500
+
+class cls_LifWorkerSignals(QtCore.QObject):
+
+   if PILGLOBALS.QT_Bindings=="PySide6":
+      sig_progress=QtCore.Signal(int,int)
+      sig_done=QtCore.Signal()
+   if PILGLOBALS.QT_Bindings=="PyQt5":
+      sig_progress=QtCore.pyqtSignal(int,int)
+      sig_done=QtCore.pyqtSignal()
+
+class cls_LifWorker(QtCore.QRunnable):
+
+   pool= None
+
+   def __init__(self,func,args,pildevice):
+      super().__init__()
+      self.setAutoDelete(False)
+      self.func= func
+      self.args= args
+      self.pildevice= pildevice
+      self.signals= cls_LifWorkerSignals()
+      self.result= None
+      self.exception= None
+      self.done= False
+
+   def run(self):
+      if self.pildevice is not None:
+         self.pildevice.acquiredisklock()
+      try:
+         self.result= self.func(*self.args)
+#
+#     all exceptions are raised again on the GUI thread
+#
+      except Exception as e:
+         self.exception= e
+      finally:
+         if self.pildevice is not None:
+            self.pildevice.releasedisklock()
+         self.done= True
+         self.signals.sig_done.emit()
+
+   @classmethod
+   def start(cls,worker):
+      if cls.pool is None:
+         cls.pool= QtCore.QThreadPool()
+         cls.pool.setMaxThreadCount(LIF_WORKER_THREADS)
+      cls.pool.start(worker)
+#
+# run func(*args) on the worker pool, returns the result of func or raises
+# the exception of func. If an engine is specified, its progress is displayed
+# and it is cancelled by the cancel button. The progress dialog is
+# application modal, no other LIF operation can be started while the worker
+# holds the medium.
+#
+def exec_worker(parent,func,args,cancel=None,engine=None,pildevice=None):
+   worker= cls_LifWorker(func,args,pildevice)
+   dialog= QtWidgets.QProgressDialog("Processing ...","Cancel",0,0,parent)
+   dialog.setWindowTitle("pyILPER")
+   dialog.setWindowModality(QtCore.Qt.ApplicationModal)
+   dialog.setMinimumDuration(LIF_WORKER_SHOWDELAY)
+   dialog.setAutoReset(False)
+   dialog.setAutoClose(False)
+   if engine is not None:
+      cancel= engine.cancel
+      engine.setProgress(worker.signals.sig_progress.emit)
+      worker.signals.sig_progress.connect(lambda done,total: show_progress(dialog,done,total))
+   if cancel is None:
+      dialog.setCancelButton(None)
+   else:
+      dialog.canceled.connect(cancel)
+   loop= QtCore.QEventLoop()
+   worker.signals.sig_done.connect(loop.quit)
+   delay= QtCore.QTimer()
+   delay.setSingleShot(True)
+   delay.timeout.connect(loop.quit)
+   cls_LifWorker.start(worker)
+#
+#  no user input until the dialog is shown after LIF_WORKER_SHOWDELAY ms
+#
+   delay.start(LIF_WORKER_SHOWDELAY)
+   loop.exec(QtCore.QEventLoop.ExcludeUserInputEvents)
+   delay.stop()
+   if not worker.done:
+      dialog.show()
+      loop.exec()
+#
+#  closing the dialog emits canceled, the finished operation must not be
+#  cancelled
+#
+   if cancel is not None:
+      dialog.canceled.disconnect(cancel)
+   dialog.close()
+   dialog.deleteLater()
+   if engine is not None:
+      engine.setProgress(None)
+   if worker.exception is not None:
+      raise worker.exception
+   return worker.result
+
+def show_progress(dialog,done,total):
+   dialog.setMaximum(total)
+   dialog.setValue(done)
+#
+# run a command on the worker pool, the command is killed by the cancel
+# button. Returns a subprocess.CompletedProcess object
+#
+def exec_command(parent,cmd,stdin=None,data=None,stdout=subprocess.PIPE):
+   if data is not None:
+      stdin= subprocess.PIPE
+   proc= subprocess.Popen(cmd,stdin=stdin,stdout=stdout,stderr=subprocess.PIPE,creationflags=SUBPROCESS_FLAG)
+   try:
+      out, err= exec_worker(parent,proc.communicate,(data,),cancel=proc.kill)
+   except OSError:
+      proc.kill()
+      proc.wait()
+      raise
+   return subprocess.CompletedProcess(cmd,proc.returncode,out,err)
+#
 # exec single command
 #
 def exec_single(parent,cmd):
    try:
-      ret=subprocess.run(cmd,stderr=subprocess.PIPE,creationflags=SUBPROCESS_FLAG)
+      ret=exec_command(parent,cmd,stdout=None)
       check_errormessages(parent,ret)
    except OSError as e:
       reply=QtWidgets.QMessageBox.critical(parent,'Error',e.strerror,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
@@ -274,7 +440,7 @@ def exec_single(parent,cmd):
 def exec_single_export(parent,cmd):
    returnvalue=None
    try:
-      ret= subprocess.run(cmd,stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=SUBPROCESS_FLAG)
+      ret= exec_command(parent,cmd)
       check_errormessages(parent,ret)
       if ret.returncode==0:
          returnvalue= ret.stdout
@@ -285,55 +451,252 @@ def exec_single_export(parent,cmd):
       reply=QtWidgets.QMessageBox.critical(parent,'Error',e.strerror,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
    finally:
       return returnvalue
+#
+# exec an operation of the in-process LIF engine on the worker pool, display
+# errors. Pass the drive if the operation modifies the medium
+#
+def exec_engine(parent,engine,func,*args,pildevice=None):
+   try:
+      return exec_worker(parent,func,args,engine=engine,pildevice=pildevice)
+   except LifError as e:
+      reply=QtWidgets.QMessageBox.critical(parent,'Error',e.msg+': '+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+   except OSError as e:
+      reply=QtWidgets.QMessageBox.critical(parent,'Error',e.strerror,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+   except Exception as e:
+      reply=QtWidgets.QMessageBox.critical(parent,'Error','Unexpected error: '+repr(e),QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+   return None
+#
+# export a file from a lif image file with the in-process LIF engine, write
+# the LIF transport file or the raw file to outputfile
+#
+def exec_engine_export(parent,lifimagefile,liffilename,raw,outputfile):
+   engine= cls_LifEngine(lifimagefile)
+   data= exec_engine(parent,engine,engine.exportFile,liffilename,raw)
+   if data is None:
+      return
+   try:
+      with open(outputfile,"wb") as f:
+         f.write(data)
+   except OSError as e:
+      reply=QtWidgets.QMessageBox.critical(parent,'Error',e.strerror,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+#
+# import a LIF transport file into a lif image file with the in-process
+# LIF engine
+#
+def exec_engine_import(parent,lifimagefile,inputfile,pildevice=None):
+   try:
+      with open(inputfile,"rb") as f:
+         data= f.read()
+   except OSError as e:
+      reply=QtWidgets.QMessageBox.critical(parent,'Error',e.strerror,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+      return
+   engine= cls_LifEngine(lifimagefile)
+   exec_engine(parent,engine,engine.importFile,data,pildevice=pildevice)
+#
+# read the remaining output of a command and wait for the command to finish
+#
+def read_output(proc):
+   data= proc.stdout.read()
+   proc.wait()
+   return data
 
 #
-# exec piped command, read input from file, return True if success, False otherwise
+# thread that reads a pipe until EOF, used to collect the error messages
+# of a command. This prevents that the command blocks on a full pipe.
 #
-def exec_double_import(parent,cmd1,cmd2,inputfile):
+class cls_pipecollector(threading.Thread):
 
-   tmpfile=None
+   def __init__(self,pipe):
+      super().__init__()
+      self.daemon= True
+      self.pipe= pipe
+      self.data= b""
+
+   def run(self):
+      try:
+         self.data= self.pipe.read()
+      except (OSError, ValueError):
+         pass
+#
+# exec piped command, read input from file, the output is imported into
+# the lif image file by the in-process LIF engine. The output is read from
+# a pipe while the command is still running. Only the directory entry at
+# the head of the output is needed to ask the user for confirmation.
+#
+def exec_double_import(parent,cmd1,lifimagefile,inputfile,pildevice=None):
+
+   fd=None
+   proc=None
    try:
       if PILGLOBALS.isWindows:
          fd= os.open(inputfile, os.O_RDONLY | os.O_BINARY )
       else:
          fd= os.open(inputfile, os.O_RDONLY)
 #
-# create temporary file
+#  start first command, collect error messages in the background
+#
+      proc= subprocess.Popen(cmd1,stdin=fd,stdout=subprocess.PIPE,stderr=subprocess.PIPE, creationflags=SUBPROCESS_FLAG)
+      os.close(fd)
+      fd=None
+      errors= cls_pipecollector(proc.stderr)
+      errors.start()
 #
-      tmpfile=tempfile.TemporaryFile()
+#  read and examine the directory entry on the worker pool, the command is
+#  killed if the user cancels
+#
+      head= exec_worker(parent,proc.stdout.read,(LIF_DIRENTRY_SIZE,),cancel=proc.kill)
+      if len(head) == LIF_DIRENTRY_SIZE:
+         if not cls_chk_import.execute(head, None):
+            return
 #
-#  execute first command
+#  read the remaining output and wait for the command to finish
 #
-      ret= subprocess.run(cmd1,stdin=fd,stdout=tmpfile,stderr=subprocess.PIPE, creationflags=SUBPROCESS_FLAG)
+      data= head+ exec_worker(parent,read_output,(proc,),cancel=proc.kill)
+      errors.join()
+      ret= subprocess.CompletedProcess(cmd1,proc.returncode,None,errors.data)
       check_errormessages(parent,ret)
-      os.close(fd)
       if ret.returncode!=0:
-         tmpfile.close()
          return
 #
-#  execute second command
+#  output too short, let cls_chk_import report it
 #
-      tmpfile.seek(0)
-      if  not cls_chk_import.execute(tmpfile.fileno(), None):
-         tmpfile.close()
+      if len(head) < LIF_DIRENTRY_SIZE:
+         cls_chk_import.execute(head, None)
          return
-      tmpfile.seek(0)
-      ret= subprocess.run(cmd2,stdin=tmpfile,stderr=subprocess.PIPE, creationflags=SUBPROCESS_FLAG)
-      check_errormessages(parent,ret)
+#
+#  import output of the first command
+#
+      engine= cls_LifEngine(lifimagefile)
+      exec_engine(parent,engine,engine.importFile,data,pildevice=pildevice)
 #
 #  catch errors
 #
    except OSError as e:
       reply=QtWidgets.QMessageBox.critical(parent,'Error',e.strerror,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
    finally:
-      if tmpfile is not None:
-         tmpfile.close()
+      if fd is not None:
+         os.close(fd)
+      if proc is not None:
+         if proc.poll() is None:
+            proc.kill()
+         proc.stdout.close()
+         proc.wait()
       return
 #
-# exec piped command, write output to file or stdout
+# cache of the output of the lifutils which decode a file for viewing. The
+# key consists of the image file, the directory entry (name, start block,
+# size) and a hash of directory entry and file content and the command.
+# The least recently used listings are removed if the cache exceeds maxsize
+# bytes. Listings are also stored in the disk cache directory which holds
+# maxfiles listings at most. Entries are invalidated by the ranges of records
+# a drive has written.
+#
+LIF_VIEW_CACHE_SIZE=8*1024*1024     # max. bytes of listings in memory
+LIF_VIEW_CACHE_FILES=256            # max. number of listings on disk
+
+class cls_LifViewCache:
+
+   def __init__(self,maxsize,maxfiles):
+      self.maxsize= maxsize
+      self.maxfiles= maxfiles
+      self.size= 0
+      self.entries= collections.OrderedDict()
+      self.lock= threading.Lock()
+      self.cachedir= None
+#
+#  directory of the disk cache, depends on the pyILPER instance. Returns
+#  an empty string if the disk cache is not available
+#
+   def getCacheDir(self):
+      if self.cachedir is None:
+         self.cachedir= buildconfigfilename("viewcache",PILGLOBALS.ConfigVersion,PILGLOBALS.Instance,PILGLOBALS.Production)[0]
+         try:
+            os.makedirs(self.cachedir,exist_ok=True)
+         except OSError:
+            self.cachedir= ""
+      return self.cachedir
+#
+#  key of a listing, data is the file in LIF transport format
+#
+   def getKey(self,lifimagefile,data,cmd):
+      name= getLifString(data,0,10)
+      start_block= getLifInt(data,12,4)
+      alloc_blocks= getLifInt(data,16,4)
+      h= hashlib.sha1(data).hexdigest()
+      return (os.path.realpath(lifimagefile), name, start_block, alloc_blocks, h, tuple(cmd))
+
+   def __diskfile__(self,key):
+      return os.path.join(self.getCacheDir(),hashlib.sha1(repr(key).encode("utf-8")).hexdigest())
+
+   def get(self,key):
+      with self.lock:
+         output= self.entries.get(key)
+         if output is not None:
+            self.entries.move_to_end(key)
+            return output
+      if self.getCacheDir() == "":
+         return None
+      try:
+         diskfile= self.__diskfile__(key)
+         with open(diskfile,"rb") as f:
+            output= f.read()
+         os.utime(diskfile)
+      except OSError:
+         return None
+      self.__store__(key,output)
+      return output
+
+   def put(self,key,output):
+      self.__store__(key,output)
+      if self.getCacheDir() == "":
+         return
+#
+#     the disk cache is best effort, remove the oldest listings if there
+#     are too many
 #
-def exec_double_export(parent,cmd1,cmd2,outputfile):
-   tmpfile=None
+      try:
+         with open(self.__diskfile__(key),"wb") as f:
+            f.write(output)
+         files= [os.path.join(self.cachedir,n) for n in os.listdir(self.cachedir)]
+         if len(files) > self.maxfiles:
+            files.sort(key=os.path.getmtime)
+            for diskfile in files[:len(files)-self.maxfiles]:
+               os.remove(diskfile)
+      except OSError:
+         pass
+
+   def __store__(self,key,output):
+      with self.lock:
+         if key in self.entries:
+            return
+         self.entries[key]= output
+         self.size+= len(output)
+         while self.size > self.maxsize and len(self.entries) > 1:
+            k, v= self.entries.popitem(last=False)
+            self.size-= len(v)
+#
+#  remove the listings of files of lifimagefile which overlap the written
+#  record ranges [first, last]
+#
+   def invalidate(self,lifimagefile,ranges):
+      path= os.path.realpath(lifimagefile)
+      with self.lock:
+         for key in list(self.entries.keys()):
+            if key[0] != path:
+               continue
+            for first, last in ranges:
+               if key[2] <= last and key[2]+ key[3]- 1 >= first:
+                  self.size-= len(self.entries.pop(key))
+                  break
+
+LIFVIEWCACHE= cls_LifViewCache(LIF_VIEW_CACHE_SIZE,LIF_VIEW_CACHE_FILES)
+#
+# exec piped command, write output to file or stdout. The raw file liffilename
+# is read from the lif image file by the in-process LIF engine and piped into
+# the command. If a cache is specified, the output is taken from or stored
+# in the cache
+#
+def exec_double_export(parent,lifimagefile,liffilename,cmd2,outputfile,cache=None):
    returnvalue= None
    try:
       fd=None
@@ -350,29 +713,30 @@ def exec_double_export(parent,cmd1,cmd2,outputfile):
          else:
             fd= os.open(outputfile, os.O_WRONLY | os.O_TRUNC | os.O_CREAT, 0o644)
 #
-# create temporary file
-#
-      tmpfile=tempfile.TemporaryFile()
+# get raw file, it is fed to the second command through a pipe while its
+# output and error messages are collected (communicate)
 #
-# execute first command
-#
-      ret= subprocess.run(cmd1,stdout=tmpfile,stderr=subprocess.PIPE, creationflags=SUBPROCESS_FLAG)
-      check_errormessages(parent,ret)
-      if ret.returncode!=0:
-         tmpfile.close()
-         if fd is not None:
-            os.close(fd)
+      engine= cls_LifEngine(lifimagefile)
+      data= exec_engine(parent,engine,engine.exportFile,liffilename,cache is None)
+      if data is None:
          return None
+      if cache is not None:
+         key= cache.getKey(lifimagefile,data,cmd2)
+         returnvalue= cache.get(key)
+         if returnvalue is not None:
+            return returnvalue
+         data= data[LIF_DIRENTRY_SIZE:]
 #
 # execute second command
 #
-      tmpfile.seek(0)
       if outputfile != "":
-         ret= subprocess.run(cmd2,stdin=tmpfile,stdout=fd,stderr=subprocess.PIPE, creationflags=SUBPROCESS_FLAG)
+         ret= exec_command(parent,cmd2,data=data,stdout=fd)
       else:
-         ret= subprocess.run(cmd2,stdin=tmpfile,stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=SUBPROCESS_FLAG)
+         ret= exec_command(parent,cmd2,data=data)
          if ret.returncode==0:
             returnvalue= ret.stdout
+            if cache is not None:
+               cache.put(key,returnvalue)
       check_errormessages(parent,ret)
 #
 #  catch errors
@@ -380,8 +744,6 @@ def exec_double_export(parent,cmd1,cmd2,outputfile):
    except OSError as e:
       reply=QtWidgets.QMessageBox.critical(parent,'Error',e.strerror,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
    finally:
-      if tmpfile is not None:
-         tmpfile.close()
       if fd is not None:
          os.close(fd)
       return returnvalue
@@ -405,11 +767,12 @@ class cls_lifpack(QtWidgets.QDialog):
       super().__init__()
 
    @staticmethod
-   def execute(lifimagefile):
+   def execute(lifimagefile,pildevice=None):
       d=cls_lifpack()
       reply = QtWidgets.QMessageBox.question(d, 'Message', 'Do you really want to pack the LIF image file', QtWidgets.QMessageBox.Yes, QtWidgets.QMessageBox.No)
       if reply == QtWidgets.QMessageBox.Yes:
-         exec_single(d,[add_path("lifutils"),"lifpack",lifimagefile])
+         engine= cls_LifEngine(lifimagefile)
+         exec_engine(d,engine,engine.pack,pildevice=pildevice)
 #
 # custom class for text item
 #
@@ -521,10 +884,10 @@ class cls_lifbarcode(QtWidgets.QDialog):
 #     generate binary barcode data from lifutils prog41bar or sdatabar
 #
       if ft== 0xE080:
-         output=exec_double_export(d,[add_path("lifutils"),"lifget","-r",lifimagefile,liffilename],[add_path("lifutils"),"prog41bar"],"")
+         output=exec_double_export(d,lifimagefile,liffilename,[add_path("lifutils"),"prog41bar"],"")
          title="Barcodes for HP-41 program file: "+liffilename
       else:
-         output=exec_double_export(d,[add_path("lifutils"),"lifget","-r",lifimagefile,liffilename],[add_path("lifutils"),"sdatabar"],"")
+         output=exec_double_export(d,lifimagefile,liffilename,[add_path("lifutils"),"sdatabar"],"")
          title="Barcodes for HP-41 data file: "+liffilename
       if output is None:
          return
@@ -566,20 +929,22 @@ class cls_lifpurge(QtWidgets.QDialog):
       super().__init__()
 
    @staticmethod
-   def execute(lifimagefile,liffile):
+   def execute(lifimagefile,liffile,pildevice=None):
       d=cls_lifpurge()
       reply = QtWidgets.QMessageBox.question(d, 'Message', 'Do you really want to purge '+liffile, QtWidgets.QMessageBox.Yes, QtWidgets.QMessageBox.No)
       if reply == QtWidgets.QMessageBox.Yes:
-         exec_single(d,[add_path("lifutils"),"lifpurge",lifimagefile, liffile])
+         engine= cls_LifEngine(lifimagefile)
+         exec_engine(d,engine,engine.purge,liffile,pildevice=pildevice)
 
 #
 # rename file dialog
 #
 class cls_lifrename (QtWidgets.QDialog):
 
-   def __init__(self,lifimagefile,filename,parent= None):
+   def __init__(self,lifimagefile,filename,pildevice,parent= None):
       super().__init__()
       self.lifimagefile=lifimagefile
+      self.pildevice=pildevice
       self.oldfilename=filename
       self.setWindowTitle("Rename File")
       self.vlayout= QtWidgets.QVBoxLayout()
@@ -617,7 +982,8 @@ class cls_lifrename (QtWidgets.QDialog):
    def do_ok(self):
       newfilename=self.leditFileName.text()
       if newfilename != "":
-         exec_single(self,[add_path("lifutils"),"lifrename",self.lifimagefile,self.oldfilename,newfilename])
+         engine= cls_LifEngine(self.lifimagefile)
+         exec_engine(self,engine,engine.rename,self.oldfilename,newfilename,pildevice=self.pildevice)
       super().accept()
 
 #
@@ -627,8 +993,8 @@ class cls_lifrename (QtWidgets.QDialog):
       super().reject()
 
    @staticmethod
-   def execute(lifimagefile,liffile):
-      d=cls_lifrename(lifimagefile,liffile)
+   def execute(lifimagefile,liffile,pildevice=None):
+      d=cls_lifrename(lifimagefile,liffile,pildevice)
       result= d.exec()
 #
 # export file dialog
@@ -780,19 +1146,19 @@ class cls_lifexport (QtWidgets.QDialog):
       if self.outputfile != "":
 
          if self.radioLifAscii.isChecked():
-            exec_double_export(self,[add_path("lifutils"),"lifget","-r",self.lifimagefile,self.liffilename],[add_path("lifutils"),"liftext"],self.outputfile)
+            exec_double_export(self,self.lifimagefile,self.liffilename,[add_path("lifutils"),"liftext"],self.outputfile)
          elif self.radioTxt75Ascii.isChecked():
-            exec_double_export(self,[add_path("lifutils"),"lifget","-r",self.lifimagefile,self.liffilename],[add_path("lifutils"),"liftext75"],self.outputfile)
+            exec_double_export(self,self.lifimagefile,self.liffilename,[add_path("lifutils"),"liftext75"],self.outputfile)
          elif self.radioTxt75AsciiNumbers.isChecked():
-            exec_double_export(self,[add_path("lifutils"),"lifget","-r",self.lifimagefile,self.liffilename], [add_path("lifutils"),"liftext75","-n"],self.outputfile)
+            exec_double_export(self,self.lifimagefile,self.liffilename,[add_path("lifutils"),"liftext75","-n"],self.outputfile)
          elif self.radioEramco.isChecked():
-            exec_double_export(self,[add_path("lifutils"),"lifget","-r",self.lifimagefile,self.liffilename],[add_path("lifutils"),"er41rom"],self.outputfile)
+            exec_double_export(self,self.lifimagefile,self.liffilename,[add_path("lifutils"),"er41rom"],self.outputfile)
          elif self.radioHepax.isChecked():
-            exec_double_export(self,[add_path("lifutils"),"lifget","-r",self.lifimagefile,self.liffilename],[add_path("lifutils"),"hx41rom"],self.outputfile)
+            exec_double_export(self,self.lifimagefile,self.liffilename,[add_path("lifutils"),"hx41rom"],self.outputfile)
          elif self.radioRaw.isChecked():
-            exec_single(self,[add_path("lifutils"),"lifget","-r",self.lifimagefile,self.liffilename,self.outputfile])
+            exec_engine_export(self,self.lifimagefile,self.liffilename,True,self.outputfile)
          elif self.radioNone.isChecked():
-            exec_single(self,[add_path("lifutils"),"lifget",self.lifimagefile,self.liffilename,self.outputfile])
+            exec_engine_export(self,self.lifimagefile,self.liffilename,False,self.outputfile)
       super().accept()
 #
 #  cancel: do nothing
@@ -810,9 +1176,10 @@ class cls_lifexport (QtWidgets.QDialog):
 #
 class cls_liflabel (QtWidgets.QDialog):
 
-   def __init__(self,lifimagefile,oldlabel,parent= None):
+   def __init__(self,lifimagefile,oldlabel,pildevice,parent= None):
       super().__init__()
       self.lifimagefile=lifimagefile
+      self.pildevice=pildevice
       self.setWindowTitle("Label LIF image file")
       self.vlayout= QtWidgets.QVBoxLayout()
       self.setLayout(self.vlayout)
@@ -835,28 +1202,27 @@ class cls_liflabel (QtWidgets.QDialog):
 
    def do_ok(self):
       newlabel=self.leditLabel.text()
-      if newlabel != "":
-         exec_single(self,[add_path("lifutils"),"liflabel",self.lifimagefile, newlabel])
-      else:
-         exec_single(self,[add_path("lifutils"),"liflabel","-c",self.lifimagefile])
+      engine= cls_LifEngine(self.lifimagefile)
+      exec_engine(self,engine,engine.label,newlabel,pildevice=self.pildevice)
       super().accept()
 
    def do_cancel(self):
       super().reject()
 
    @staticmethod
-   def execute(lifimagefile,oldlabel):
-      d=cls_liflabel(lifimagefile,oldlabel)
+   def execute(lifimagefile,oldlabel,pildevice=None):
+      d=cls_liflabel(lifimagefile,oldlabel,pildevice)
       result= d.exec()
 #
 # import file dialog
 #
 class cls_lifimport (QtWidgets.QDialog):
 
-   def __init__(self,lifimagefile,workdir,parent= None):
+   def __init__(self,lifimagefile,workdir,pildevice,parent= None):
       super().__init__()
       self.inputfile=""
       self.lifimagefile=lifimagefile
+      self.pildevice=pildevice
       self.workdir= workdir
       self.liffilename=""
 
@@ -993,30 +1359,30 @@ class cls_lifimport (QtWidgets.QDialog):
       if self.inputfile != "":
          if self.radioNone.isChecked():
             if  cls_chk_import.execute(None, self.inputfile):
-               exec_single(self,[add_path("lifutils"),"lifput",self.lifimagefile,self.inputfile])
+               exec_engine_import(self,self.lifimagefile,self.inputfile,self.pildevice)
          else:
             self.liffilename=self.leditFileName.text()
             if self.radioLif41.isChecked():
-               exec_double_import(self,[add_path("lifutils"),"textlif","-s 0",self.liffilename],[add_path("lifutils"),"lifput",self.lifimagefile],self.inputfile)
+               exec_double_import(self,[add_path("lifutils"),"textlif","-s 0",self.liffilename],self.lifimagefile,self.inputfile,self.pildevice)
             elif self.radioLif71.isChecked():
-               exec_double_import(self,[add_path("lifutils"),"textlif",self.liffilename],[add_path("lifutils"),"lifput",self.lifimagefile],self.inputfile)
+               exec_double_import(self,[add_path("lifutils"),"textlif",self.liffilename],self.lifimagefile,self.inputfile,self.pildevice)
             elif self.radioTxt75.isChecked():
-               exec_double_import(self,[add_path("lifutils"),"textlif75",self.liffilename],[add_path("lifutils"),"lifput",self.lifimagefile],self.inputfile)
+               exec_double_import(self,[add_path("lifutils"),"textlif75",self.liffilename],self.lifimagefile,self.inputfile,self.pildevice)
             elif self.radioTxt75Numbers.isChecked():
-               exec_double_import(self,[add_path("lifutils"),"textlif75","-n",self.liffilename],[add_path("lifutils"),"lifput",self.lifimagefile],self.inputfile)
+               exec_double_import(self,[add_path("lifutils"),"textlif75","-n",self.liffilename],self.lifimagefile,self.inputfile,self.pildevice)
             elif self.radioHepax.isChecked():
-               exec_double_import(self,[add_path("lifutils"),"rom41hx",self.liffilename],[add_path("lifutils"),"lifput",self.lifimagefile],self.inputfile)
+               exec_double_import(self,[add_path("lifutils"),"rom41hx",self.liffilename],self.lifimagefile,self.inputfile,self.pildevice)
             elif self.radio41CL.isChecked():
-               exec_double_import(self,[add_path("lifutils"),"rom41lif",self.liffilename],[add_path("lifutils"),"lifput",self.lifimagefile],self.inputfile)
+               exec_double_import(self,[add_path("lifutils"),"rom41lif",self.liffilename],self.lifimagefile,self.inputfile,self.pildevice)
             elif self.radioEramco.isChecked():
-               exec_double_import(self,[add_path("lifutils"),"rom41er",self.liffilename],[add_path("lifutils"),"lifput",self.lifimagefile],self.inputfile)
+               exec_double_import(self,[add_path("lifutils"),"rom41er",self.liffilename],self.lifimagefile,self.inputfile,self.pildevice)
             elif self.radio41LIF.isChecked():
-               exec_double_import(self,[add_path("lifutils"),"raw41lif",self.liffilename],[add_path("lifutils"),"lifput",self.lifimagefile],self.inputfile)
+               exec_double_import(self,[add_path("lifutils"),"raw41lif",self.liffilename],self.lifimagefile,self.inputfile,self.pildevice)
             elif self.radioFocal.isChecked():
                call= [add_path("lifutils"),"comp41"]
                call.extend(cls_chkxrom.execute())
                call.extend(["-f",self.liffilename])
-               exec_double_import(self,call,[add_path("lifutils"),"lifput",self.lifimagefile],self.inputfile)
+               exec_double_import(self,call,self.lifimagefile,self.inputfile,self.pildevice)
 
       super().accept()
 
@@ -1027,14 +1393,505 @@ class cls_lifimport (QtWidgets.QDialog):
       super().reject()
 
    @staticmethod
-   def execute(lifimagefile,workdir):
-      d=cls_lifimport(lifimagefile,workdir)
+   def execute(lifimagefile,workdir,pildevice=None):
+      d=cls_lifimport(lifimagefile,workdir,pildevice)
       result= d.exec()
 #
+# bulk import and export ------------------------------------------------------
+#
+# Conversions of bulk operations are done by the LIFUTILS, BULK_WORKERS
+# conversion processes run at the same time. The LIF image file is accessed
+# once to read or write all files.
+#
+BULK_WORKERS= os.cpu_count() or 2
+
+BULK_IMPORT_CONVERSIONS=[["None (import LIF transport files)",None],
+   ["convert from ASCII to LIF-Text (HP-41)",["textlif","-s 0"]],
+   ["convert from ASCII to LIF-Text (HP-71)",["textlif"]],
+   ["convert from ASCII to HP-75 text, create new line numbers",["textlif75"]],
+   ["convert HP-41 rom file to SDATA file (HEPAX)",["rom41hx"]],
+   ["convert HP-41 rom file to SDATA file (HP-41CL)",["rom41lif"]],
+   ["convert HP-41 rom file to XM-41 file (Eramco MLDL-OS)",["rom41er"]],
+   ["add LIF header to HP41 FOCAL raw file",["raw41lif"]]]
+
+BULK_EXPORT_LIF=0
+BULK_EXPORT_RAW=1
+BULK_EXPORT_TEXT=2
+BULK_EXPORT_MODES=["None (export LIF transport files)","remove LIF header, create RAW files","convert text files to ASCII, export other files as LIF transport files"]
+
+dict_bulk_text_conversion={0x0001:"liftext",0xE0D1:"liftext",0xE052:"liftext75"}
+#
+# derive a LIF file name from a file name, returns "" if not possible
+#
+def get_lifname(filename):
+   name= "".join([c for c in pathlib.Path(filename).stem.upper() if c.isascii() and c.isalnum()])
+   while name != "" and not name[0].isalpha():
+      name= name[1:]
+   return name[:10]
+#
+# check the directory entry of a LIF transport file. The file type is not
+# checked, there are valid file types without an entry in the type table
+#
+def is_lif_transport(b):
+   if len(b) < LIF_DIRENTRY_SIZE:
+      return False
+   ftype= getLifInt(b,10,2)
+   if ftype == 0x0000 or ftype == 0xFFFF or getLifString(b,0,10) == "":
+      return False
+   alloc_blocks= getLifInt(b,16,4)
+   return alloc_blocks >= 1 and len(b)- LIF_DIRENTRY_SIZE > (alloc_blocks-1)* 256
+#
+# derive the name of an exported file from a LIF file name. Characters which
+# are not letters, digits, "-" or "_" are replaced by "_", Windows device
+# names get a leading "_". Names in used (file names that differ only in
+# case are the same on many file systems) get a number.
+#
+BULK_RESERVED_NAMES=["con","prn","aux","nul"]+ ["com"+str(i) for i in range(1,10)]+ ["lpt"+str(i) for i in range(1,10)]
+
+def get_exportname(name,ext,used):
+   stem= "".join([c if c.isascii() and (c.isalnum() or c in "-_") else "_" for c in name.lower()])
+   if stem == "" or stem in BULK_RESERVED_NAMES:
+      stem= "_"+ stem
+   filename= stem+ ext
+   i= 1
+   while filename in used:
+      filename= stem+"_"+str(i)+ ext
+      i+=1
+   used.add(filename)
+   return filename
+#
+# run one conversion command, input is either read from inputfile or data.
+# Returns a subprocess.CompletedProcess object or None if cancelled
+#
+def run_conversion(engine,cmd,inputfile,data):
+   if engine.isCancelled():
+      return None
+   try:
+      if inputfile is not None:
+         with open(inputfile,"rb") as f:
+            return subprocess.run(cmd,stdin=f,stdout=subprocess.PIPE,stderr=subprocess.PIPE,creationflags=SUBPROCESS_FLAG)
+      return subprocess.run(cmd,input=data,stdout=subprocess.PIPE,stderr=subprocess.PIPE,creationflags=SUBPROCESS_FLAG)
+   except OSError as e:
+      return subprocess.CompletedProcess(cmd,-1,b"",e.strerror.encode())
+#
+# run conversions [cmd, inputfile, data] in parallel, returns the list of
+# results of run_conversion
+#
+def run_conversions(engine,jobs):
+   results=[]
+   with concurrent.futures.ThreadPoolExecutor(max_workers=BULK_WORKERS) as pool:
+      futures= [pool.submit(run_conversion,engine,cmd,inputfile,data) for cmd, inputfile, data in jobs]
+      for i, f in enumerate(futures):
+         results.append(f.result())
+         engine.reportProgress(i+1,len(futures))
+   if engine.isCancelled():
+      raise LifError("Operation cancelled","")
+   return results
+#
+# bulk import, runs on the worker pool. Returns the list of imported files
+# and the list of error messages
+#
+def bulk_import(engine,inputfiles,conversion):
+   errors=[]
+   files=[]
+   if conversion is None:
+      for inputfile in inputfiles:
+         try:
+            with open(inputfile,"rb") as f:
+               files.append([inputfile,f.read()])
+         except OSError as e:
+            errors.append(inputfile+": "+e.strerror)
+   else:
+      jobs= []
+      for inputfile in inputfiles:
+         lifname= get_lifname(inputfile)
+         if lifname == "":
+            errors.append(inputfile+": no valid LIF file name")
+            continue
+         cmd= [add_path("lifutils")]+ conversion+ [lifname]
+         jobs.append([cmd,inputfile,None])
+      for job, ret in zip(jobs,run_conversions(engine,jobs)):
+         if ret.returncode != 0:
+            errors.append(job[1]+": "+ret.stderr.decode(errors="replace").strip())
+         else:
+            files.append([job[1],ret.stdout])
+#
+#  skip files that are not LIF transport files or already exist
+#
+   lifnames= set([e[0] for e in engine.getDirectory().entries if e is not None])
+   data=[]
+   for inputfile, b in files:
+      if not is_lif_transport(b):
+         errors.append(inputfile+": not a LIF transport file")
+         continue
+      lifname= getLifString(b,0,10)
+      if lifname in lifnames:
+         errors.append(inputfile+": LIF file "+lifname+" already exists")
+         continue
+      lifnames.add(lifname)
+      data.append(b)
+   if len(data)== 0:
+      return [], errors
+   return engine.importFiles(data), errors
+#
+# bulk export, runs on the worker pool. Writes the files to the directory
+# or the zip file output, existing files in the directory are not
+# overwritten. Returns the list of exported files and the list of error
+# messages
+#
+def bulk_export(engine,mode,output,zipped):
+   errors=[]
+   outputfiles=[]
+   jobs=[]
+   used= set()
+   for name, ftype, data in engine.exportFiles(False):
+      conversion= dict_bulk_text_conversion.get(ftype)
+      if mode== BULK_EXPORT_TEXT and conversion is not None:
+         jobs.append([[add_path("lifutils"),conversion],get_exportname(name,".txt",used),data[LIF_DIRENTRY_SIZE:]])
+      elif mode== BULK_EXPORT_RAW:
+         outputfiles.append([get_exportname(name,".raw",used),data[LIF_DIRENTRY_SIZE:]])
+      else:
+         outputfiles.append([get_exportname(name,".lif",used),data])
+   if len(jobs) > 0:
+      for job, ret in zip(jobs,run_conversions(engine,[[cmd,None,data] for cmd, filename, data in jobs])):
+         if ret.returncode != 0:
+            errors.append(job[1]+": "+ret.stderr.decode(errors="replace").strip())
+         else:
+            outputfiles.append([job[1],ret.stdout])
+   exported=[]
+   if zipped:
+      try:
+         with zipfile.ZipFile(output,"w",zipfile.ZIP_DEFLATED) as z:
+            for filename, data in outputfiles:
+               z.writestr(filename,data)
+         exported= [filename for filename, data in outputfiles]
+      except OSError as e:
+         errors.append(output+": "+e.strerror)
+   else:
+      for filename, data in outputfiles:
+         try:
+            with open(os.path.join(output,filename),"xb") as f:
+               f.write(data)
+            exported.append(filename)
+         except FileExistsError:
+            errors.append(filename+": file already exists, not overwritten")
+         except OSError as e:
+            errors.append(filename+": "+e.strerror)
+   return exported, errors
+#
+# display the result of a bulk operation
+#
+def show_bulkresult(parent,text,errors):
+   msgBox=QtWidgets.QMessageBox(parent)
+   msgBox.setWindowTitle("Result")
+   msgBox.setText(text)
+   if len(errors) > 0:
+      msgBox.setIcon(QtWidgets.QMessageBox.Warning)
+      msgBox.setInformativeText(str(len(errors))+" file(s) skipped, see details")
+      msgBox.setDetailedText("\n".join(errors))
+   else:
+      msgBox.setIcon(QtWidgets.QMessageBox.Information)
+   msgBox.exec()
+#
+# bulk import dialog, import all files of a directory
+#
+class cls_lifbulkimport (QtWidgets.QDialog):
+
+   def __init__(self,lifimagefile,workdir,pildevice,lifutils_installed,parent= None):
+      super().__init__()
+      self.lifimagefile=lifimagefile
+      self.workdir=workdir
+      self.pildevice=pildevice
+      self.inputdir=""
+      self.setWindowTitle("Bulk Import")
+      self.vlayout= QtWidgets.QVBoxLayout()
+      self.setLayout(self.vlayout)
+
+      self.gBox0=QtWidgets.QGroupBox("Import all files of directory")
+      self.hbox=QtWidgets.QHBoxLayout()
+      self.lblDirname=QtWidgets.QLabel(self.inputdir)
+      self.hbox.addWidget(self.lblDirname)
+      self.hbox.addStretch(1)
+      self.butChange= QtWidgets.QPushButton("Change")
+      self.butChange.clicked.connect(self.do_dirnameChanged)
+      self.hbox.addWidget(self.butChange)
+      self.gBox0.setLayout(self.hbox)
+      self.vlayout.addWidget(self.gBox0)
+
+      self.gBox1=QtWidgets.QGroupBox("Preprocessing options (the LIF file name is derived from the file name)")
+      self.vbox=QtWidgets.QVBoxLayout()
+      self.radioButtons=[]
+      for text, conversion in BULK_IMPORT_CONVERSIONS:
+         radio= QtWidgets.QRadioButton(text)
+         radio.setEnabled(conversion is None or lifutils_installed)
+         self.radioButtons.append(radio)
+         self.vbox.addWidget(radio)
+      self.radioButtons[0].setChecked(True)
+      self.vbox.addStretch(1)
+      self.gBox1.setLayout(self.vbox)
+      self.vlayout.addWidget(self.gBox1)
+
+      self.buttonBox = QtWidgets.QDialogButtonBox(self)
+      self.buttonBox.setStandardButtons(QtWidgets.QDialogButtonBox.Cancel|QtWidgets.QDialogButtonBox.Ok)
+      self.buttonBox.setCenterButtons(True)
+      self.buttonBox.accepted.connect(self.do_ok)
+      self.buttonBox.rejected.connect(self.do_cancel)
+      self.buttonBox.button(QtWidgets.QDialogButtonBox.Ok).setEnabled(False)
+      self.vlayout.addWidget(self.buttonBox)
+#
+#  change input directory
+#
+   def do_dirnameChanged(self):
+      dirname=QtWidgets.QFileDialog.getExistingDirectory(self,"Select Input Directory",self.workdir,QtWidgets.QFileDialog.ShowDirsOnly | QtWidgets.QFileDialog.DontUseNativeDialog)
+      if dirname == "":
+         return
+      self.inputdir= dirname
+      self.lblDirname.setText(self.inputdir)
+      self.buttonBox.button(QtWidgets.QDialogButtonBox.Ok).setEnabled(True)
+#
+#  import all regular files of the input directory
+#
+   def do_ok(self):
+      conversion= None
+      for radio, c in zip(self.radioButtons,BULK_IMPORT_CONVERSIONS):
+         if radio.isChecked():
+            conversion= c[1]
+      try:
+         inputfiles= sorted([str(p) for p in pathlib.Path(self.inputdir).iterdir() if p.is_file()])
+      except OSError as e:
+         reply=QtWidgets.QMessageBox.critical(self,'Error',e.strerror,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+         return
+      engine= cls_LifEngine(self.lifimagefile)
+      result= exec_engine(self,engine,bulk_import,engine,inputfiles,conversion,pildevice=self.pildevice)
+      if result is not None:
+         names, errors= result
+         show_bulkresult(self,str(len(names))+" file(s) imported",errors)
+      super().accept()
+
+   def do_cancel(self):
+      super().reject()
+
+   @staticmethod
+   def execute(lifimagefile,workdir,pildevice,lifutils_installed):
+      d=cls_lifbulkimport(lifimagefile,workdir,pildevice,lifutils_installed)
+      result= d.exec()
+#
+# bulk export dialog, export all files to a directory or a zip file
+#
+class cls_lifbulkexport (QtWidgets.QDialog):
+
+   def __init__(self,lifimagefile,overlayfile,workdir,lifutils_installed,parent= None):
+      super().__init__()
+      self.lifimagefile=lifimagefile
+      self.overlayfile=overlayfile
+      self.workdir=workdir
+      self.output=workdir
+      self.setWindowTitle("Bulk Export")
+      self.vlayout= QtWidgets.QVBoxLayout()
+      self.setLayout(self.vlayout)
+
+      self.gBox0=QtWidgets.QGroupBox("Export all files to")
+      self.vbox0=QtWidgets.QVBoxLayout()
+      self.radioDir= QtWidgets.QRadioButton("Directory")
+      self.radioDir.setChecked(True)
+      self.radioDir.clicked.connect(self.do_radio)
+      self.radioZip= QtWidgets.QRadioButton("ZIP file")
+      self.radioZip.clicked.connect(self.do_radio)
+      self.vbox0.addWidget(self.radioDir)
+      self.vbox0.addWidget(self.radioZip)
+      self.hbox=QtWidgets.QHBoxLayout()
+      self.lblOutput=QtWidgets.QLabel(self.output)
+      self.hbox.addWidget(self.lblOutput)
+      self.hbox.addStretch(1)
+      self.butChange= QtWidgets.QPushButton("Change")
+      self.butChange.clicked.connect(self.do_outputChanged)
+      self.hbox.addWidget(self.butChange)
+      self.vbox0.addLayout(self.hbox)
+      self.gBox0.setLayout(self.vbox0)
+      self.vlayout.addWidget(self.gBox0)
+
+      self.gBox1=QtWidgets.QGroupBox("Postprocessing options")
+      self.vbox=QtWidgets.QVBoxLayout()
+      self.radioButtons=[]
+      for i, text in enumerate(BULK_EXPORT_MODES):
+         radio= QtWidgets.QRadioButton(text)
+         radio.setEnabled(i != BULK_EXPORT_TEXT or lifutils_installed)
+         self.radioButtons.append(radio)
+         self.vbox.addWidget(radio)
+      self.radioButtons[BULK_EXPORT_LIF].setChecked(True)
+      self.vbox.addStretch(1)
+      self.gBox1.setLayout(self.vbox)
+      self.vlayout.addWidget(self.gBox1)
+
+      self.buttonBox = QtWidgets.QDialogButtonBox(self)
+      self.buttonBox.setStandardButtons(QtWidgets.QDialogButtonBox.Cancel|QtWidgets.QDialogButtonBox.Ok)
+      self.buttonBox.setCenterButtons(True)
+      self.buttonBox.accepted.connect(self.do_ok)
+      self.buttonBox.rejected.connect(self.do_cancel)
+      self.vlayout.addWidget(self.buttonBox)
+#
+#  output type changed, use the default output
+#
+   def do_radio(self):
+      if self.radioZip.isChecked():
+         basename= os.path.splitext(os.path.basename(self.lifimagefile))[0]
+         self.output= os.path.join(self.workdir,basename+".zip")
+      else:
+         self.output= self.workdir
+      self.lblOutput.setText(self.output)
+#
+#  change output directory or zip file
+#
+   def do_outputChanged(self):
+      if self.radioZip.isChecked():
+         dialog=QtWidgets.QFileDialog()
+         dialog.setWindowTitle("Select ZIP File")
+         dialog.setAcceptMode(QtWidgets.QFileDialog.AcceptSave)
+         dialog.setDefaultSuffix("zip")
+         dialog.setNameFilters( ["ZIP File (*.zip *.ZIP)", "All Files (*)"] )
+         dialog.setOptions(QtWidgets.QFileDialog.DontUseNativeDialog)
+         if not dialog.exec():
+            return
+         self.output= dialog.selectedFiles()[0]
+      else:
+         dirname=QtWidgets.QFileDialog.getExistingDirectory(self,"Select Output Directory",self.workdir,QtWidgets.QFileDialog.ShowDirsOnly | QtWidgets.QFileDialog.DontUseNativeDialog)
+         if dirname == "":
+            return
+         self.output= dirname
+      self.lblOutput.setText(self.output)
+#
+#  export all files
+#
+   def do_ok(self):
+      mode= BULK_EXPORT_LIF
+      for i, radio in enumerate(self.radioButtons):
+         if radio.isChecked():
+            mode= i
+      zipped= self.radioZip.isChecked()
+      if zipped and os.access(self.output,os.W_OK):
+         reply=QtWidgets.QMessageBox.warning(self,'Warning',"Do you really want to overwrite file "+self.output,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Cancel)
+         if reply== QtWidgets.QMessageBox.Cancel:
+            return
+      engine= cls_LifEngine(self.lifimagefile,self.overlayfile)
+      result= exec_engine(self,engine,bulk_export,engine,mode,self.output,zipped)
+      if result is not None:
+         filenames, errors= result
+         show_bulkresult(self,str(len(filenames))+" file(s) exported",errors)
+      super().accept()
+
+   def do_cancel(self):
+      super().reject()
+
+   @staticmethod
+   def execute(lifimagefile,overlayfile,workdir,lifutils_installed):
+      d=cls_lifbulkexport(lifimagefile,overlayfile,workdir,lifutils_installed)
+      result= d.exec()
+#
+# search dialog, find files in the index of all LIF image files of the
+# working directory tree
+#
+class cls_lifsearch (QtWidgets.QDialog):
+
+   def __init__(self,workdir,parent= None):
+      super().__init__()
+      self.workdir=workdir
+      self.lifindex= cls_LifIndex(getLifIndexFilename(PILGLOBALS.Instance))
+      self.setWindowTitle("Search LIF image files")
+      self.vlayout= QtWidgets.QVBoxLayout()
+      self.setLayout(self.vlayout)
+
+      self.gBox0=QtWidgets.QGroupBox("Index of directory")
+      self.hbox0=QtWidgets.QHBoxLayout()
+      self.lblDirname=QtWidgets.QLabel(self.workdir)
+      self.hbox0.addWidget(self.lblDirname)
+      self.hbox0.addStretch(1)
+      self.butRescan= QtWidgets.QPushButton("Rescan")
+      self.butRescan.clicked.connect(self.do_rescan)
+      self.hbox0.addWidget(self.butRescan)
+      self.gBox0.setLayout(self.hbox0)
+      self.vlayout.addWidget(self.gBox0)
+
+      self.hbox1=QtWidgets.QHBoxLayout()
+      self.hbox1.addWidget(QtWidgets.QLabel("File name (wildcards * and ?):"))
+      self.leditPattern=QtWidgets.QLineEdit(self)
+      self.leditPattern.setText("*")
+      self.leditPattern.returnPressed.connect(self.do_search)
+      self.hbox1.addWidget(self.leditPattern)
+      self.butSearch= QtWidgets.QPushButton("Search")
+      self.butSearch.clicked.connect(self.do_search)
+      self.hbox1.addWidget(self.butSearch)
+      self.vlayout.addLayout(self.hbox1)
+
+      self.table=QtWidgets.QTableWidget(0,5)
+      self.table.setHorizontalHeaderLabels(["File","Type","Size","Date","LIF image file"])
+      self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+      self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+      self.table.verticalHeader().setVisible(False)
+      self.table.horizontalHeader().setStretchLastSection(True)
+      self.table.setMinimumSize(700,300)
+      self.vlayout.addWidget(self.table)
+      self.lblResult=QtWidgets.QLabel("")
+      self.vlayout.addWidget(self.lblResult)
+
+      self.buttonBox = QtWidgets.QDialogButtonBox(self)
+      self.buttonBox.setStandardButtons(QtWidgets.QDialogButtonBox.Close)
+      self.buttonBox.setCenterButtons(True)
+      self.buttonBox.rejected.connect(self.do_cancel)
+      self.vlayout.addWidget(self.buttonBox)
+#
+#  open the index, returns False on error
+#
+   def open(self):
+      try:
+         self.lifindex.open()
+      except LifError as e:
+         reply=QtWidgets.QMessageBox.critical(self,'Error',e.msg+': '+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+         return False
+      images, files= self.lifindex.getStatistics()
+      self.lblResult.setText(str(files)+" file(s) in "+str(images)+" LIF image file(s) indexed")
+      return True
+#
+#  rescan the working directory, only changed LIF image files are read
+#
+   def do_rescan(self):
+      self.lifindex.cancelled.clear()
+      result= exec_engine(self,self.lifindex,self.lifindex.scan,self.workdir)
+      if result is not None:
+         total, scanned, removed= result
+         self.lblResult.setText(str(total)+" LIF image file(s) found, "+str(scanned)+" indexed, "+str(removed)+" removed from index")
+#
+#  search the index and display the result
+#
+   def do_search(self):
+      try:
+         result= self.lifindex.search(self.leditPattern.text())
+      except LifError as e:
+         reply=QtWidgets.QMessageBox.critical(self,'Error',e.msg+': '+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+         return
+      self.table.setRowCount(len(result))
+      for row, (path, name, typename, length, datetime, h) in enumerate(result):
+         for col, text in enumerate([name, typename, str(length), datetime, path]):
+            item=QtWidgets.QTableWidgetItem(text)
+            if col == 4:
+               item.setToolTip("SHA-1: "+h)
+            self.table.setItem(row,col,item)
+      self.table.resizeColumnsToContents()
+      self.lblResult.setText(str(len(result))+" file(s) found")
+
+   def do_cancel(self):
+      super().reject()
+
+   @staticmethod
+   def execute(workdir):
+      d=cls_lifsearch(workdir)
+      if d.open():
+         result= d.exec()
+      d.lifindex.close()
+#
 # check import dialog, ensure that we import a valid LIF transport file
 #
 class cls_chk_import(QtWidgets.QDialog):
-   def __init__(self,fd,inputfile,parent=None):
+   def __init__(self,header,inputfile,parent=None):
       super().__init__()
       self.filename=""
       self.ftype_num=0
@@ -1066,7 +1923,8 @@ class cls_chk_import(QtWidgets.QDialog):
       self.buttonBox.rejected.connect(self.do_cancel)
       self.vlayout.addWidget(self.buttonBox)
 #
-#     examine header information, if inputfile is None then we have a file descriptor
+#     examine header information, if inputfile is None then we have the
+#     directory entry at the head of the file (at most 32 bytes)
 #
       try:
          if inputfile is not None:
@@ -1074,8 +1932,11 @@ class cls_chk_import(QtWidgets.QDialog):
                fd= os.open(inputfile, os.O_RDONLY | os.O_BINARY )
             else:
                fd= os.open(inputfile, os.O_RDONLY)
-         b=os.read(fd,32)
-         if len(b) <32:
+            b=os.read(fd,LIF_DIRENTRY_SIZE)
+            os.close(fd)
+         else:
+            b=header[0:LIF_DIRENTRY_SIZE]
+         if len(b) <LIF_DIRENTRY_SIZE:
             self.lblMessage.setText("File is too short")
          else:
             self.filename=getLifString(b,0,10)
@@ -1089,8 +1950,6 @@ class cls_chk_import(QtWidgets.QDialog):
             self.lblFilename.setText(self.filename)
             self.lblFiletype.setText(self.filetype)
             self.lblFilesize.setText(str(self.blocks))
-         if inputfile is not None:
-            os.close(fd)
 #
 #        Check valid header
 #
@@ -1124,8 +1983,8 @@ class cls_chk_import(QtWidgets.QDialog):
 
 
    @staticmethod
-   def execute(fd,inputfile):
-      d=cls_chk_import(fd,inputfile)
+   def execute(header,inputfile):
+      d=cls_chk_import(header,inputfile)
       result= d.exec()
       return d.get_retval()
 #
@@ -1352,7 +2211,7 @@ class cls_lifview(QtWidgets.QDialog):
 #
       else:
          call= [add_path("lifutils"),call]
-      output=exec_double_export(d,[add_path("lifutils"),"lifget","-r",lifimagefile,liffilename],call,"")
+      output=exec_double_export(d,lifimagefile,liffilename,call,"",LIFVIEWCACHE)
 #
 # convert and show the file content
 #
@@ -1523,9 +2382,11 @@ class cls_lifinit (QtWidgets.QDialog):
             reply=QtWidgets.QMessageBox.warning(self,'Warning',"Do you really want to overwrite file "+self.lifimagefile,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Cancel)
             if reply== QtWidgets.QMessageBox.Cancel:
                return
-         exec_single(self,[add_path("lifutils"),"lifinit","-m",self.mt,self.lifimagefile,self.leditDirSize.text()])
-         if self.leditLabel.text() != "":
-            exec_single(self,[add_path("lifutils"),"liflabel",self.lifimagefile,self.leditLabel.text()])
+         tracks,surfaces,blocks= dict_medium_layout[self.mt]
+         try:
+            initLifMedium(self.lifimagefile,tracks,surfaces,blocks,int(self.leditDirSize.text()),self.leditLabel.text())
+         except LifError as e:
+            reply=QtWidgets.QMessageBox.critical(self,'Error',e.msg+': '+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
       super().accept()
 
 #
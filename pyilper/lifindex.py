@@ -0,0 +1,249 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# LIF image file index
+# (c) 2026 Joachim Siebold
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# LIF image file index class -------------------------------------------------
+#
+# Changelog
+# 19.10.2026
+# - initial version
+# - the files are hashed in chunks, an image which cannot be read is recorded
+#   as invalid image
+#
+# The index stores the directories of all LIF image files of a directory tree
+# in a SQLite database: file name, file type, size, date and a hash of the
+# file contents. A rescan only reads images whose modification time or size
+# changed. The images are read by a pool of worker processes.
+#
+# Database tables:
+#
+# images: path, mtime, size, label, valid (0 if not a LIF image file)
+# files:  path of the image, name, file type, type name, length, allocated
+#         blocks, date/time, SHA-1 hash of the allocated blocks
+#
+# The module does not depend on Qt, it is used by the search dialog and by
+# the command line (python -m pyilper --index DIR, --search PATTERN).
+#
+import os
+import sqlite3
+import hashlib
+import threading
+from .pilglobals import PILGLOBALS
+from .pilcore import buildconfigfilename
+from .lifutils import cls_LifFile, cls_LifDir, LifError, runLifPool
+
+LIF_INDEX_EXTENSIONS=(".dat",".lif")
+LIF_INDEX_HASHCHUNK=256         # records hashed with one read
+
+#
+# default database file name, the database is located in the configuration
+# directory and depends on the pyILPER instance
+#
+def getLifIndexFilename(instance):
+   filename, configpath= buildconfigfilename("lifindex",PILGLOBALS.ConfigVersion,instance,PILGLOBALS.Production)
+   os.makedirs(configpath,exist_ok=True)
+   return filename+".db"
+#
+# read the directory of a LIF image file, runs in a worker process. Returns
+# [path, mtime, size, label, entries], label is None if the file is not a
+# valid LIF image file. entries is a list of [name, file type, type name,
+# length, allocated blocks, date/time, hash]. An image which cannot be read
+# is recorded like an invalid image, an exception never aborts the scan.
+#
+def readLifImage(path,mtime,size):
+   lif= cls_LifFile()
+   lif.set_filename(path)
+#
+#  lifopen closes the file if it raises an exception
+#
+   try:
+      lif.lifopen()
+   except Exception:
+      return [path, mtime, size, None, []]
+   entries=[]
+   try:
+      if not lif.isLifFile:
+         return [path, mtime, size, None, []]
+      lifdir= cls_LifDir(lif)
+      lifdir.open()
+      for index in range(len(lifdir.snapshot)):
+         r= lifdir.getEntry(index)
+         if r == []:
+            continue
+         name, ftype, start_block, alloc_blocks, datetime, typename, length= r
+         h= hashLifFile(lif,start_block,alloc_blocks)
+         entries.append([name, ftype, typename, length, alloc_blocks, datetime, h])
+      label= lif.label
+   except Exception:
+      return [path, mtime, size, None, []]
+   finally:
+      lif.lifclose()
+   return [path, mtime, size, label, entries]
+
+#
+# SHA-1 hash of the allocated blocks of a file, read in chunks of
+# LIF_INDEX_HASHCHUNK records up to the end of the image file. A corrupt
+# number of allocated blocks does not read more than the image file.
+#
+def hashLifFile(lif,start_block,alloc_blocks):
+   h= hashlib.sha1()
+   end= min(start_block+alloc_blocks,lif.getRecordCount())
+   for recno in range(start_block,end,LIF_INDEX_HASHCHUNK):
+      h.update(lif.rrecs(recno,min(LIF_INDEX_HASHCHUNK,end-recno)))
+   return h.hexdigest()
+
+def readLifImages(todo):
+   return [readLifImage(path,mtime,size) for path, mtime, size in todo]
+#
+# translate a search pattern with the wildcards * and ? to a LIKE pattern
+#
+def getLikePattern(pattern):
+   p= pattern.upper().replace("\\","\\\\").replace("%","\\%").replace("_","\\_")
+   return p.replace("*","%").replace("?","_")
+
+class cls_LifIndex:
+
+   def __init__(self,dbfile):
+      self.dbfile= dbfile
+      self.db= None
+      self.progress= None
+      self.cancelled= threading.Event()
+
+   def open(self):
+      try:
+         self.db= sqlite3.connect(self.dbfile,check_same_thread=False)
+         self.db.execute("CREATE TABLE IF NOT EXISTS images (path TEXT PRIMARY KEY, mtime REAL, size INTEGER, label TEXT, valid INTEGER)")
+         self.db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT, name TEXT, ftype INTEGER, typename TEXT, length INTEGER, blocks INTEGER, datetime TEXT, hash TEXT)")
+         self.db.execute("CREATE INDEX IF NOT EXISTS files_path ON files (path)")
+         self.db.execute("CREATE INDEX IF NOT EXISTS files_name ON files (name)")
+         self.db.execute("CREATE INDEX IF NOT EXISTS files_hash ON files (hash)")
+         self.db.commit()
+      except sqlite3.Error as e:
+         raise LifError("Cannot open index database",str(e))
+
+   def close(self):
+      if self.db is not None:
+         self.db.close()
+         self.db= None
+#
+#  progress and cancellation, the same interface as cls_LifEngine
+#
+   def setProgress(self,func):
+      self.progress= func
+
+   def cancel(self):
+      self.cancelled.set()
+
+   def isCancelled(self):
+      return self.cancelled.is_set()
+
+   def reportProgress(self,done,total):
+      if self.progress is not None:
+         self.progress(done,total)
+#
+#  find all LIF image files of a directory tree, returns a dict path: [mtime,
+#  size]
+#
+   def __walk__(self,topdir):
+      found= { }
+      for dirpath, dirnames, filenames in os.walk(topdir):
+         for filename in filenames:
+            if not filename.lower().endswith(LIF_INDEX_EXTENSIONS):
+               continue
+            path= os.path.abspath(os.path.join(dirpath,filename))
+            try:
+               st= os.stat(path)
+            except OSError:
+               continue
+            found[path]= [st.st_mtime, st.st_size]
+      return found
+#
+#  read the images in worker processes, small scans are done in-process
+#
+   def __read__(self,todo):
+      for results in runLifPool(readLifImages,todo,self.isCancelled):
+         for r in results:
+            yield r
+#
+#  scan a directory tree, returns [number of images, number of images read,
+#  number of images removed from the index]
+#
+   def scan(self,topdir):
+      topdir= os.path.abspath(topdir)
+      found= self.__walk__(topdir)
+      known= { }
+      prefix= os.path.join(topdir,"")
+      for path, mtime, size in self.db.execute("SELECT path, mtime, size FROM images"):
+         if path.startswith(prefix):
+            known[path]= [mtime, size]
+      todo= [[path, mtime, size] for path, (mtime, size) in sorted(found.items()) if known.get(path) != [mtime, size]]
+      removed= [path for path in known if path not in found]
+      try:
+         for path in removed:
+            self.__remove__(path)
+         n= 0
+         for path, mtime, size, label, entries in self.__read__(todo):
+            self.__remove__(path)
+            self.db.execute("INSERT INTO images VALUES (?,?,?,?,?)",(path, mtime, size, label, int(label is not None)))
+            self.db.executemany("INSERT INTO files VALUES (?,?,?,?,?,?,?,?)",[[path]+ e for e in entries])
+            n+=1
+            self.reportProgress(n,len(todo))
+#
+#           commit from time to time, a cancelled scan keeps its results
+#
+            if n % 256 == 0:
+               self.db.commit()
+         self.db.commit()
+      except sqlite3.Error as e:
+         raise LifError("Cannot update index database",str(e))
+      return [len(found), n, len(removed)]
+
+   def __remove__(self,path):
+      self.db.execute("DELETE FROM images WHERE path=?",(path,))
+      self.db.execute("DELETE FROM files WHERE path=?",(path,))
+#
+#  search files by name (wildcards * and ?) and optional file type name,
+#  returns a list of [path, name, type name, length, date/time, hash]
+#
+   def search(self,pattern,typename=""):
+      sql= "SELECT path, name, typename, length, datetime, hash FROM files WHERE name LIKE ? ESCAPE '\\'"
+      args= [getLikePattern(pattern)]
+      if typename != "":
+         sql+= " AND typename=?"
+         args.append(typename)
+      sql+= " ORDER BY name, path"
+      try:
+         return [list(r) for r in self.db.execute(sql,args)]
+      except sqlite3.Error as e:
+         raise LifError("Cannot search index database",str(e))
+#
+#  find all copies of a file with the given hash
+#
+   def searchHash(self,h):
+      try:
+         return [list(r) for r in self.db.execute("SELECT path, name, typename, length, datetime, hash FROM files WHERE hash=? ORDER BY path",(h,))]
+      except sqlite3.Error as e:
+         raise LifError("Cannot search index database",str(e))
+#
+#  number of indexed images and files
+#
+   def getStatistics(self):
+      images= self.db.execute("SELECT count(*) FROM images").fetchone()[0]
+      files= self.db.execute("SELECT count(*) FROM files").fetchone()[0]
+      return [images, files]
@@ -45,8 +45,45 @@
 # - allow directory not starting at record 2
 # 16.03.2026 jsi
 # - global variables refactoring
+# 19.10.2026
+# - added initLifMedium to create and initialize a LIF medium in-process
+# - added cls_LifOverlay, copy-on-write overlay for a read-only base image
+# - cls_LifFile reads through an overlay if set_overlay was called
+# - added cls_LifLock, shared/exclusive record range locks of image files
+#   which work across threads and (fcntl) across processes
+# - lifopen can hold a shared lock of the medium until lifclose
+# - added cls_LifDir.getEntry to decode a single directory entry
+# - added cls_LifDirSnapshot, reads the directory with one read and decodes
+#   it with struct, cls_LifDir is based on the snapshot now
+# - cls_LifFile can be opened for writing (set_writable, wrec, wrecs), a
+#   writable file is locked exclusively by lifopen
+# - added cls_LifEngine, in-process directory listing, purge, rename, label,
+#   pack, raw import and export
+# - cls_LifEngine reports the progress of import and pack and can be
+#   cancelled
+# - cls_LifEngine imports and exports many files with one directory access
+# - pack moves adjacent files as one extent, copies with copy_file_range if
+#   available (cls_LifFile.copyrecs) and reports the progress of the moved
+#   blocks
+# - lifopen closes the file if it is not a LIF image file
+# - added runLifPool, worker process pool of the index and the check of
+#   many LIF image files
+# - cls_LifFile.rrecs is limited to the size of the file, the directory
+#   snapshot raises LifError if the directory is beyond the end of the file
+# - cls_LifLock uses open file description locks if available
 #
 import os
+import errno
+import struct
+import time
+import threading
+import multiprocessing
+import concurrent.futures
+import concurrent.futures.process
+try:
+   import fcntl
+except ImportError:
+   fcntl= None          # Windows: no locking across processes
 from .pilglobals import PILGLOBALS
 from .lifcore import *
 
@@ -55,10 +92,84 @@ class LifError(Exception):
       self.msg=msg
       self.add_msg= add_msg
 
+#
+# LIF directory snapshot class -----------------------------------------------
+#
+# Reads all directory records of an open cls_LifFile with one read and
+# decodes the entries with the struct layout LIF_DIRENTRY. The snapshot is
+# read only:
+#
+# raw:         tuple of the 32 byte directory entries up to the end marker
+# entries:     tuple of the decoded entries (name, file type, start block,
+#              allocated blocks, date/time, type name, length), None for
+#              purged entries
+# num_entries: number of used entries
+# lastblock:   last block used
+#
+class cls_LifDirSnapshot:
+
+   __slots__= ("dir_start","dir_length","raw","entries","num_entries","lastblock")
+
+   def __init__(self,liffile):
+      dir_start= liffile.dir_start
+      dir_length= liffile.dir_length
+      liffile.checkDirectory()
+      buf= memoryview(liffile.rrecs(dir_start,dir_length))
+      n= len(buf)// LIF_DIRENTRY_SIZE
+      raw=[]
+      entries=[]
+      num_entries=0
+      lastblock=0
+      terminated= False
+      dtcache= { }            # many files share the same date and time
+      for i, e in enumerate(LIF_DIRENTRY.iter_unpack(buf[:n*LIF_DIRENTRY_SIZE])):
+         name, ft, start_block, alloc_blocks, dt, vol, impl= e
+         if ft == 0xFFFF:
+            terminated= True
+            break
+         raw.append(bytes(buf[i*LIF_DIRENTRY_SIZE:(i+1)*LIF_DIRENTRY_SIZE]))
+         if ft == 0x0000:
+            entries.append(None)
+            continue
+         num_entries+=1
+         if start_block+alloc_blocks > lastblock:
+            lastblock= start_block+alloc_blocks
+         t, l= getLifTypeLen(ft,alloc_blocks,impl)
+         datetime= dtcache.get(dt)
+         if datetime is None:
+            datetime="{:02d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(*[bcdtodec(c) for c in dt])
+            dtcache[dt]= datetime
+         entries.append((name.rstrip(b" ").decode("latin-1"), ft, start_block, alloc_blocks, datetime, t, l))
+      if not terminated and len(buf) < dir_length* 256:
+         raise LifError("Cannot read from file","")
+      if lastblock == 0:
+         lastblock= dir_start+dir_length-1
+      object.__setattr__(self,"dir_start",dir_start)
+      object.__setattr__(self,"dir_length",dir_length)
+      object.__setattr__(self,"raw",tuple(raw))
+      object.__setattr__(self,"entries",tuple(entries))
+      object.__setattr__(self,"num_entries",num_entries)
+      object.__setattr__(self,"lastblock",lastblock)
+
+   def __setattr__(self,name,value):
+      raise AttributeError("LIF directory snapshot is read only")
+
+   def __len__(self):
+      return len(self.raw)
+#
+#  decoded entry index as list, returns [] for a purged entry
+#
+   def getEntry(self,index):
+      e= self.entries[index]
+      if e is None:
+         return []
+      return list(e)
+
 class cls_LifDir:
 
    def __init__(self,liffile):
       self.liffile=liffile
+      self.snapshot= None
       self.lifdir= { }
       self.lastblock=0
       self.num_entries=0
@@ -66,39 +177,12 @@ class cls_LifDir:
       self.isOpen= False
 
    def open(self):
-      recno= self.liffile.dir_start
-      lastdirrec= recno+self.liffile.dir_length-1
-      i=0
-      while True:
-         if recno > lastdirrec:
-            break
-         if i == 0:
-            self.liffile.rrec(recno)
-         entry= bytearray(32)
-         for j in range(32):
-            entry[j]= self.liffile.buffer[j+i*32]
-         ft= getLifInt(entry,10,2)
-         if ft == 0xFFFF:
-            break
-         if self.cur_entry is None:
-            self.cur_entry=0
-         else:
-            self.cur_entry+=1
-         self.lifdir[self.cur_entry]= entry
-         if ft != 0x0000:
-            self.num_entries+=1
-            start_block= getLifInt(self.lifdir[self.cur_entry],12,4)
-            alloc_blocks= getLifInt(self.lifdir[self.cur_entry],16,4)
-            endblock= start_block+alloc_blocks
-            if endblock > self.lastblock:
-               self.lastblock= endblock
-         i+=1
-         if i==8:
-            i=0
-            recno+=1
-            
-      if self.lastblock == 0:
-         self.lastblock= self.liffile.dir_start+self.liffile.dir_length-1
+      self.snapshot= cls_LifDirSnapshot(self.liffile)
+      self.lifdir= dict(enumerate(self.snapshot.raw))
+      self.num_entries= self.snapshot.num_entries
+      self.lastblock= self.snapshot.lastblock
+      if len(self.lifdir) > 0:
+         self.cur_entry= len(self.lifdir)-1
       self.isOpen=True
 
    def rewind(self):
@@ -109,147 +193,30 @@ class cls_LifDir:
    def getNextEntry(self):
       if self.num_entries==0:
         return []
-      if self.cur_entry == len(self.lifdir):
-        return []
       while True:
-         ft= getLifInt(self.lifdir[self.cur_entry],10,2)
-         if ft != 0x0000:
-            break
-         self.cur_entry+=1
          if self.cur_entry == len(self.lifdir):
-            return[]
-      name=getLifString(self.lifdir[self.cur_entry],0,10)
-      start_block= getLifInt(self.lifdir[self.cur_entry],12,4)
-      alloc_blocks= getLifInt(self.lifdir[self.cur_entry],16,4)
-      datetime=getLifDateTime(self.lifdir[self.cur_entry],20)
-      tl= self.getTypeLen()
-      self.cur_entry+=1
-      return [name, ft,start_block, alloc_blocks, datetime, tl[0], tl[1]]
-
-   def getTypeLen(self):
-      e=self.lifdir[self.cur_entry]
-      ft=getLifInt(e,10,2)
-#    LIF1 (Text)
-      if ft == 1 or ft== 0xE0D1:
-         t=get_finfo_type(ft)[0]
-         l=getLifInt(e,16,4)* 256
-#     D-LEX
-      elif ft== 0x00FF:
-         t=get_finfo_type(ft)[0]
-         l= int((( e[28] + (e[29] <<8) + (e[30]<<16))+1)/2)
-#     SDATA
-      elif ft == 0xE0D0:
-         t=get_finfo_type(ft)[0]
-         l= getLifInt(e,28,2)*8
-#     HP-71 Data file
-      elif ft== 0xE0F0 or ft== 0xE0F1:
-         t=get_finfo_type(ft)[0]
-         l= (e[28] + (e[29] <<8)) * (e[30] + (e[31]<<8))
-#     HP-71 BIN
-      elif ft >= 0xE204 and ft<= 0xE207:
-         t=get_finfo_type(ft)[0]
-         l= int((( e[28] + (e[29] <<8) + (e[30]<<16))+1)/2)
-#     HP-71 LEX
-      elif ft>= 0xE208 and ft <= 0xE20B:
-         t=get_finfo_type(ft)[0]
-         l= int((( e[28] + (e[29] <<8) + (e[30]<<16))+1)/2)
-#     HP-71 KEY
-      elif ft==0xE20C or ft== 0xE20D:
-         t=get_finfo_type(ft)[0]
-         l= int((( e[28] + (e[29] <<8) + (e[30]<<16))+1)/2)
-#     HP-71 Basic
-      elif ft>= 0xE214 and ft<=0xE217:
-         t=get_finfo_type(ft)[0]
-         l= int((( e[28] + (e[29] <<8) + (e[30]<<16))+1)/2)
-#     HP-71 Forth
-      elif ft>= 0xE218 and ft<=0xE21B:
-         t=get_finfo_type(ft)[0]
-         l=getLifInt(e,16,4)* 256
-#     HP-71 ROM
-      elif ft == 0xE21C:
-         t=get_finfo_type(ft)[0]
-         l= int((( e[28] + (e[29] <<8) + (e[30]<<16))+1)/2)
-#     HP-71 Graphics
-      elif ft == 0xE222:
-         t=get_finfo_type(ft)[0]
-         l= int((( e[28] + (e[29] <<8) + (e[30]<<16))+1)/2)
-#     HP-71 Address
-      elif ft == 0xE224:
-         t=get_finfo_type(ft)[0]
-         l= int((( e[28] + (e[29] <<8) + (e[30]<<16))+1)/2)
-#     HP-71 Symbol file??
-      elif ft == 0xE22E:
-         t=get_finfo_type(ft)[0]
-         l= int((( e[28] + (e[29] <<8) + (e[30]<<16))+1)/2)
-#     HP-41 WALL with X-MEM
-      elif ft== 0xE020:
-         t=get_finfo_type(ft)[0]
-         l= (getLifInt(e,28,2)*8)+1
-#     HP-41 X-MEM
-      elif ft== 0xE030:
-         t=get_finfo_type(ft)[0]
-         l= (getLifInt(e,28,2)*8)+1
-#     HP-41 WALL
-      elif ft== 0xE040:
-         t=get_finfo_type(ft)[0]
-         l= (getLifInt(e,28,2)*8)+1
-#     HP-41 KEYS
-      elif ft== 0xE050:
-         t=get_finfo_type(ft)[0]
-         l= (getLifInt(e,28,2)*8)+1
-#     HP-41 Status
-      elif ft== 0xE060:
-         t=get_finfo_type(ft)[0]
-         l= (getLifInt(e,28,2)*8)+1
-#     HP-41 ROM/MLDL dump
-      elif ft== 0xE070:
-         t=get_finfo_type(ft)[0]
-         l= (getLifInt(e,28,2)*8)+1
-#     HP-41 FOCAL program
-      elif ft== 0xE080:
-         t=get_finfo_type(ft)[0]
-         l= getLifInt(e,28,2)+1
-#     HP-75 text
-      elif ft== 0xE052:
-         t=get_finfo_type(ft)[0]
-         l= getLifInt(e,16,4)*256
-#     HP-75 Appointments
-      elif ft== 0xE053:
-         t=get_finfo_type(ft)[0]
-         l= getLifInt(e,16,4)*256
-#     HP-75 Data
-      elif ft== 0xE058:
-         t=get_finfo_type(ft)[0]
-         l= getLifInt(e,16,4)*256
-#     HP-75 LEX
-      elif ft== 0xE089:
-         t=get_finfo_type(ft)[0]
-         l= getLifInt(e,16,4)*256
-#     HP-75 Visicalc
-      elif ft== 0xE08A:
-         t=get_finfo_type(ft)[0]
-         l= getLifInt(e,16,4)*256
-#     HP-75 Basic
-      elif ft== 0xE0FE or ft==0xE088:
-         t=get_finfo_type(ft)[0]
-         l= getLifInt(e,16,4)*256
-#     HP-75 ROM
-      elif ft== 0xE08B:
-         t=get_finfo_type(ft)[0]
-         l= getLifInt(e,16,4)*256
-#     other ...
-      else:
-         t= "0x{:4X}".format(ft)
-         l= getLifInt(e,16,4)* 256
-      return [t , l]
+            return []
+         r= self.getEntry(self.cur_entry)
+         self.cur_entry+=1
+         if r != []:
+            return r
+#
+#  decode directory entry index, returns [] for a purged entry
+#
+   def getEntry(self,index):
+      return self.snapshot.getEntry(index)
 
-      
+   def getTypeLen(self,index=None):
+      if index is None:
+         index= self.cur_entry
+      e= self.lifdir[index]
+      return getLifTypeLen(getLifInt(e,10,2),getLifInt(e,16,4),e[28:32])
 
 class cls_LifFile:
 
    def __init__(self):
       self.filename= None           # Name of LIF File
-      self.filehd= None             # File descriptor
+      self.filefd= None             # File descriptor
       self.isLifFile= False         # Valid lif file
       self.buffer= bytearray(256)   # read write buffer
       self.header= bytearray(256)   # lif header
@@ -259,31 +226,92 @@ class cls_LifFile:
       self.no_tracks=0
       self.no_surfaces=0
       self.no_blocks=0
+      self.overlayfile= ""          # copy-on-write overlay file
+      self.overlay= None
+      self.lock= None               # shared lock of the medium
+      self.writable= False          # open for writing
+      self.copyFileRange= hasattr(os,"copy_file_range")
 
    def set_filename(self,name):
       self.filename= name
 
+   def set_overlay(self,name):
+      self.overlayfile= name
+
+   def set_writable(self,writable):
+      self.writable= writable
+
    def __open__(self):
       if self.filename is None:
          raise LifError("No file specified","")
+      if self.overlayfile != "":
+         self.overlay= cls_LifOverlay(self.filename,self.overlayfile)
+         self.overlay.open(self.writable)
+         return
+      if self.writable:
+         mode= os.O_RDWR
+      else:
+         mode= os.O_RDONLY
       try:
          if PILGLOBALS.isWindows:
-            self.filefd= os.open(self.filename,os.O_RDONLY | os.O_BINARY)
+            self.filefd= os.open(self.filename,mode | os.O_BINARY)
          else:
-            self.filefd= os.open(self.filename,os.O_RDONLY)
+            self.filefd= os.open(self.filename,mode)
       except OSError as e:
          raise LifError("Cannot open file",e.strerror)
         
    def __close__(self):
+      if self.overlay is not None:
+         self.overlay.close()
+         self.overlay= None
+         return
       if self.filefd is None:
          raise LifError("File not open","")
       try:
           os.close(self.filefd)
       except OSError as e:
           raise LifError("Cannot close file",e.strerror)
+      finally:
+          self.filefd= None
 
 
+#
+#  number of complete records of the medium
+#
+   def getRecordCount(self):
+      if self.overlay is not None:
+         return self.overlay.getRecordCount()
+      try:
+         return os.fstat(self.filefd).st_size// 256
+      except OSError as e:
+         raise LifError("Cannot access file",e.strerror)
+#
+#  raise LifError if the directory is not within the medium
+#
+   def checkDirectory(self):
+      if self.dir_length < 0 or self.dir_start+self.dir_length > self.getRecordCount():
+         raise LifError("Directory out of range","")
+#
+#  read count records starting at recno with one read, returns the data
+#  which is shorter if the records are beyond the end of the file. The
+#  count is limited to the size of the file, a corrupt count never allocates
+#  more than the file
+#
+   def rrecs(self,recno,count):
+      count= max(0,min(count,self.getRecordCount()-recno))
+      if self.overlay is not None:
+         return b"".join([self.overlay.rrec(r) for r in range(recno,recno+count)])
+      try:
+         os.lseek(self.filefd,recno * 256, os.SEEK_SET)
+         b=os.read(self.filefd,count* 256)
+      except OSError as e:
+         raise LifError("Cannot read from file",e.strerror)
+      return b
+
    def rrec(self,recno):
+      if self.overlay is not None:
+         self.buffer[0:256]= self.overlay.rrec(recno)
+         return
       try:
          os.lseek(self.filefd,recno * 256, os.SEEK_SET)
          b=os.read(self.filefd,256)
@@ -295,8 +323,66 @@ class cls_LifFile:
          raise LifError("Cannot read from file",e.strerror)
 
 
-   def lifopen(self):
+#
+#  write data (a multiple of 256 bytes) starting at record recno
+#
+   def wrecs(self,recno,data):
+      if self.overlay is not None:
+         for i in range(len(data)//256):
+            self.overlay.wrec(recno+i,data[i*256:(i+1)*256])
+         return
+      try:
+         os.lseek(self.filefd,recno * 256, os.SEEK_SET)
+         os.write(self.filefd,data)
+      except OSError as e:
+         raise LifError("Cannot write to file",e.strerror)
+
+   def wrec(self,recno):
+      self.wrecs(recno,self.buffer)
+#
+#  copy count records from src to dst, dst must be below src. The kernel
+#  copies the data with copy_file_range if the ranges do not overlap,
+#  otherwise the records are read into a buffer. Short at the end of the file.
+#
+   def copyrecs(self,src,dst,count):
+      if self.overlay is None and self.copyFileRange and src- dst >= count:
+         try:
+            offset= 0
+            while offset < count* 256:
+               n= os.copy_file_range(self.filefd,self.filefd,count*256-offset,src*256+offset,dst*256+offset)
+               if n == 0:
+                  break
+               offset+= n
+            return
+         except OSError:
+#
+#           not supported by the file system, the source is unchanged
+#
+            self.copyFileRange= False
+      self.wrecs(dst,self.rrecs(src,count))
+
+#
+#  open the lif image file. If locked is True a lock of the whole medium is
+#  held until lifunlock or lifclose is called. The lock is shared for reading
+#  and exclusive if the file was opened for writing. Use this to take a
+#  consistent snapshot of header and directory.
+#
+   def lifopen(self,locked=False):
       self.__open__()
+      if locked:
+         if self.overlay is None:
+            fd= self.filefd
+         elif self.writable:
+            fd= None        # base image is read only
+         else:
+            fd= self.overlay.basefd
+         self.lock= cls_LifLock(self.filename,0,0,self.writable)
+         try:
+            self.lock.acquire(fd)
+         except LifError:
+            self.lock= None
+            self.__close__()
+            raise
       try:
          self.rrec(0)
       except LifError:
@@ -318,9 +404,16 @@ class cls_LifFile:
          self.label= getLifString(self.header,2,6)
          self.initdatetime= getLifDateTime(self.header,36)
       else:
-         raise LifError("No valid LIF image file")
+         self.lifclose()
+         raise LifError("No valid LIF image file","")
+
+   def lifunlock(self):
+      if self.lock is not None:
+         self.lock.release()
+         self.lock= None
 
    def lifclose(self):
+      self.lifunlock()
       self.__close__()
 
    def getLifHeader(self):
@@ -328,4 +421,811 @@ class cls_LifFile:
          return([self.dir_start, self.dir_length,self.no_tracks, self.no_surfaces,self.no_blocks,self.label,self.initdatetime])
       else:
          return None
+#
+# create and initialize a LIF image file with an empty directory of
+# dir_entries entries. Header, reserved record and directory are written,
+# the data area of the medium is a sparse region of the file.
+#
+def initLifMedium(filename,tracks,surfaces,blocks,dir_entries,label):
+   dir_length= (dir_entries+7)//8
+   total_records= tracks* surfaces* blocks
+   if dir_length < 1 or 2+dir_length > total_records:
+      raise LifError("Directory does not fit on medium","")
+#
+#  build header
+#
+   header= bytearray(256)
+   putLifInt(header,0,2,0x8000)
+   header[2:8]= label.upper().ljust(6)[:6].encode("ascii")
+   putLifInt(header,8,4,2)
+   putLifInt(header,12,2,0x1000)
+   putLifInt(header,16,4,dir_length)
+   putLifInt(header,20,2,1)
+   putLifInt(header,24,4,tracks)
+   putLifInt(header,28,4,surfaces)
+   putLifInt(header,32,4,blocks)
+   putLifDateTime(header,36,time.localtime())
+#
+#  create medium, header, reserved record and directory are filled with 0xFF
+#
+   try:
+      if PILGLOBALS.isWindows:
+         fd= os.open(filename,os.O_RDWR | os.O_BINARY | os.O_CREAT, 0o644)
+      else:
+         fd= os.open(filename,os.O_RDWR | os.O_CREAT, 0o644)
+   except OSError as e:
+      raise LifError("Cannot open file",e.strerror)
+   lock= cls_LifLock(filename,0,0,LIF_LOCK_EXCLUSIVE)
+   try:
+      lock.acquire(fd)
+      createLifMedium(fd,total_records,2+dir_length)
+      os.lseek(fd,0,os.SEEK_SET)
+      os.write(fd,header)
+      os.write(fd,bytes(256))
+   except OSError as e:
+      raise LifError("Cannot write to file",e.strerror)
+   finally:
+      lock.release()
+      os.close(fd)
+#
+# LIF overlay class ----------------------------------------------------------
+#
+# An overlay file stores the modified records of a read-only base image.
+# Layout of the overlay file:
+#
+# record 0:          header: magic, flags, number of records of the medium,
+#                    absolute path of the base image
+# OVL_BITMAP_OFFSET: bitmap with one bit per record, bit set if the record
+#                    is stored in the overlay
+# OVL_DATA_OFFSET:   record n is stored at OVL_DATA_OFFSET+n*256. Records
+#                    that were never written are a sparse region of the file
+#
+OVL_MAGIC=b"PILOVL01"
+OVL_MAX_RECORDS=65536                         # HP-IL record pointer is 16 bit
+OVL_BITMAP_OFFSET=256
+OVL_BITMAP_SIZE=OVL_MAX_RECORDS//8
+OVL_DATA_OFFSET=OVL_BITMAP_OFFSET+OVL_BITMAP_SIZE
+OVL_FLAG_HIDE_BASE=0x0001                     # medium was formatted, do not
+                                              # read from the base image
+OVL_COPY_CHUNKSIZE=1048576
+
+class cls_LifOverlay:
 
+   def __init__(self,basefile,overlayfile):
+      self.basefile= basefile
+      self.overlayfile= overlayfile
+      self.flags=0
+      self.total_records=0
+      self.bitmap= bytearray(OVL_BITMAP_SIZE)
+      self.basefd= None
+      self.ovlfd= None
+      self.readonly= True
+#
+#  open base image read only and the overlay file. If writable is True the
+#  overlay file is created if it does not exist
+#
+   def open(self,writable):
+      self.readonly= not writable
+      try:
+         if PILGLOBALS.isWindows:
+            self.basefd= os.open(self.basefile,os.O_RDONLY | os.O_BINARY)
+         else:
+            self.basefd= os.open(self.basefile,os.O_RDONLY)
+      except OSError as e:
+         self.basefd= None
+         if e.errno != errno.ENOENT:
+            raise LifError("Cannot open base image file",e.strerror)
+         self.flags= OVL_FLAG_HIDE_BASE
+      try:
+         mode= os.O_RDONLY
+         if writable:
+            mode= os.O_RDWR | os.O_CREAT
+         if PILGLOBALS.isWindows:
+            mode|= os.O_BINARY
+         self.ovlfd= os.open(self.overlayfile,mode,0o644)
+      except OSError as e:
+         self.ovlfd= None
+         if not writable and e.errno == errno.ENOENT and self.basefd is not None:
+            return
+         self.close()
+         raise LifError("Cannot open overlay file",e.strerror)
+      try:
+         header= self.__pread__(self.ovlfd,256,0)
+         if len(header)==0:
+            if writable:
+               self.__write_header__()
+               os.ftruncate(self.ovlfd,OVL_DATA_OFFSET)
+            return
+         if len(header) < 256 or header[0:8] != OVL_MAGIC:
+            raise LifError("Invalid overlay file",self.overlayfile)
+         if self.__basepath__(header) != self.__encodepath__().decode("utf-8",errors="replace"):
+            raise LifError("Overlay file belongs to a different image file",self.__basepath__(header))
+         self.flags= getLifInt(header,8,2)
+         self.total_records= getLifInt(header,10,4)
+         b= self.__pread__(self.ovlfd,OVL_BITMAP_SIZE,OVL_BITMAP_OFFSET)
+         self.bitmap[0:len(b)]= b
+      except OSError as e:
+         self.close()
+         raise LifError("Cannot read overlay file",e.strerror)
+      except LifError:
+         self.close()
+         raise
+
+   def close(self):
+      for fd in (self.basefd,self.ovlfd):
+         if fd is not None:
+            try:
+               os.close(fd)
+            except OSError:
+               pass
+      self.basefd= None
+      self.ovlfd= None
+#
+#  read one record, records which are beyond the end of the medium are
+#  returned as zeros
+#
+   def rrec(self,recno):
+      try:
+         if self.__isset__(recno):
+            b= self.__pread__(self.ovlfd,256,OVL_DATA_OFFSET+recno*256)
+         elif self.basefd is not None and not (self.flags & OVL_FLAG_HIDE_BASE):
+            b= self.__pread__(self.basefd,256,recno*256)
+         else:
+            b= b""
+      except OSError as e:
+         raise LifError("Cannot read from file",e.strerror)
+      if len(b) < 256:
+         b= b + bytes(256-len(b))
+      return b
+#
+#  write one record to the overlay
+#
+   def wrec(self,recno,data):
+      if self.readonly or self.ovlfd is None:
+         raise LifError("Overlay not writable","")
+      if recno < 0 or recno >= OVL_MAX_RECORDS:
+         raise LifError("Record out of range","")
+      try:
+         self.__pwrite__(self.ovlfd,data,OVL_DATA_OFFSET+recno*256)
+         if not self.__isset__(recno):
+            self.bitmap[recno>>3]|= (0x80 >> (recno & 7))
+            self.__pwrite__(self.ovlfd,self.bitmap[recno>>3:(recno>>3)+1],OVL_BITMAP_OFFSET+(recno>>3))
+         if recno >= self.total_records:
+            self.total_records= recno+1
+            self.__write_header__()
+      except OSError as e:
+         raise LifError("Cannot write to overlay file",e.strerror)
+#
+#  format the medium: the base image is hidden and the first fill_records
+#  records are filled with 0xFF
+#
+   def format(self,total_records,fill_records):
+      self.discard()
+      self.flags= OVL_FLAG_HIDE_BASE
+      self.total_records= 0
+      b= b"\xFF"* 256
+      for i in range(fill_records):
+         self.wrec(i,b)
+      self.total_records= total_records
+      self.__write_header__()
+#
+#  return True if the overlay contains any modifications
+#
+   def isModified(self):
+      return (self.flags & OVL_FLAG_HIDE_BASE) != 0 or any(self.bitmap)
+#
+#  number of records of the resulting medium
+#
+   def getRecordCount(self):
+      n= self.total_records
+      if self.basefd is not None and not (self.flags & OVL_FLAG_HIDE_BASE):
+         try:
+            n= max(n,(os.fstat(self.basefd).st_size+255)//256)
+         except OSError as e:
+            raise LifError("Cannot access base image file",e.strerror)
+      return n
+#
+#  generator of all records stored in the overlay
+#
+   def records(self):
+      for i in range(len(self.bitmap)):
+         if self.bitmap[i]==0:
+            continue
+         for j in range(8):
+            if self.bitmap[i] & (0x80 >> j):
+               yield (i<<3)+j
+#
+#  drop all modifications
+#
+   def discard(self):
+      if self.readonly or self.ovlfd is None:
+         raise LifError("Overlay not writable","")
+      self.flags=0
+      self.total_records=0
+      self.bitmap= bytearray(OVL_BITMAP_SIZE)
+      try:
+         os.ftruncate(self.ovlfd,0)
+         self.__write_header__()
+         os.ftruncate(self.ovlfd,OVL_DATA_OFFSET)
+      except OSError as e:
+         raise LifError("Cannot write to overlay file",e.strerror)
+#
+#  write the modifications to the base image and discard the overlay
+#
+   def commit(self):
+      try:
+         if PILGLOBALS.isWindows:
+            fd= os.open(self.basefile,os.O_RDWR | os.O_BINARY | os.O_CREAT, 0o644)
+         else:
+            fd= os.open(self.basefile,os.O_RDWR | os.O_CREAT, 0o644)
+      except OSError as e:
+         raise LifError("Cannot open base image file for writing",e.strerror)
+      lock= cls_LifLock(self.basefile,0,0,LIF_LOCK_EXCLUSIVE)
+      try:
+         lock.acquire(fd)
+         self.__apply__(fd)
+      finally:
+         lock.release()
+         os.close(fd)
+      self.discard()
+#
+#  write the overlaid medium to a new image file
+#
+   def flatten(self,newfile):
+      try:
+         if PILGLOBALS.isWindows:
+            fd= os.open(newfile,os.O_RDWR | os.O_BINARY | os.O_CREAT | os.O_TRUNC, 0o644)
+         else:
+            fd= os.open(newfile,os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+      except OSError as e:
+         raise LifError("Cannot create image file",e.strerror)
+      try:
+         if self.basefd is not None and not (self.flags & OVL_FLAG_HIDE_BASE):
+            offset=0
+            while True:
+               b= self.__pread__(self.basefd,OVL_COPY_CHUNKSIZE,offset)
+               if len(b)==0:
+                  break
+               os.write(fd,b)
+               offset+=len(b)
+         self.__apply__(fd)
+      except OSError as e:
+         raise LifError("Cannot write image file",e.strerror)
+      finally:
+         os.close(fd)
+#
+#  private ---
+#
+#  copy all records of the overlay to the file descriptor fd
+#
+   def __apply__(self,fd):
+      try:
+         if self.flags & OVL_FLAG_HIDE_BASE:
+            os.ftruncate(fd,0)
+         for recno in self.records():
+            self.__pwrite__(fd,self.__pread__(self.ovlfd,256,OVL_DATA_OFFSET+recno*256),recno*256)
+         if os.fstat(fd).st_size < self.total_records*256:
+            os.ftruncate(fd,self.total_records*256)
+      except OSError as e:
+         raise LifError("Cannot write image file",e.strerror)
+
+#
+#  positioned read and write (os.pread/os.pwrite are not available on Windows)
+#
+   def __pread__(self,fd,length,offset):
+      os.lseek(fd,offset,os.SEEK_SET)
+      return os.read(fd,length)
+
+   def __pwrite__(self,fd,data,offset):
+      os.lseek(fd,offset,os.SEEK_SET)
+      os.write(fd,data)
+
+   def __isset__(self,recno):
+      if recno < 0 or recno >= OVL_MAX_RECORDS:
+         return False
+      return (self.bitmap[recno>>3] & (0x80 >> (recno & 7))) != 0
+
+   def __write_header__(self):
+      header= bytearray(256)
+      header[0:8]= OVL_MAGIC
+      putLifInt(header,8,2,self.flags)
+      putLifInt(header,10,4,self.total_records)
+      path= self.__encodepath__()
+      putLifInt(header,14,2,len(path))
+      header[16:16+len(path)]= path
+      self.__pwrite__(self.ovlfd,header,0)
+
+   def __encodepath__(self):
+      return os.path.abspath(self.basefile).encode("utf-8")[:240]
+
+   def __basepath__(self,header):
+      l= getLifInt(header,14,2)
+      return header[16:16+l].decode("utf-8",errors="replace")
+#
+# LIF image file lock class -------------------------------------------------
+#
+# Locks a range of records of an image file. Shared locks of overlapping
+# ranges are granted together, an exclusive lock excludes any other lock of
+# an overlapping range. A count of 0 locks from the start record to the end
+# of the file.
+#
+# Locks of the threads of one pyILPER instance are managed in a table which
+# is keyed by the real path of the image file. This covers two drives which
+# mount the same image as well as the GUI and the drive thread. If a file
+# descriptor is passed to acquire, the range is additionally locked with
+# fcntl to protect against other pyILPER instances. The descriptor must be
+# open for reading (shared) or writing (exclusive) and has to stay open
+# until release was called.
+#
+# Open file description locks (F_OFD_SETLKW, Linux) are used if available.
+# They belong to the descriptor, closing another descriptor of the file or
+# unlocking the range of another lock does not drop them. Otherwise
+# fcntl.lockf is used. POSIX record locks belong to the process, closing any
+# descriptor of the file drops all fcntl locks of the process on that file.
+# This only weakens the protection against other processes, the in-process
+# locks are not affected.
+#
+LIF_LOCK_SHARED=False
+LIF_LOCK_EXCLUSIVE=True
+LIF_LOCK_OFD= fcntl is not None and hasattr(fcntl,"F_OFD_SETLKW")
+LIF_LOCK_FLOCK="hhqqi0q"      # struct flock: type, whence, start, len, pid
+
+class cls_LifLock:
+
+   __cond__= threading.Condition()
+   __table__= { }
+
+   def __init__(self,filename,start,count,exclusive):
+      self.key= os.path.realpath(filename)
+      self.start= start* 256
+      if count == 0:
+         self.end= None
+      else:
+         self.end= (start+count)* 256
+      self.exclusive= exclusive
+      self.fd= None
+      self.isLocked= False
+#
+#  acquire lock, blocks until all conflicting locks were released
+#
+   def acquire(self,fd=None):
+      with cls_LifLock.__cond__:
+         while self.__conflicts__():
+            cls_LifLock.__cond__.wait()
+         cls_LifLock.__table__.setdefault(self.key,[]).append(self)
+         self.isLocked= True
+      if fd is None or fcntl is None:
+         return
+      try:
+         self.__fcntl__(fd,True)
+      except OSError as e:
+         self.release()
+         raise LifError("Cannot lock file",e.strerror)
+      self.fd= fd
+#
+#  release lock
+#
+   def release(self):
+      if not self.isLocked:
+         return
+      if self.fd is not None:
+         try:
+            self.__fcntl__(self.fd,False)
+         except OSError:
+            pass
+         self.fd= None
+      with cls_LifLock.__cond__:
+         locks= cls_LifLock.__table__[self.key]
+         locks.remove(self)
+         if len(locks)==0:
+            del cls_LifLock.__table__[self.key]
+         self.isLocked= False
+         cls_LifLock.__cond__.notify_all()
+#
+#  lock (blocks until granted) or unlock the range with fcntl
+#
+   def __fcntl__(self,fd,lock):
+      if self.end is None:
+         length=0
+      else:
+         length= self.end- self.start
+      if not LIF_LOCK_OFD:
+         if not lock:
+            op= fcntl.LOCK_UN
+         elif self.exclusive:
+            op= fcntl.LOCK_EX
+         else:
+            op= fcntl.LOCK_SH
+         fcntl.lockf(fd,op,length,self.start,os.SEEK_SET)
+         return
+      if not lock:
+         cmd= fcntl.F_OFD_SETLK
+         locktype= fcntl.F_UNLCK
+      else:
+         cmd= fcntl.F_OFD_SETLKW
+         if self.exclusive:
+            locktype= fcntl.F_WRLCK
+         else:
+            locktype= fcntl.F_RDLCK
+      fcntl.fcntl(fd,cmd,struct.pack(LIF_LOCK_FLOCK,locktype,os.SEEK_SET,self.start,length,0))
+#
+#  check for conflicting locks of other threads, the condition must be held
+#
+   def __conflicts__(self):
+      for l in cls_LifLock.__table__.get(self.key,[]):
+         if not (self.exclusive or l.exclusive):
+            continue
+         if l.end is not None and l.end <= self.start:
+            continue
+         if self.end is not None and self.end <= l.start:
+            continue
+         return True
+      return False
+#
+# LIF engine class -----------------------------------------------------------
+#
+# In-process implementation of the common operations on a LIF image file:
+# directory listing, purge, rename, label, pack, raw import and export.
+# Every operation opens the image file, holds a lock of the whole medium
+# (shared for reading, exclusive for writing) and closes the file again.
+# Format specific conversions are still done by the LIFUTILS.
+#
+# The engine may run on a worker thread. Import and pack call the progress
+# function with the number of records done and the total number of records
+# and check for cancellation. A cancelled operation raises LifError and
+# leaves a consistent medium behind: import does not write the directory,
+# pack only stops between files and writes the directory of the files moved
+# so far.
+#
+LIF_PACK_CHUNK_RECORDS=1024
+
+class cls_LifEngine:
+
+   def __init__(self,filename,overlayfile=""):
+      self.filename= filename
+      self.overlayfile= overlayfile
+      self.progress= None
+      self.cancelled= threading.Event()
+
+   def setProgress(self,func):
+      self.progress= func
+#
+#  request cancellation, may be called from any thread
+#
+   def cancel(self):
+      self.cancelled.set()
+
+   def isCancelled(self):
+      return self.cancelled.is_set()
+
+   def reportProgress(self,done,total):
+      if self.progress is not None:
+         self.progress(done,total)
+
+   def __open__(self,writable):
+      lif= cls_LifFile()
+      lif.set_filename(self.filename)
+      lif.set_overlay(self.overlayfile)
+      lif.set_writable(writable)
+      lif.lifopen(True)
+      if not lif.isLifFile:
+         lif.lifclose()
+         raise LifError("No valid LIF image file","")
+      return lif
+#
+#  read the directory records, returns a bytearray
+#
+   def __rdir__(self,lif):
+      lif.checkDirectory()
+      d= bytearray(lif.rrecs(lif.dir_start,lif.dir_length))
+      if len(d) < lif.dir_length* 256:
+         raise LifError("Cannot read from file","")
+      return d
+#
+#  iterate over the directory entries up to the terminator, yields the
+#  offset of the entry and the file type
+#
+   def __entries__(self,d):
+      for offset in range(0,len(d)-LIF_DIRENTRY_SIZE+1,LIF_DIRENTRY_SIZE):
+         ft= getLifInt(d,offset+10,2)
+         if ft == 0xFFFF:
+            return
+         yield offset, ft
+#
+#  find an active file, returns the offset of the entry or -1. The name is
+#  compared with the exact bytes of the directory entry, names of new files
+#  are converted to upper case by the caller
+#
+   def __find__(self,d,name):
+      n= self.__encodename__(name)
+      for offset, ft in self.__entries__(d):
+         if ft != 0 and d[offset:offset+10] == n:
+            return offset
+      return -1
+
+   def __encodename__(self,name):
+      try:
+         return name.ljust(10)[:10].encode("latin-1")
+      except UnicodeEncodeError:
+         raise LifError("Invalid file name",name)
+#
+#  lookup an active file, raises LifError if the file does not exist
+#
+   def __lookup__(self,d,name):
+      offset= self.__find__(d,name)
+      if offset < 0:
+         raise LifError("File not found",name)
+      return offset
+#
+#  return a directory snapshot
+#
+   def getDirectory(self):
+      lif= self.__open__(False)
+      try:
+         return cls_LifDirSnapshot(lif)
+      finally:
+         lif.lifclose()
+#
+#  purge file
+#
+   def purge(self,name):
+      lif= self.__open__(True)
+      try:
+         d= self.__rdir__(lif)
+         offset= self.__lookup__(d,name)
+         putLifInt(d,offset+10,2,0)
+         lif.wrecs(lif.dir_start,d)
+      finally:
+         lif.lifclose()
+#
+#  rename file
+#
+   def rename(self,oldname,newname):
+      newname= newname.upper()
+      lif= self.__open__(True)
+      try:
+         d= self.__rdir__(lif)
+         offset= self.__lookup__(d,oldname)
+         if self.__find__(d,newname) >= 0:
+            raise LifError("File already exists",newname)
+         d[offset:offset+10]= self.__encodename__(newname)
+         lif.wrecs(lif.dir_start,d)
+      finally:
+         lif.lifclose()
+#
+#  label medium, an empty label clears the label
+#
+   def label(self,label):
+      lif= self.__open__(True)
+      try:
+         lif.header[2:8]= label.upper().ljust(6)[:6].encode("ascii")
+         lif.wrecs(0,lif.header)
+      finally:
+         lif.lifclose()
+#
+#  export file, returns the allocated blocks of the file. If raw is False
+#  the directory entry is prepended (LIF transport format)
+#
+   def exportFile(self,name,raw):
+      lif= self.__open__(False)
+      try:
+         d= self.__rdir__(lif)
+         offset= self.__lookup__(d,name)
+         start_block= getLifInt(d,offset+12,4)
+         alloc_blocks= getLifInt(d,offset+16,4)
+         data= lif.rrecs(start_block,alloc_blocks)
+         if len(data) < alloc_blocks* 256:
+            raise LifError("Cannot read from file",name)
+      finally:
+         lif.lifclose()
+      if raw:
+         return data
+      return bytes(d[offset:offset+LIF_DIRENTRY_SIZE])+ data
+#
+#  export all files, returns a list of [name, file type, data] in directory
+#  order. The medium is opened and locked once.
+#
+   def exportFiles(self,raw):
+      files= []
+      lif= self.__open__(False)
+      try:
+         d= self.__rdir__(lif)
+         entries= [offset for offset, ft in self.__entries__(d) if ft != 0]
+         for i, offset in enumerate(entries):
+            if self.isCancelled():
+               raise LifError("Operation cancelled","")
+            name= getLifString(d,offset,10)
+            start_block= getLifInt(d,offset+12,4)
+            alloc_blocks= getLifInt(d,offset+16,4)
+            data= lif.rrecs(start_block,alloc_blocks)
+            if len(data) < alloc_blocks* 256:
+               raise LifError("Cannot read from file",name)
+            if not raw:
+               data= bytes(d[offset:offset+LIF_DIRENTRY_SIZE])+ data
+            files.append([name,getLifInt(d,offset+10,2),data])
+            self.reportProgress(i+1,len(entries))
+      finally:
+         lif.lifclose()
+      return files
+#
+#  check a file in LIF transport format (directory entry followed by the
+#  data), returns the entry and the data padded to the allocated blocks
+#
+   def __transport__(self,data):
+      if len(data) < LIF_DIRENTRY_SIZE:
+         raise LifError("File is too short","")
+      entry= bytearray(data[0:LIF_DIRENTRY_SIZE])
+      name= getLifString(entry,0,10)
+      alloc_blocks= getLifInt(entry,16,4)
+      if alloc_blocks < 1:
+         raise LifError("Illegal file length",name)
+      body= data[LIF_DIRENTRY_SIZE:LIF_DIRENTRY_SIZE+alloc_blocks*256]
+      if len(body) <= (alloc_blocks-1)* 256:
+         raise LifError("File is too short",name)
+      return entry, bytes(body).ljust(alloc_blocks*256,b"\x00")
+#
+#  import a file in LIF transport format. The file is appended behind the
+#  last file of the medium.
+#
+   def importFile(self,data):
+      return self.importFiles([data])[0]
+#
+#  import a list of files in LIF transport format, returns the list of the
+#  file names. The files are appended behind the last file of the medium, the
+#  directory is written once after all data were written. If one file cannot
+#  be imported, no file is imported.
+#
+   def importFiles(self,files):
+      transport= [self.__transport__(data) for data in files]
+      lif= self.__open__(True)
+      try:
+         d= self.__rdir__(lif)
+#
+#        the new entries replace the terminator, the files are stored behind
+#        the last file (the space of purged files is reclaimed by pack)
+#
+         free= 0
+         start_block= lif.dir_start+ lif.dir_length
+         for offset, ft in self.__entries__(d):
+            free= offset+ LIF_DIRENTRY_SIZE
+            if ft != 0:
+               start_block= max(start_block,getLifInt(d,offset+12,4)+getLifInt(d,offset+16,4))
+         total= lif.no_tracks* lif.no_surfaces* lif.no_blocks
+         names= []
+         for entry, body in transport:
+            name= getLifString(entry,0,10)
+            alloc_blocks= len(body)// 256
+            if self.__find__(d,name) >= 0:
+               raise LifError("File already exists",name)
+            if free+ LIF_DIRENTRY_SIZE > len(d):
+               raise LifError("Directory full",name)
+            if total > 0 and start_block+ alloc_blocks > total:
+               raise LifError("Medium full",name)
+            putLifInt(entry,12,4,start_block)
+            d[free:free+LIF_DIRENTRY_SIZE]= entry
+            free+= LIF_DIRENTRY_SIZE
+            if free+ LIF_DIRENTRY_SIZE <= len(d):
+               d[free:free+LIF_DIRENTRY_SIZE]= b"\xff"* LIF_DIRENTRY_SIZE
+            start_block+= alloc_blocks
+            names.append(name)
+#
+#        write data, the directory is only written if all data were written
+#
+         blocks= sum([len(body)// 256 for entry, body in transport])
+         done= 0
+         for entry, body in transport:
+            start_block= getLifInt(entry,12,4)
+            alloc_blocks= len(body)// 256
+            for i in range(0,alloc_blocks,LIF_PACK_CHUNK_RECORDS):
+               if self.isCancelled():
+                  raise LifError("Operation cancelled","")
+               n= min(LIF_PACK_CHUNK_RECORDS,alloc_blocks-i)
+               lif.wrecs(start_block+i,body[i*256:(i+n)*256])
+               done+= n
+               self.reportProgress(done,blocks)
+         lif.wrecs(lif.dir_start,d)
+      finally:
+         lif.lifclose()
+      return names
+#
+#  compute the moves to pack the files, the files keep their order. Returns
+#  a list of extents [source, destination, blocks, entries], adjacent files
+#  which are moved by the same distance are one extent. The start blocks of
+#  the entries are set to the destination. Files which overlap the directory
+#  or another file (corrupt medium) raise LifError, moving them would
+#  overwrite the data of the other file.
+#
+   def __packplan__(self,active,next_block):
+      extents=[]
+      end= next_block
+      for e in active:
+         start_block= getLifInt(e,12,4)
+         alloc_blocks= getLifInt(e,16,4)
+         if alloc_blocks > 0 and start_block < end:
+            raise LifError("Files overlap, cannot pack medium",getLifString(e,0,10))
+         end= max(end,start_block+ alloc_blocks)
+         if start_block > next_block:
+            if extents != [] and extents[-1][0]+ extents[-1][2] == start_block and extents[-1][1]+ extents[-1][2] == next_block:
+               extents[-1][2]+= alloc_blocks
+               extents[-1][3].append(e)
+            else:
+               extents.append([start_block, next_block, alloc_blocks, [e]])
+            putLifInt(e,12,4,next_block)
+         next_block+= alloc_blocks
+      return extents
+#
+#  pack medium: move the files down to close the gaps of purged files and
+#  remove the purged entries from the directory. Only files behind a gap are
+#  moved. The directory is written with one write at the end. If cancelled,
+#  the moves stop between extents and the directory is consistent.
+#
+   def pack(self):
+      lif= self.__open__(True)
+      try:
+         d= self.__rdir__(lif)
+         active= [bytearray(d[offset:offset+LIF_DIRENTRY_SIZE]) for offset, ft in self.__entries__(d) if ft != 0]
+         active.sort(key=lambda e: getLifInt(e,12,4))
+         extents= self.__packplan__(active,lif.dir_start+ lif.dir_length)
+         total= sum([x[2] for x in extents])
+         done= 0
+         cancelled= False
+         for src, dst, blocks, entries in extents:
+            if self.isCancelled():
+               cancelled= True
+#
+#              the files not moved keep their location
+#
+               for e in entries:
+                  putLifInt(e,12,4,getLifInt(e,12,4)+ src- dst)
+               continue
+#
+#           destination is below the source, copy in ascending order
+#
+            for i in range(0,blocks,LIF_PACK_CHUNK_RECORDS):
+               n= min(LIF_PACK_CHUNK_RECORDS,blocks-i)
+               lif.copyrecs(src+i,dst+i,n)
+               done+= n
+               self.reportProgress(done,total)
+         active.sort(key=lambda e: getLifInt(e,12,4))
+         newdir= bytearray(b"".join(active)).ljust(len(d),b"\xff")
+         lif.wrecs(lif.dir_start,newdir)
+      finally:
+         lif.lifclose()
+      if cancelled:
+         raise LifError("Operation cancelled","medium partially packed")
+#
+# LIF worker process pool -----------------------------------------------------
+#
+# Runs func on many items (e.g. LIF image files) in a pool of worker
+# processes. func gets a list of items and returns a list of results, it
+# must be a module level function. Small batches are processed in-process.
+# The processes are started with spawn, forking a process with running Qt
+# threads is not safe.
+#
+LIF_POOL_WORKERS= os.cpu_count() or 2
+LIF_POOL_MIN=16              # smaller batches are processed without worker processes
+LIF_POOL_CHUNKSIZE=8         # items per task of a worker process
+#
+# yields the result lists of func in the order of the items. If isCancelled
+# returns True, the remaining tasks are cancelled and the generator stops
+#
+def runLifPool(func,items,isCancelled=None):
+   if len(items) < LIF_POOL_MIN:
+      for item in items:
+         if isCancelled is not None and isCancelled():
+            return
+         yield func([item])
+      return
+   ctx= multiprocessing.get_context("spawn")
+   with concurrent.futures.ProcessPoolExecutor(max_workers=LIF_POOL_WORKERS,mp_context=ctx) as pool:
+      futures= [pool.submit(func,items[i:i+LIF_POOL_CHUNKSIZE]) for i in range(0,len(items),LIF_POOL_CHUNKSIZE)]
+      for f in futures:
+         if isCancelled is not None and isCancelled():
+            for f in futures:
+               f.cancel()
+            return
+         try:
+            results= f.result()
+         except concurrent.futures.process.BrokenProcessPool as e:
+            raise LifError("Worker process terminated",str(e))
+         yield results
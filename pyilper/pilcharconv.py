@@ -38,6 +38,8 @@
 # - various bug fixes in the HP-75 and HP-71 character table
 # 11.02.2019 jsi
 # - fix in HP-75 character set
+# 19.10.2026
+# - barrconv uses map instead of a loop
 #
 
 #
@@ -1369,10 +1371,7 @@ def icharconv(i, charset):
 # convert a bytearray to a string
 #
 def barrconv(barr, charset):
-   slist= []
-   for c in barr:
-      slist.append(convert_to_unicode[charset][c])
-   return "".join(slist)
+   return "".join(map(convert_to_unicode[charset].__getitem__, barr))
 #
 # convert a string
 #
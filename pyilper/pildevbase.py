@@ -57,37 +57,80 @@
 # 21.12.2024 jsi:
 # - added queue custom class using queue.SimpleQueue (requires Python 3.7) because of less overhead
 # - all queues, locks and shared variables are now part of the pildevbase class
+# 19.10.2026
+# - cls_pilqueue is a ring of items built on collections.deque with bulk put,
+#   bulk drain and optional wakeup function
 
 
 import threading
-import queue
+import collections
+from itertools import starmap, repeat
 #
 # pyILPER queue custom class
 #
-class cls_pilqueue(queue.SimpleQueue):
+# A ring of items built on collections.deque. Items are put one at a time
+# (putItem) or as a whole buffer (putItems, a bytes object is put as ints)
+# and drained all at once (getItems). putItem and putItems are the C methods
+# of the deque unless a wakeup function is set, so the per character put of
+# a device thread costs no interpreted code. Appends and pops of a deque are
+# atomic, the producer may be the device thread and the GUI thread.
+#
+# setWakeup(func) registers a function which is called by the producer if
+# an item is put into a ring that was drained before. It is called once
+# between two getItems calls (twice if two producers race) and must be
+# thread safe.
+#
+class cls_pilqueue:
 
    def __init__(self):
-      super().__init__()
+      self.__items__= collections.deque()
+      self.__wakeup__= None
+      self.__armed__= False
+      self.putItem= self.__items__.append
+      self.putItems= self.__items__.extend
+
+   def setWakeup(self,func):
+      self.__wakeup__= func
+      if func is None:
+         self.putItem= self.__items__.append
+         self.putItems= self.__items__.extend
+      else:
+         self.__armed__= True
+         self.putItem= self.__putitem__
+         self.putItems= self.__putitems__
 
-   def putItem(self,item):
-      self.put(item)
+   def __putitem__(self,item):
+      self.__items__.append(item)
+      if self.__armed__:
+         self.__armed__= False
+         self.__wakeup__()
 
+   def __putitems__(self,items):
+      self.__items__.extend(items)
+      if self.__armed__ and len(self.__items__):
+         self.__armed__= False
+         self.__wakeup__()
+#
+#  drain all items, arm the wakeup before draining. An item put while
+#  draining wakes up the consumer again
+#
    def getItems(self):
-       items=[]
-       while True:
-          try:
-             i=self.get_nowait()
-             items.append(i)
-          except queue.Empty:
-             break
-       return  items
+      self.__armed__= True
+      n= len(self.__items__)
+      if n == 0:
+         return []
+      return list(starmap(self.__items__.popleft,repeat((),n)))
+#
+#  get one item, the caller must check empty() before
+#
+   def getItem(self):
+      return self.__items__.popleft()
+
+   def empty(self):
+      return len(self.__items__) == 0
 
    def clear(self):
-      while True:
-         try:
-            self.get_nowait()
-         except queue.Empty:
-            break
+      self.__items__.clear()
 
 
 class cls_pildevbase:
@@ -146,8 +189,14 @@ class cls_pildevbase:
    def putGuiQueueItem(self,item):
       self.__guiqueue__.putItem(item)
 
+   def putGuiQueueItems(self,items):
+      self.__guiqueue__.putItems(items)
+
    def getGuiQueueItems(self):
       return self.__guiqueue__.getItems()
+
+   def setGuiQueueWakeup(self,func):
+      self.__guiqueue__.setWakeup(func)
 #
 # device queue functions
 #
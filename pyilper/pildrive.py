@@ -134,6 +134,7 @@
 import time
 import threading
 import os
+import array
 
 from .pilglobals import PILGLOBALS
 if PILGLOBALS.QT_Bindings=="PySide6":
@@ -146,9 +147,10 @@ from .pilwidgets import cls_tabgeneric, T_STRING, T_INTEGER, O_DEFAULT
 from .pilconfig import PilConfigError, PILCONFIG
 from .pilcharconv import CHARSET_HP71, charsets
 from .pilcore import getEventPosition, cls_Tab_Spec
-from .lifutils import cls_LifFile,cls_LifDir,LifError, getLifInt, putLifInt
+from .lifutils import cls_LifFile,cls_LifDirSnapshot,LifError, cls_LifOverlay, cls_LifLock, LIF_LOCK_SHARED, LIF_LOCK_EXCLUSIVE, getLifInt, putLifInt
 from .lifcore import *
-from .lifexec import cls_lifpack, cls_lifpurge, cls_lifrename, cls_lifexport, cls_lifimport, cls_lifview, cls_liflabel, check_lifutils, cls_lifbarcode
+from .lifarchive import restoreFromManifest, LIF_ARCHIVE_EXTENSION
+from .lifexec import cls_lifpack, cls_lifpurge, cls_lifrename, cls_lifexport, cls_lifimport, cls_lifview, cls_liflabel, check_lifutils, cls_lifbarcode, cls_lifbulkimport, cls_lifbulkexport, LIFVIEWCACHE
 from .pilpdf import cls_pdfprinter,cls_textItem
 
 #
@@ -476,6 +478,7 @@ class cls_DriveWidget(cls_GenericDriveWidget):
 #
       self.filename= PILCONFIG.get(self.name,"filename","")
       self.drivetype= PILCONFIG.get(self.name,"drivetype",self.DEV_HDRIVE1)
+      self.overlay= PILCONFIG.get(self.name,"overlay",False)
       self.papersize=PILCONFIG.get("pyilper","papersize")
       self.pildevice=None
 
@@ -527,6 +530,14 @@ class cls_DriveWidget(cls_GenericDriveWidget):
       self.butImport.setEnabled(False)
       self.butImport.setAutoDefault(False)
       self.vbox3.addWidget(self.butImport)
+      self.butBulkImport= QtWidgets.QPushButton("Bulk Import")
+      self.butBulkImport.setEnabled(False)
+      self.butBulkImport.setAutoDefault(False)
+      self.vbox3.addWidget(self.butBulkImport)
+      self.butBulkExport= QtWidgets.QPushButton("Bulk Export")
+      self.butBulkExport.setEnabled(False)
+      self.butBulkExport.setAutoDefault(False)
+      self.vbox3.addWidget(self.butBulkExport)
       self.butLabel= QtWidgets.QPushButton("Label")
       self.butLabel.setEnabled(False)
       self.butLabel.setAutoDefault(False)
@@ -535,6 +546,25 @@ class cls_DriveWidget(cls_GenericDriveWidget):
       self.butDirList.setEnabled(False)
       self.butDirList.setAutoDefault(False)
       self.vbox3.addWidget(self.butDirList)
+#
+#     copy-on-write overlay controls
+#
+      self.cbOverlay= QtWidgets.QCheckBox("Overlay")
+      self.cbOverlay.setToolTip("Write changes to a copy-on-write overlay file, the LIF image file is not modified")
+      self.cbOverlay.setChecked(self.overlay)
+      self.vbox3.addWidget(self.cbOverlay)
+      self.butCommit= QtWidgets.QPushButton("Commit Overlay")
+      self.butCommit.setEnabled(False)
+      self.butCommit.setAutoDefault(False)
+      self.vbox3.addWidget(self.butCommit)
+      self.butDiscard= QtWidgets.QPushButton("Discard Overlay")
+      self.butDiscard.setEnabled(False)
+      self.butDiscard.setAutoDefault(False)
+      self.vbox3.addWidget(self.butDiscard)
+      self.butFlatten= QtWidgets.QPushButton("Flatten Overlay")
+      self.butFlatten.setEnabled(False)
+      self.butFlatten.setAutoDefault(False)
+      self.vbox3.addWidget(self.butFlatten)
       self.vbox3.addStretch(1)
 #
 #     directory widget
@@ -563,7 +593,7 @@ class cls_DriveWidget(cls_GenericDriveWidget):
       for w in self.gbox_buttonlist:
          w.setEnabled(False)
       self.lblFilename.setText(self.filename)
-      self.lifdir.setFileName(self.filename)
+      self.lifdir.setFileName(self.filename,self.getOverlayFilename(self.filename))
 #
 #     connect actions
 #   
@@ -574,14 +604,21 @@ class cls_DriveWidget(cls_GenericDriveWidget):
 #
       self.butPack.clicked.connect(self.do_pack)
       self.butImport.clicked.connect(self.do_import)
+      self.butBulkImport.clicked.connect(self.do_bulkimport)
+      self.butBulkExport.clicked.connect(self.do_bulkexport)
       self.butLabel.clicked.connect(self.do_label)
       self.butDirList.clicked.connect(self.do_dirlist)
+      self.cbOverlay.stateChanged.connect(self.do_overlayChanged)
+      self.butCommit.clicked.connect(self.do_commitOverlay)
+      self.butDiscard.clicked.connect(self.do_discardOverlay)
+      self.butFlatten.clicked.connect(self.do_flattenOverlay)
 #
 #     refresh timer
 #
       self.timer=QtCore.QTimer()
       self.timer.timeout.connect(self.update_hdrive)
       self.update_pending= False
+      self.update_ranges= []
 #
 #     enable/disable GUI elements
 #
@@ -610,9 +647,9 @@ class cls_DriveWidget(cls_GenericDriveWidget):
             PILCONFIG.save()
          except PilConfigError as e:
             reply=QtWidgets.QMessageBox.critical(self.parent.parent.ui,'Error',e.msg+': '+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
-      self.pildevice.sethdisk(self.filename,tracks,surfaces,blocks)
+      self.pildevice.sethdisk(self.filename,tracks,surfaces,blocks,self.getOverlayFilename(self.filename))
       self.lblFilename.setText(self.filename)
-      self.lifdir.setFileName(self.filename)
+      self.lifdir.setFileName(self.filename,self.getOverlayFilename(self.filename))
 
    def disable(self):
       return
@@ -632,14 +669,29 @@ class cls_DriveWidget(cls_GenericDriveWidget):
       if self.parent.active:
          self.butPack.setEnabled(False)
          self.butImport.setEnabled(False)
+         self.butBulkImport.setEnabled(False)
+         self.butBulkExport.setEnabled(False)
          self.butLabel.setEnabled(False)
          self.butDirList.setEnabled(False)
+         self.butCommit.setEnabled(False)
+         self.butDiscard.setEnabled(False)
+         self.butFlatten.setEnabled(False)
       else:
-         if self.filename != "" and self.parent.parent.lifutils_installed:
-            self.butPack.setEnabled(True)
-            self.butImport.setEnabled(True)
-            self.butLabel.setEnabled(True)
+         if self.filename != "":
+#
+#           pack and label are done in-process, import may need the
+#           LIFUTILS for conversions. All operate on the image file, not
+#           on the overlay
+#
+            self.butPack.setEnabled(not self.overlay)
+            self.butImport.setEnabled(not self.overlay and self.parent.parent.lifutils_installed)
+            self.butBulkImport.setEnabled(not self.overlay)
+            self.butBulkExport.setEnabled(True)
+            self.butLabel.setEnabled(not self.overlay)
             self.butDirList.setEnabled(True)
+         self.butCommit.setEnabled(self.overlay and self.filename != "")
+         self.butDiscard.setEnabled(self.overlay and self.filename != "")
+         self.butFlatten.setEnabled(self.overlay and self.filename != "")
 #
 #  set drive type checked
 #
@@ -670,6 +722,10 @@ class cls_DriveWidget(cls_GenericDriveWidget):
       flist= self.get_lifFilename()
       if flist is None:
          return
+      if flist[0].endswith(LIF_ARCHIVE_EXTENSION):
+         flist[0]= self.restoreArchivedImage(flist[0])
+         if flist[0] == "":
+            return
       status, tracks, surfaces, blocks= self.lifMediumCheck(flist[0],False)
       if status:
          self.filename=flist[0]
@@ -682,9 +738,9 @@ class cls_DriveWidget(cls_GenericDriveWidget):
          reply=QtWidgets.QMessageBox.critical(self.parent.parent.ui,'Error',e.msg+': '+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
 
       if self.pildevice is not None:
-         self.pildevice.sethdisk(self.filename,tracks,surfaces,blocks)
+         self.pildevice.sethdisk(self.filename,tracks,surfaces,blocks,self.getOverlayFilename(self.filename))
       self.lblFilename.setText(self.filename)
-      self.lifdir.setFileName(self.filename)
+      self.lifdir.setFileName(self.filename,self.getOverlayFilename(self.filename))
       if self.filename=="":
          self.lifdir.clear()
       else:
@@ -717,20 +773,114 @@ class cls_DriveWidget(cls_GenericDriveWidget):
          self.pildevice.setdevice(did,aid)
       self.toggle_controls()
 
+#
+#  the files were moved, reset the drive like after a medium change
+#
    def do_pack(self):
-      cls_lifpack.execute(self.filename)
-      self.lifdir.refresh()
+      cls_lifpack.execute(self.filename,self.pildevice)
+      self.remountMedium()
 
    def do_import(self):
       workdir=PILCONFIG.get('pyilper','workdir')
-      cls_lifimport.execute(self.filename, workdir)
+      cls_lifimport.execute(self.filename, workdir, self.pildevice)
       self.lifdir.refresh()
 
+   def do_bulkimport(self):
+      workdir=PILCONFIG.get('pyilper','workdir')
+      cls_lifbulkimport.execute(self.filename, workdir, self.pildevice, self.parent.parent.lifutils_installed)
+      self.lifdir.refresh()
+
+   def do_bulkexport(self):
+      workdir=PILCONFIG.get('pyilper','workdir')
+      cls_lifbulkexport.execute(self.filename, self.getOverlayFilename(self.filename), workdir, self.parent.parent.lifutils_installed)
+
    def do_label(self):
       oldlabel=self.lifdir.getLabel()
-      cls_liflabel.execute(self.filename, oldlabel)
+      cls_liflabel.execute(self.filename, oldlabel, self.pildevice)
       self.lifdir.refresh()
 
+#
+#  copy-on-write overlay callbacks
+#
+   def do_overlayChanged(self):
+      self.overlay= self.cbOverlay.isChecked()
+      PILCONFIG.put(self.name,'overlay',self.overlay)
+      try:
+         PILCONFIG.save()
+      except PilConfigError as e:
+         reply=QtWidgets.QMessageBox.critical(self.parent.parent.ui,'Error',e.msg+': '+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+      self.remountMedium()
+      self.toggle_controls()
+
+   def do_commitOverlay(self):
+      reply=QtWidgets.QMessageBox.question(self.parent.parent.ui,'Commit Overlay',"Write all changes of the overlay to the LIF image file?",QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,QtWidgets.QMessageBox.No)
+      if reply != QtWidgets.QMessageBox.Yes:
+         return
+      self.execOverlay(lambda ovl: ovl.commit())
+
+   def do_discardOverlay(self):
+      reply=QtWidgets.QMessageBox.question(self.parent.parent.ui,'Discard Overlay',"Drop all changes of the overlay?",QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,QtWidgets.QMessageBox.No)
+      if reply != QtWidgets.QMessageBox.Yes:
+         return
+      self.execOverlay(lambda ovl: ovl.discard())
+
+   def do_flattenOverlay(self):
+      dialog=QtWidgets.QFileDialog()
+      dialog.setWindowTitle("Save overlaid medium as LIF Image File")
+      dialog.setAcceptMode(QtWidgets.QFileDialog.AcceptSave)
+      dialog.setDefaultSuffix("dat")
+      dialog.setNameFilters( ["LIF Image File (*.dat *.DAT *.lif *.LIF)", "All Files (*)"] )
+      dialog.setOptions(QtWidgets.QFileDialog.DontUseNativeDialog)
+      if not dialog.exec():
+         return
+      newfile= dialog.selectedFiles()[0]
+      if os.path.abspath(newfile) in (os.path.abspath(self.filename), os.path.abspath(self.getOverlayFilename(self.filename))):
+         reply=QtWidgets.QMessageBox.critical(self.parent.parent.ui,'Error',"Use Commit Overlay to write to the mounted LIF image file",QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+         return
+      self.execOverlay(lambda ovl: ovl.flatten(newfile))
+#
+#  run an operation on the overlay with the drive locked, then reset the
+#  drive because the medium may have changed
+#
+   def execOverlay(self,func):
+      if self.pildevice is None:
+         return
+      self.pildevice.acquiredisklock()
+      try:
+         ovl= cls_LifOverlay(self.filename,self.getOverlayFilename(self.filename))
+         ovl.open(True)
+         try:
+            func(ovl)
+         finally:
+            ovl.close()
+      except LifError as e:
+         self.pildevice.releasedisklock()
+         reply=QtWidgets.QMessageBox.critical(self.parent.parent.ui,'Error',e.msg+': '+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+         return
+      self.pildevice.releasedisklock()
+      self.remountMedium()
+#
+#  send medium and overlay to the drive again and refresh the directory
+#
+   def remountMedium(self):
+      if self.filename== "":
+         return
+      status, tracks, surfaces, blocks= self.lifMediumCheck(self.filename,True)
+      if self.pildevice is not None:
+         self.pildevice.sethdisk(self.filename,tracks,surfaces,blocks,self.getOverlayFilename(self.filename))
+      self.lifdir.setFileName(self.filename,self.getOverlayFilename(self.filename))
+#
+#  name of the overlay file of a LIF image file. The overlay is located in the
+#  working directory and depends on the tab name and the pyILPER instance,
+#  returns an empty string if the overlay is disabled
+#
+   def getOverlayFilename(self,filename):
+      if not self.overlay or filename== "":
+         return ""
+      workdir=PILCONFIG.get('pyilper','workdir')
+      basename= os.path.splitext(os.path.basename(filename))[0]
+      return os.path.join(workdir,"{}.{}{}.ovl".format(basename,self.name,PILGLOBALS.Instance))
+
    def do_dirlist(self):
 #
 #     get medium summary, return if blank or no medium
@@ -763,7 +913,7 @@ class cls_DriveWidget(cls_GenericDriveWidget):
       pdfprinter.print_item(cls_textItem(self.lifdir.getDirSummary()))
       pdfprinter.print_item(cls_textItem("{:12} {:8} {:>6}/{:6} {:7} {:7}".format("Filename","Type","Size","Space","Date","Time")))
       for i in range (rows):
-          line="{:12} {:8} {:>6}/{:6} {:7} {:7}".format(model.item(i,0).text().strip(), model.item(i,1).text().strip(), model.item(i,2).text().strip(), model.item(i,3).text().strip(), model.item(i,4).text(), model.item(i,5).text())
+          line="{:12} {:8} {:>6}/{:6} {:7} {:7}".format(model.text(i,0).strip(), model.text(i,1).strip(), model.text(i,2).strip(), model.text(i,3).strip(), model.text(i,4), model.text(i,5))
           pdfprinter.print_item(cls_textItem(line))
       pdfprinter.end()
 
@@ -776,12 +926,16 @@ class cls_DriveWidget(cls_GenericDriveWidget):
       if self.pildevice is None:
          return
       tm=time.time()
-      modified, timestamp= self.pildevice.ismodified()
+      modified, timestamp, ranges= self.pildevice.ismodified()
+      if modified:
+         LIFVIEWCACHE.invalidate(self.filename,ranges)
       self.update_pending= self.update_pending or modified
+      self.update_ranges.extend(ranges)
       if self.update_pending:
          if tm - timestamp > PILGLOBALS.Not_Talker_Span:
-            self.refreshDirList()
+            self.lifdir.updateDirectory(self.update_ranges)
             self.update_pending= False
+            self.update_ranges= []
 
    def refreshDirList(self):
       if self.filename=="":
@@ -795,12 +949,28 @@ class cls_DriveWidget(cls_GenericDriveWidget):
       dialog.setWindowTitle("Select LIF Image File")
       dialog.setAcceptMode(QtWidgets.QFileDialog.AcceptOpen)
       dialog.setFileMode(QtWidgets.QFileDialog.AnyFile)
-      dialog.setNameFilters( ["LIF Image File (*.dat *.DAT *.lif *.LIF)", "All Files (*)"] )
+      dialog.setNameFilters( ["LIF Image File (*.dat *.DAT *.lif *.LIF)", "LIF Archive Manifest (*"+LIF_ARCHIVE_EXTENSION+")", "All Files (*)"] )
       dialog.setOptions(QtWidgets.QFileDialog.DontUseNativeDialog)
 #     dialog.setDirectory(PILCONFIG.get('pyilper','workdir'))
       if dialog.exec():
          return dialog.selectedFiles() 
 #
+#  restore an archived image to the working directory, returns the name of
+#  the LIF image file or an empty string
+#
+   def restoreArchivedImage(self,manifestfile):
+      workdir=PILCONFIG.get('pyilper','workdir')
+      name= os.path.basename(manifestfile)[:-len(LIF_ARCHIVE_EXTENSION)]
+      if os.access(os.path.join(workdir,name),os.W_OK):
+         reply=QtWidgets.QMessageBox.warning(self.parent.parent.ui,'Warning',"File "+name+" already exists in the working directory. Do you really want to overwrite that file?",QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Cancel)
+         if reply== QtWidgets.QMessageBox.Cancel:
+            return ""
+      try:
+         return restoreFromManifest(manifestfile,workdir)
+      except LifError as e:
+         reply=QtWidgets.QMessageBox.critical(self.parent.parent.ui,'Error',e.msg+': '+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+         return ""
+#
 #  Check lif image file, returns status, tracks, surfaces, blocks 
 #  If valid LIF1 medium and medium is compatible to device:
 #     return True, tracks, surfaces, blocks of medium
@@ -831,6 +1001,20 @@ class cls_DriveWidget(cls_GenericDriveWidget):
 #
 #     read lif file header
 #
+      overlayfile= self.getOverlayFilename(filename)
+      if overlayfile != "":
+         try:
+            ovl= cls_LifOverlay(filename,overlayfile)
+            ovl.open(False)
+            try:
+               b= ovl.rrec(0)
+            finally:
+               ovl.close()
+         except LifError:
+            return [1,0,0,0]   # file does not exist or cannot be opened
+         if not any(b):
+            return [1,0,0,0]   # empty medium
+         return self.parseMediumInfo(b)
       try:
          if PILGLOBALS.isWindows:
             fd= os.open(filename,os.O_RDONLY | os.O_BINARY)
@@ -845,6 +1029,11 @@ class cls_DriveWidget(cls_GenericDriveWidget):
          return [1,0,0,0]   # file read error
       if len(b) < 256:
          return [2,0,0,0]   # not lif type 1 file
+      return self.parseMediumInfo(b)
+#
+#  get medium layout from the lif header record b
+#
+   def parseMediumInfo(self,b):
 #
 #     do we have a LIF type 1 file
 #
@@ -874,15 +1063,156 @@ class cls_DriveWidget(cls_GenericDriveWidget):
 #
 # LifDir Widget -----------------------------------------------------------
 #
-class TableModel(QtGui.QStandardItemModel):
+#
+# Directory table model. The directory entries are kept in compact column
+# arrays, the cell text is formatted on demand in data(). Each row
+# remembers the index of its directory entry for incremental updates.
+#
+class TableModel(QtCore.QAbstractTableModel):
     _sort_order = QtCore.Qt.AscendingOrder
+    _headers= ["File","Type","Size","Space","Date","Time"]
+
+    def __init__(self, parent = None):
+        super().__init__(parent)
+        self.__font__= QtGui.QFont()
+        self.__clear__()
+
+    def __clear__(self):
+        self.__entry__= array.array("l")   # directory entry index
+        self.__names__= []                  # file name
+        self.__ftype__= []                 # file type name
+        self.__length__= array.array("l")  # file length in bytes
+        self.__space__= array.array("l")   # allocated bytes
+        self.__datetime__= []              # date and time string
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+           return 0
+        return len(self.__entry__)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+           return 0
+        return len(self._headers)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+           return None
+        if role == QtCore.Qt.DisplayRole:
+           return self.text(index.row(),index.column())
+        if role == QtCore.Qt.FontRole:
+           return self.__font__
+        if role == QtCore.Qt.TextAlignmentRole:
+           return QtCore.Qt.AlignLeft
+        return None
+
+    def flags(self, index):
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def headerData(self,section,orientation,role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+           return None
+        if orientation == QtCore.Qt.Horizontal and section < len(self._headers):
+           return self._headers[section]
+        return None
+#
+#   cell text of row and column
+#
+    def text(self,row,column):
+        if column==0:
+           return self.__names__[row]
+        elif column==1:
+           return self.__ftype__[row]
+        elif column==2:
+           return "{:-8d}".format(self.__length__[row])
+        elif column==3:
+           return "{:-8d}".format(self.__space__[row])
+        elif column==4:
+           return self.__datetime__[row].split(sep=' ')[0]
+        else:
+           return self.__datetime__[row].split(sep=' ')[1]
+
+    def setFont(self,font):
+        self.__font__= font
+        if self.rowCount() > 0:
+           self.dataChanged.emit(self.index(0,0),self.index(self.rowCount()-1,self.columnCount()-1))
 
     def sortOrder(self):
         return self._sort_order
-
+#
+#   sort the column arrays. The date and time string has fixed width
+#   fields in the order of the directory entry, the date column is sorted
+#   by date and time, the time column by time
+#
     def sort(self, column, order):
-         self._sort_order = order
-         super().sort(column, order)
+        self._sort_order = order
+        if column== 4:
+           key= self.__datetime__
+        elif column== 5:
+           key= [d.split(sep=' ')[1] for d in self.__datetime__]
+        else:
+           key= [self.__names__, self.__ftype__, self.__length__, self.__space__][column]
+        self.layoutAboutToBeChanged.emit()
+        perm= sorted(range(len(self.__entry__)),key=key.__getitem__, reverse= (order == QtCore.Qt.DescendingOrder))
+        self.__entry__= array.array("l",[self.__entry__[i] for i in perm])
+        self.__names__= [self.__names__[i] for i in perm]
+        self.__ftype__= [self.__ftype__[i] for i in perm]
+        self.__length__= array.array("l",[self.__length__[i] for i in perm])
+        self.__space__= array.array("l",[self.__space__[i] for i in perm])
+        self.__datetime__= [self.__datetime__[i] for i in perm]
+        self.layoutChanged.emit()
+#
+#   replace all rows. entries is a list of [entry index, decoded entry]
+#   (see cls_LifDirSnapshot.getEntry)
+#
+    def setEntries(self,entries):
+        self.beginResetModel()
+        self.__clear__()
+        for index, r in entries:
+            self.__append__(index,r)
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self.__clear__()
+        self.endResetModel()
+#
+#   incremental update of the row of directory entry index
+#
+    def hasEntry(self,index):
+        return index in self.__entry__
+
+    def addEntry(self,index,r):
+        row= len(self.__entry__)
+        self.beginInsertRows(QtCore.QModelIndex(),row,row)
+        self.__append__(index,r)
+        self.endInsertRows()
+
+    def updateEntry(self,index,r):
+        row= self.__entry__.index(index)
+        name, ftype_num, start_block, alloc_blocks, datetime, ftype, length= r
+        self.__names__[row]= name
+        self.__ftype__[row]= ftype
+        self.__length__[row]= length
+        self.__space__[row]= alloc_blocks*256
+        self.__datetime__[row]= datetime
+        self.dataChanged.emit(self.index(row,0),self.index(row,self.columnCount()-1))
+
+    def removeEntry(self,index):
+        row= self.__entry__.index(index)
+        self.beginRemoveRows(QtCore.QModelIndex(),row,row)
+        for a in (self.__entry__, self.__names__, self.__ftype__, self.__length__, self.__space__, self.__datetime__):
+            del a[row]
+        self.endRemoveRows()
+
+    def __append__(self,index,r):
+        name, ftype_num, start_block, alloc_blocks, datetime, ftype, length= r
+        self.__entry__.append(index)
+        self.__names__.append(name)
+        self.__ftype__.append(ftype)
+        self.__length__.append(length)
+        self.__space__.append(alloc_blocks*256)
+        self.__datetime__.append(datetime)
 
 class DirTableView(QtWidgets.QTableView):
 
@@ -929,7 +1259,10 @@ class DirTableView(QtWidgets.QTableView):
         if self.parent.parent.parent.active:
            event.accept()
            return
-        if not self.parent.parent.parent.parent.lifutils_installed:
+#
+#       the file operations work on the image file and not on the overlay
+#
+        if self.parent.getOverlayFilename() != "":
            event.accept()
            return
         i= self.selectionModel().selection().indexes()
@@ -937,13 +1270,22 @@ class DirTableView(QtWidgets.QTableView):
             row=i[0].row()
             model=self.parent.getModel()
             imagefile= self.parent.getFilename()
-            liffilename=model.item(row,0).text()
-            liffiletype=model.item(row,1).text()
+            liffilename=model.text(row,0)
+            liffiletype=model.text(row,1)
             menu = QtWidgets.QMenu()
-            exportAction = menu.addAction("Export")
+#
+#           purge and rename are done in-process, the other actions need
+#           the LIFUTILS
+#
+            lifutils_installed= self.parent.parent.parent.parent.lifutils_installed
+            exportAction= None
+            if lifutils_installed:
+               exportAction = menu.addAction("Export")
             purgeAction = menu.addAction("Purge")
             renameAction = menu.addAction("Rename")
             ft=get_finfo_name(liffiletype)
+            if not lifutils_installed:
+               ft= None
 #
 #           view action
 #
@@ -965,13 +1307,13 @@ class DirTableView(QtWidgets.QTableView):
                return
             workdir=PILCONFIG.get('pyilper','workdir')
             charset=PILCONFIG.get(self.parent.parent.name,"charset")
-            if action ==exportAction:
+            if action== exportAction:
                 cls_lifexport.execute(imagefile,liffilename,liffiletype,workdir)
             elif action== purgeAction:
-                cls_lifpurge.execute(imagefile,liffilename)
+                cls_lifpurge.execute(imagefile,liffilename,self.parent.parent.pildevice)
                 self.parent.refresh()
             elif action== renameAction:
-                cls_lifrename.execute(imagefile,liffilename)
+                cls_lifrename.execute(imagefile,liffilename,self.parent.parent.pildevice)
                 self.parent.refresh()
             elif action== viewAction:
                 cls_lifview.execute(imagefile, liffilename, liffiletype,workdir, charset)
@@ -998,20 +1340,15 @@ class cls_LifDirWidget(QtWidgets.QWidget):
         self.__table__.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
         self.__table__.setFocusPolicy(QtCore.Qt.NoFocus)
         self.__table__.setShowGrid(False)
-        self.__columns__=6     # 5 rows for directory listing
-        self.__rowcount__=0    # number of rows in table
         self.__filename__=""   # LIF filename
+        self.__overlayfile__="" # copy-on-write overlay file
+        self.__header__= None  # header record of the last refresh
+        self.__entries__= { }  # directory entries of the last refresh
         self.__label__=""      # Label of lif file
-        self.__model__ = TableModel(rows, self.__columns__, self.__table__)
+        self.__model__ = TableModel(self.__table__)
 #
-#       populate header , set column size
+#       set model, set column size
 #
-        self.__model__.setHeaderData(0,QtCore.Qt.Horizontal,"File")
-        self.__model__.setHeaderData(1,QtCore.Qt.Horizontal,"Type")
-        self.__model__.setHeaderData(2,QtCore.Qt.Horizontal,"Size")
-        self.__model__.setHeaderData(3,QtCore.Qt.Horizontal,"Space")
-        self.__model__.setHeaderData(4,QtCore.Qt.Horizontal,"Date")
-        self.__model__.setHeaderData(5,QtCore.Qt.Horizontal,"Time")
         self.__table__.setModel(self.__model__)
         self.__table__.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
 #
@@ -1052,6 +1389,7 @@ class cls_LifDirWidget(QtWidgets.QWidget):
     def reconfigure(self):
         self.__font_size__= PILCONFIG.get_dual(self.name,"directorycharsize")
         self.__font__.setPixelSize(self.__font_size__)
+        self.__model__.setFont(self.__font__)
         metrics= QtGui.QFontMetrics(self.__font__)
         self.__table__.verticalHeader().setDefaultSectionSize(metrics.height()+1)
         self.refresh()  
@@ -1062,11 +1400,14 @@ class cls_LifDirWidget(QtWidgets.QWidget):
     def getFilename(self):
         return(self.__filename__)
 
+    def getOverlayFilename(self):
+        return(self.__overlayfile__)
+
     def getLabel(self):
         return(self.__label__)
 
     def getRowCount(self):
-        return(self.__rowcount__)
+        return(self.__model__.rowCount())
 
     def getMediumSummary(self):
         return(self.__labelMedium__.text())
@@ -1076,8 +1417,9 @@ class cls_LifDirWidget(QtWidgets.QWidget):
 #
 #   connect lif data file 
 #
-    def setFileName(self,filename):
+    def setFileName(self,filename,overlayfile=""):
         self.__filename__= filename
+        self.__overlayfile__= overlayfile
         self.refresh()
 
 #
@@ -1086,10 +1428,9 @@ class cls_LifDirWidget(QtWidgets.QWidget):
     def clear(self):
         self.__labelMedium__.setText("")
         self.__labelDir__.setText("")
-        if self.__rowcount__==0:
-           return
-        self.__model__.removeRows(0, self.__rowcount__)
-        self.__rowcount__=0
+        self.__header__= None
+        self.__entries__= { }
+        self.__model__.clear()
         return
 
 #
@@ -1101,17 +1442,108 @@ class cls_LifDirWidget(QtWidgets.QWidget):
         if self.parent.pildevice is None:
            return
         self.clear()
-        self.parent.pildevice.acquiredisklock()
+        snapshot= self.readSnapshot()
+        if snapshot is None:
+           return
+        lif, lifdir= snapshot
+        self.__header__= bytes(lif.header)
+        self.setSummary(lif,lifdir)
+#
+#       populate directory listing
+#
+        entries=[]
+        for index in range(len(lifdir)):
+            self.__entries__[index]= lifdir.raw[index]
+            r= lifdir.getEntry(index)
+            if r == []:
+               continue
+            entries.append([index,r])
+        self.__model__.setEntries(entries)
+#
+#       go to end of scroll area
+#
+        self.__table__.verticalScrollBar().setRange(0,10000)
+        self.__table__.verticalScrollBar().setValue(10000)
+#
+#   update the directory after the drive wrote the record ranges [first,last].
+#   Header and directory are only read if one of their records was written,
+#   only changed directory entries are updated in the model.
+#
+    def updateDirectory(self,ranges):
+        if self.__filename__== "":
+           return
+        if self.parent.pildevice is None:
+           return
+        if self.__header__ is None:
+           self.refresh()
+           return
+        dir_start= getLifInt(self.__header__,8,4)
+        dir_end= dir_start+ getLifInt(self.__header__,16,4)-1
+        changed= False
+        for first, last in ranges:
+           if first <= 0 <= last or (first <= dir_end and last >= dir_start):
+              changed= True
+              break
+        if not changed:
+           return
+        snapshot= self.readSnapshot()
+        if snapshot is None:
+           self.clear()
+           return
+        lif, lifdir= snapshot
+#
+#       directory location changed, rebuild everything
+#
+        if lif.dir_start != dir_start or lif.dir_start+lif.dir_length-1 != dir_end:
+           self.refresh()
+           return
+        self.__header__= bytes(lif.header)
+        self.setSummary(lif,lifdir)
+        for index in range(max(len(lifdir),len(self.__entries__))):
+            if index < len(lifdir):
+               entry= lifdir.raw[index]
+            else:
+               entry= None
+            if self.__entries__.get(index) == entry:
+               continue
+            if entry is None:
+               del self.__entries__[index]
+            else:
+               self.__entries__[index]= entry
+            r= []
+            if entry is not None:
+               r= lifdir.getEntry(index)
+            if self.__model__.hasEntry(index):
+               if r == []:
+                  self.__model__.removeEntry(index)
+               else:
+                  self.__model__.updateEntry(index,r)
+            elif r != []:
+               self.__model__.addEntry(index,r)
+#
+#   take a snapshot of header and directory, the shared lock is only
+#   held while reading and does not block the drive from reading.
+#   Returns [lif, directory snapshot] or None
+#
+    def readSnapshot(self):
         try:
            lif=cls_LifFile()
            lif.set_filename(self.__filename__)
-           lif.lifopen()
+           lif.set_overlay(self.__overlayfile__)
+           lif.lifopen(True)
         except LifError:
-           self.parent.pildevice.releasedisklock()
-           return
-        lifdir= cls_LifDir(lif)
-        lifdir.open()
-        lifdir.rewind()
+           return None
+        try:
+           lifdir= cls_LifDirSnapshot(lif)
+        except LifError:
+           lif.lifclose()
+           return None
+        lif.lifclose()
+        return [lif, lifdir]
+#
+#   display medium and directory information
+#
+    def setSummary(self,lif,lifdir):
         dir_start, dir_length, no_tracks, no_surfaces, no_blocks, label, initdatetime=lif.getLifHeader()
         self.__label__= label
         totalblocks=no_tracks* no_surfaces* no_blocks
@@ -1126,31 +1558,6 @@ class cls_LifDirWidget(QtWidgets.QWidget):
         else:
            self.__labelMedium__.setText("Medium Layout: ({}/{}/{}), Size: {} blocks ({} bytes). Label: {:6s}, formatted: {:s}".format(no_tracks,no_surfaces,no_blocks,totalblocks, totalbytes, label, initdatetime))
         self.__labelDir__.setText("Directory size: {} entries ({} used). Last block used: {}".format(dir_length*8, lifdir.num_entries, lifdir.lastblock))
-
-#
-#       populate directory listing
-#
-        while True:
-            r= lifdir.getNextEntry()
-            if r == []:
-              break
-            name, ftype_num, start_block, alloc_blocks, datetime, ftype, length= r
-            x=[name,ftype ,"{:-8d}".format(length),"{:-8d}".format(alloc_blocks*256),datetime.split(sep=' ')[0],datetime.split(sep=' ')[1]]
-            for column in range(self.__columns__):
-                item = QtGui.QStandardItem(x[column])
-                item.setFont(self.__font__)
-                item.setTextAlignment(QtCore.Qt.AlignLeft)
-                item.setFlags(item.flags() & ~QtCore.Qt.ItemIsEditable)
-                self.__model__.setItem(self.__rowcount__, column, item)
-            self.__rowcount__+=1
-        lif.lifclose()
-        self.parent.pildevice.releasedisklock()
-#
-#       go to end of scroll area
-#
-        self.__table__.verticalScrollBar().setRange(0,10000)
-        self.__table__.verticalScrollBar().setValue(10000)
-
 #
 #   handle click to header field and sort column
 #
@@ -1225,7 +1632,33 @@ class cls_LifDirWidget(QtWidgets.QWidget):
 # - return maximum sector address instead of maximum number of sectors in the SEND MAXIMUM ADDRESS (DDT 7)
 #   command. Note: this is an extended DDT command of the HP9114B disk drive which is probalby not used in the
 #   HP-41 or HP-71 HP-IL module firmware.
-
+# 19.10.2026
+# - __format_disc__ creates the image with the size of the medium, uses
+#   createLifMedium (chunked 0xFF fill, sparse remainder)
+# - copy-on-write overlay mode: if an overlay file was configured, records
+#   are written to the overlay and the image file is never modified
+# - sector reads and writes hold a shared/exclusive record lock (cls_LifLock)
+#   which protects the image across drives and pyILPER instances
+# - directory refresh takes a locked snapshot of header and directory instead
+#   of holding the disk lock during the whole listing
+# - the drive records the written record ranges, ismodified returns them
+# - the directory widget is updated incrementally, header and directory are
+#   only read again if their records were written
+# - directory listing uses a QAbstractTableModel with column arrays instead
+#   of a QStandardItemModel, cells are formatted on demand
+# - directory widget uses cls_LifDirSnapshot
+# - pack, label, purge and rename do not need the LIFUTILS any more
+# - the drive is passed to the LIF operations which hold its disk lock
+# - added bulk import and bulk export buttons
+# - header fixes moved to fixLifHeader in lifcore.py
+# - the drive is reset after pack
+# - an archived image is restored to the working directory and mounted if
+#   its manifest file is selected
+# - the listings of the file viewer are invalidated by the written records
+
+
+MODIFIED_ALL=0xFFFF           # last record of a range that covers the medium
+MODIFIED_MAX_RANGES=32        # max. number of recorded ranges
 
 class cls_pildrive(cls_pildevbase):
 
@@ -1265,6 +1698,7 @@ class cls_pildrive(cls_pildevbase):
       self.__buf0__= bytearray(256) # buffer 0
       self.__buf1__= bytearray(256) # buffer 1
       self.__hdiscfile__= ""        # disc file
+      self.__overlayfile__= ""      # copy-on-write overlay file
       self.__timestamp__= time.time() # last time of beeing talker
 
       self.__isWindows__= isWindows # true, if Windows platform
@@ -1275,6 +1709,7 @@ class cls_pildrive(cls_pildevbase):
 #
       self.__modified_lock__= threading.Lock() 
       self.__modified__= False    # medium modification flag
+      self.__modified_ranges__= [] # written record ranges [first,last]
 #     lock for image file access
       self.__disk_lock__= threading.Lock() 
 
@@ -1292,17 +1727,20 @@ class cls_pildrive(cls_pildevbase):
    def disable(self):
       return
 #
-#  was image modified since last timestamp
+#  was image modified since last timestamp, returns the list of written
+#  record ranges [first,last] too
 #
    def ismodified(self):
       self.__modified_lock__.acquire()
       if self.__modified__:
         self.__modified__= False
+        ranges= self.__modified_ranges__
+        self.__modified_ranges__= []
         self.__modified_lock__.release()
-        return (True, self.__timestamp__)
+        return (True, self.__timestamp__, ranges)
       else:
         self.__modified_lock__.release()
-        return (False, self.__timestamp__)
+        return (False, self.__timestamp__, [])
 #
 #  lock device
 #
@@ -1317,10 +1755,11 @@ class cls_pildrive(cls_pildevbase):
 
 
 #
-#  set new filename (disk change) and medium information
+#  set new filename (disk change) and medium information. If overlayfile
+#  is not empty, all writes go to the copy-on-write overlay file
 #
-   def sethdisk(self,filename,tracks,surfaces,blocks):
-      self.putDeviceQueueItem ([cls_pildrive.CONF_HDISK,filename, tracks, surfaces, blocks])
+   def sethdisk(self,filename,tracks,surfaces,blocks,overlayfile=""):
+      self.putDeviceQueueItem ([cls_pildrive.CONF_HDISK,filename, tracks, surfaces, blocks, overlayfile])
 
 #
 # set aid and did of device
@@ -1338,6 +1777,7 @@ class cls_pildrive(cls_pildevbase):
             self.__tracks__= i[2]
             self.__surfaces__= i[3]
             self.__blocks__= i[4]
+            self.__overlayfile__= i[5]
             self.__nbe__= self.__tracks__* self.__surfaces__* self.__blocks__
 
             k=0
@@ -1390,14 +1830,35 @@ class cls_pildrive(cls_pildevbase):
    def __rrec__(self):
 
       self.acquiredisklock()
+      if self.__overlayfile__ != "":
+         try:
+            ovl= cls_LifOverlay(self.__hdiscfile__,self.__overlayfile__)
+            ovl.open(False)
+            lock= cls_LifLock(self.__hdiscfile__,self.__pe__,1,LIF_LOCK_SHARED)
+            try:
+               lock.acquire(ovl.basefd)
+               self.__buf0__[0:256]= ovl.rrec(self.__pe__)
+            finally:
+               lock.release()
+               ovl.close()
+            self.__setstatus__(0)   # success, clear status
+         except LifError:
+            self.__setstatus__(20)  # failed read always returns no medium error
+         self.releasedisklock()
+         return
       try:
          if self.__isWindows__:
             fd= os.open(self.__hdiscfile__,os.O_RDONLY | os.O_BINARY)
          else:
             fd= os.open(self.__hdiscfile__,os.O_RDONLY)
-         os.lseek(fd,self.__pe__ * 256, os.SEEK_SET)
-         b=os.read(fd,256)
-         os.close(fd)
+         lock= cls_LifLock(self.__hdiscfile__,self.__pe__,1,LIF_LOCK_SHARED)
+         try:
+            lock.acquire(fd)
+            os.lseek(fd,self.__pe__ * 256, os.SEEK_SET)
+            b=os.read(fd,256)
+         finally:
+            lock.release()
+            os.close(fd)
          l=len(b)
 #        print("rrec record %d size %d" % (self.__pe__,l))
          self.__setstatus__(0)   # success, clear status
@@ -1406,7 +1867,7 @@ class cls_pildrive(cls_pildevbase):
          if l < 256:
             for i in range(l,256):
                self.__buf0__[i]=0x00
-      except OSError as e:
+      except (OSError, LifError) as e:
          self.__setstatus__(20)  # failed read always returns no medium error
       self.releasedisklock()
       return
@@ -1414,40 +1875,7 @@ class cls_pildrive(cls_pildevbase):
 # fix the header if record 0 (LIF header) is written
 #
    def __fix_header__(self):
-#
-#     LIF Version 1 header?
-#
-
-      if self.__buf0__[0x00]== 0x80 and self.__buf0__[0x01]== 0x00:
-         tracks= getLifInt(self.__buf0__,24,4)
-         surfaces=getLifInt(self.__buf0__,28,4)
-         blocks=getLifInt(self.__buf0__,32,4)
-#
-#        wrong media size information (HP firmware bug)?
-#
-         if(tracks == surfaces and surfaces == blocks):
-            putLifInt(self.__buf0__,24,4,self.__tracks__)
-            putLifInt(self.__buf0__,28,4,self.__surfaces__)
-            putLifInt(self.__buf0__,32,4,self.__blocks__)
-#
-#       LIF Version 1 fix (for HP41 initialized images)
-#
-         if self.__buf0__[0x14]!= 0x00 or self.__buf0__[0x15]!= 0x01:
-            self.__buf0__[0x14]= 0x00 
-            self.__buf0__[0x15]= 0x01
-#
-#       Fix garbage in label field (for HP41 initialized images)
-#
-         if self.__buf0__[0x02] != 0x20 and (self.__buf0__[0x02] < 0x41 or self.__buf0__[0x02] > 0x5A):
-            for i in range(6):
-               self.__buf0__[i+0x02]=0x20
-
-#
-#       directory length fix
-#
-            if self.__buf0__[0x12] & 0x40 != 0:
-               self.__buf0__[0x12] &= ~0x40
-         
+      fixLifHeader(self.__buf0__,[self.__tracks__,self.__surfaces__,self.__blocks__])
       return
 #
 # write buffer 0 to one sector n* pe (256 bytes)
@@ -1455,59 +1883,125 @@ class cls_pildrive(cls_pildevbase):
    def __wrec__(self):
 
       self.acquiredisklock()
+      if self.__overlayfile__ != "":
+         try:
+            ovl= cls_LifOverlay(self.__hdiscfile__,self.__overlayfile__)
+            ovl.open(True)
+#
+#           the image file is not written, lock the record against readers
+#           of the overlay in this pyILPER instance only
+#
+            lock= cls_LifLock(self.__hdiscfile__,self.__pe__,1,LIF_LOCK_EXCLUSIVE)
+            try:
+               lock.acquire()
+               if self.__pe__ == 0 and (not self.__isRawDevice__) :
+                  self.__fix_header__()
+               ovl.wrec(self.__pe__,self.__buf0__)
+            finally:
+               lock.release()
+               ovl.close()
+            self.__setmodified__(self.__pe__,self.__pe__)
+            self.__timestamp__= time.time()
+            self.__setstatus__(0)   # success, clear status
+         except LifError:
+            self.__setstatus__(29)  # write error always returns write protect
+                                    # error
+         self.releasedisklock()
+         return
       try:
          if self.__isWindows__:
             fd= os.open(self.__hdiscfile__, os.O_WRONLY | os.O_BINARY)
          else:
             fd= os.open(self.__hdiscfile__, os.O_WRONLY)
+         lock= cls_LifLock(self.__hdiscfile__,self.__pe__,1,LIF_LOCK_EXCLUSIVE)
          try:
+            lock.acquire(fd)
             os.lseek(fd,self.__pe__ * 256, os.SEEK_SET)
             if self.__pe__ == 0 and (not self.__isRawDevice__) :
                self.__fix_header__()
 #           print("wrec record %d" % (self.__pe__))
             os.write(fd,self.__buf0__)
-            self.__modified_lock__.acquire()
-            self.__modified__= True
-            self.__modified_lock__.release()
-            self.__timestamp__= time.time()
-            self.__setstatus__(0)   # success, clear status
-         except OSError as e:
-            self.__setstatus__(29)  # write error always returns write protect
-                                    # error
-         os.close(fd)
-      except OSError as e:
-         self.__setstatus__(29) # file open failed always returns write 
+         finally:
+            lock.release()
+            os.close(fd)
+         self.__setmodified__(self.__pe__,self.__pe__)
+         self.__timestamp__= time.time()
+         self.__setstatus__(0)   # success, clear status
+      except (OSError, LifError) as e:
+         self.__setstatus__(29) # failed open or write always returns write
                                 # protect error
       self.releasedisklock()
       return
 
 #
-# "format" a lif image file
+# "format" a lif image file. The image is created with the size of the
+# medium, only the first records are filled with 0xFF, the remaining
+# records are a sparse region of the file
 #
    def __format_disc__(self):
-      b= bytearray(256)
 #     print("Format disk")
-      for i in range (0, len(b)):
-               b[i]= 0xFF
-
+      if self.__nbe__ > 0:
+         total_records= self.__nbe__
+      else:
+         total_records= LIF_FORMAT_FILL_RECORDS
+      fill_records= min(total_records,LIF_FORMAT_FILL_RECORDS)
 
       self.acquiredisklock()
+      if self.__overlayfile__ != "":
+         try:
+            ovl= cls_LifOverlay(self.__hdiscfile__,self.__overlayfile__)
+            ovl.open(True)
+            lock= cls_LifLock(self.__hdiscfile__,0,0,LIF_LOCK_EXCLUSIVE)
+            try:
+               lock.acquire()
+               ovl.format(total_records,fill_records)
+            finally:
+               lock.release()
+               ovl.close()
+            self.__setmodified__(0,MODIFIED_ALL)
+            self.__timestamp__= time.time()
+            self.__setstatus__(0)   # success, clear status
+         except LifError:
+            self.__setstatus__(29)  # failed initialization always returns
+                                    # write protect error
+         self.releasedisklock()
+         return
       try:
          if self.__isWindows__:
-            fd= os.open(self.__hdiscfile__, os.O_WRONLY | os.O_BINARY |  os.O_TRUNC | os.O_CREAT, 0o644)
+            fd= os.open(self.__hdiscfile__, os.O_WRONLY | os.O_BINARY | os.O_CREAT, 0o644)
          else:
-            fd= os.open(self.__hdiscfile__, os.O_WRONLY | os.O_TRUNC | os.O_CREAT, 0o644)
-         for i in range(0,127):
-            os.write(fd,b)
-         os.close(fd)
+            fd= os.open(self.__hdiscfile__, os.O_WRONLY | os.O_CREAT, 0o644)
+         lock= cls_LifLock(self.__hdiscfile__,0,0,LIF_LOCK_EXCLUSIVE)
+         try:
+            lock.acquire(fd)
+            createLifMedium(fd,total_records,fill_records)
+         finally:
+            lock.release()
+            os.close(fd)
+         self.__setmodified__(0,MODIFIED_ALL)
          self.__timestamp__= time.time()
          self.__setstatus__(0)   # success, clear status
-      except OSError:
+      except (OSError, LifError):
          self.__setstatus__(29)  # failed file creation and initialization 
                                  # always returns write protect error
       self.releasedisklock()
       return
 #
+# record a written record range. Adjacent ranges are merged, if there are
+# too many ranges they are collapsed into a single one.
+#
+   def __setmodified__(self,first,last):
+      self.__modified_lock__.acquire()
+      self.__modified__= True
+      ranges= self.__modified_ranges__
+      if len(ranges) > 0 and first <= ranges[-1][1]+1 and last >= ranges[-1][0]-1:
+         ranges[-1]= [min(first,ranges[-1][0]), max(last,ranges[-1][1])]
+      else:
+         ranges.append([first,last])
+         if len(ranges) > MODIFIED_MAX_RANGES:
+            self.__modified_ranges__= [[min(r[0] for r in ranges), max(r[1] for r in ranges)]]
+      self.__modified_lock__.release()
+#
 #  private (overloaded) -------------------------
 #
 #  clear drive reset internal pointers
@@ -1518,6 +2012,7 @@ class cls_pildrive(cls_pildevbase):
       self.__oc__ = 0   
       self.__modified_lock__.acquire()
       self.__modified__= False
+      self.__modified_ranges__= []
       self.__modified_lock__.release()
 #
 #     Initialize/Invalidate buffer content. The HP-41 as controller uses
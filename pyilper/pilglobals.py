@@ -43,6 +43,8 @@
 # - checkVersion fix
 # 25.04.26 jsi
 # - parameter "nohelp renamed to useSystemBrowser"
+# 19.10.2026
+# - Update_Timer is the minimum interval between two updates of a device tab
 #
 import os
 import platform
@@ -185,7 +187,7 @@ class cls_pilglobals:
 #
 #     Terminal tab
 #
-      self.Update_Timer=25                 # Poll timer (ms) for terminal output queue
+      self.Update_Timer=16                 # Minimum interval (ms) between two updates of a device tab
       self.Cursor_Blink=500                # 500 ms cursor blink rate
       self.Cursor_Blink_INTERVAL= self.Cursor_Blink / self.Update_Timer
       self.Autoscroll_Rate=100             # 500 ms cursor blink rate
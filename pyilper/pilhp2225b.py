@@ -47,6 +47,8 @@
 # - refactoring of global variables
 # 21.03.2026 jsi
 # - pluggable interfaces and tabs
+# 19.10.2026
+# - the GUI queue is processed if the device signals new data, no polling
 #
 import copy
 import threading
@@ -61,7 +63,7 @@ if PILGLOBALS.QT_Bindings=="PyQt5":
 from .pilconfig import PILCONFIG
 from .pilcharconv import charconv, barrconv, CHARSET_HP2225
 from .pildevbase import cls_pildevbase
-from .pilwidgets import cls_tabgeneric, LogCheckboxWidget, T_INTEGER, O_DEFAULT, T_STRING
+from .pilwidgets import cls_tabgeneric, LogCheckboxWidget, cls_UpdateTimer, T_INTEGER, O_DEFAULT, T_STRING
 from .pilpdf import cls_pdfprinter
 from .pilcore import cls_Tab_Spec
 
@@ -302,9 +304,7 @@ class cls_hp2225bWidget(QtWidgets.QWidget):
 #
 #     initialize refresh timer
 #
-      self.UpdateTimer=QtCore.QTimer()
-      self.UpdateTimer.setSingleShot(True)
-      self.UpdateTimer.timeout.connect(self.process_queue)
+      self.UpdateTimer= cls_UpdateTimer(self.process_queue)
 #
 #     initialize timer for the repeated pressed LF action
 #
@@ -316,11 +316,12 @@ class cls_hp2225bWidget(QtWidgets.QWidget):
 #
    def set_pildevice(self,pildevice):
       self.pildevice=pildevice
+      self.pildevice.setGuiQueueWakeup(self.UpdateTimer.wakeup)
 #
 #     enable: start timer, send mode to virtual device, update check boxes
 #
    def enable(self):
-      self.UpdateTimer.start(PILGLOBALS.Update_Timer)
+      self.UpdateTimer.start()
       self.toggle_active()
       return
 #
@@ -394,14 +395,14 @@ class cls_hp2225bWidget(QtWidgets.QWidget):
    def repeated_LFpressed(self):
       self.pildevice.putGuiQueueItem([REMOTECMD_LF])
 #
-#  process commands in the GUI command queue, this is called by a timer event
+#  process commands in the GUI command queue, this is called by the update
+#  timer if the device put new commands into the queue
 #
    def process_queue(self):
        items=self.pildevice.getGuiQueueItems()
        if len(items):
           for c in items:
              self.process(c)
-       self.UpdateTimer.start(PILGLOBALS.Update_Timer)
        return
 #
 #  GUI command processing, commands issued by the HP-IL thread
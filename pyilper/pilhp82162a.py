@@ -86,6 +86,8 @@
 # -refactoring of global variables
 # 21.03.2026 jsi
 # - pluggable interfaces and tabs
+# 19.10.2026
+# - the GUI queue is processed if the device signals new data, no polling
 #
 import copy
 import threading
@@ -99,7 +101,7 @@ if PILGLOBALS.QT_Bindings=="PyQt5":
 from .pilconfig import PILCONFIG
 from .pilcharconv import charconv, CHARSET_HP41, CHARSET_ROMAN8
 from .pildevbase import cls_pildevbase
-from .pilwidgets import cls_tabgeneric, LogCheckboxWidget, T_INTEGER, O_DEFAULT
+from .pilwidgets import cls_tabgeneric, LogCheckboxWidget, cls_UpdateTimer, T_INTEGER, O_DEFAULT
 from .pilpdf import cls_pdfprinter
 from .pilcore import cls_Tab_Spec
 
@@ -661,9 +663,7 @@ class cls_HP82162AWidget(QtWidgets.QWidget):
 #
 #     initialize refresh timer
 #
-      self.UpdateTimer=QtCore.QTimer()
-      self.UpdateTimer.setSingleShot(True)
-      self.UpdateTimer.timeout.connect(self.process_queue)
+      self.UpdateTimer= cls_UpdateTimer(self.process_queue)
 #
 #     initialize timer for the repeated pressed advance button action
 #
@@ -675,11 +675,12 @@ class cls_HP82162AWidget(QtWidgets.QWidget):
 #
    def set_pildevice(self,pildevice):
       self.pildevice=pildevice
+      self.pildevice.setGuiQueueWakeup(self.UpdateTimer.wakeup)
 #
 #     enable: start timer, send mode to virtual device, update check boxes
 #
    def enable(self):
-      self.UpdateTimer.start(PILGLOBALS.Update_Timer)
+      self.UpdateTimer.start()
       self.setCheckBoxes()
       if self.printer_modeswitch== MODESWITCH_MAN:
          self.pildevice.putDeviceQueueItem(CMD_MAN)
@@ -808,14 +809,14 @@ class cls_HP82162AWidget(QtWidgets.QWidget):
       b=bytes(0)
       self.pildevice.putGuiQueueItem([REMOTECMD_PRINT,b,1])
 #
-#  process commands in the GUI command queue, this is called by a timer event
+#  process commands in the GUI command queue, this is called by the update
+#  timer if the device put new commands into the queue
 #
    def process_queue(self):
        items=self.pildevice.getGuiQueueItems()
        if len(items):
           for c in items:
              self.process(c)
-       self.UpdateTimer.start(PILGLOBALS.Update_Timer)
        return
 #
 #  GUI command processing, commands issued by the HP-IL thread
@@ -0,0 +1,230 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# Log file writer
+# (c) 2026 Joachim Siebold
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# Log file writer classes -------------------------------------------------------
+#
+# Changelog
+# 19.10.2026
+# - initial version
+#
+# All log files of the device tabs are written by one background thread. The
+# GUI appends the lines to a deque of the log file, which is thread safe and
+# the only work done in the GUI thread. Every LOG_WRITE_INTERVAL seconds the
+# writer thread takes all lines of a log file and writes them with a single
+# write call.
+#
+# Buffered log files are flushed at least every LOG_FLUSH_INTERVAL seconds,
+# unbuffered log files are flushed after each batch which contains a flush
+# request (end of line).
+#
+# Rotation: if a log file exceeds the maximum size or the hour or day has
+# changed, the log file NAME is renamed to NAME.1 (NAME.1 to NAME.2 and so on)
+# and a new log file is started. LOG_ROTATE_COUNT old log files are kept.
+#
+# Errors are not raised in the writer thread. The log file is closed and
+# the error is stored in the error attribute, the GUI checks it on the next
+# write.
+#
+import os
+import time
+import datetime
+import queue
+import threading
+import collections
+
+LOG_WRITE_INTERVAL=0.1     # time between two batches
+LOG_FLUSH_INTERVAL=1.0     # maximum time until buffered lines are flushed
+LOG_CLOSE_TIMEOUT=5.0      # maximum time to wait until a log file is closed
+LOG_ROTATE_COUNT=5         # number of rotated log files which are kept
+
+LOG_OPEN=0
+LOG_CLOSE=1
+
+# rotation choices: maximum size in bytes, period (0, "hour", "day")
+log_rotation= ["Off","1 MB","10 MB","100 MB","Hourly","Daily"]
+LOG_ROTATION= [[0,0],[1<<20,0],[10<<20,0],[100<<20,0],[0,"hour"],[0,"day"]]
+
+class cls_LogFile:
+
+   def __init__(self,filename,encoding,rotation=0):
+      self.filename= filename
+      self.encoding= encoding
+      self.file= None
+      self.error= None
+      self.buffered= True
+      self.lines= collections.deque()
+      self.size= 0
+      self.maxsize= 0
+      self.period= 0
+      self.rotate_at= None
+      self.flushrequest= False
+      self.closed= threading.Event()
+      self.setRotation(rotation)
+#
+#  open the log file, called by the GUI, raises OSError
+#
+   def open(self):
+      self.file= open(self.filename,"a",encoding=self.encoding)
+      self.size= os.fstat(self.file.fileno()).st_size
+      self.writer= getLogWriter()
+      self.writer.queue.put([self,LOG_OPEN])
+#
+#  set rotation, an index of LOG_ROTATION
+#
+   def setRotation(self,rotation):
+      self.maxsize, self.period= LOG_ROTATION[rotation]
+      self.nextRotation()
+#
+#  time of the next rotation: the start of the next hour or day
+#
+   def nextRotation(self):
+      now= datetime.datetime.now()
+      if self.period== "hour":
+         self.rotate_at= (now.replace(minute=0,second=0,microsecond=0)+ datetime.timedelta(hours=1)).timestamp()
+      elif self.period== "day":
+         self.rotate_at= datetime.datetime.combine(now.date()+ datetime.timedelta(days=1),datetime.time()).timestamp()
+      else:
+         self.rotate_at= None
+#
+#  called by the GUI: add a line, request a flush or close the log file.
+#  close waits until the writer thread has closed the file unless wait is
+#  False
+#
+   def write(self,line):
+      self.lines.append(line)
+
+   def flush(self):
+      self.flushrequest= True
+
+   def close(self,wait=True):
+      self.writer.queue.put([self,LOG_CLOSE])
+      if wait:
+         self.closed.wait(LOG_CLOSE_TIMEOUT)
+#
+#  called by the writer thread: write all lines added so far
+#
+   def writeBatch(self):
+      n= len(self.lines)
+      if n== 0:
+         return
+      data= "".join([self.lines.popleft() for i in range(n)])
+      if self.file is None:
+         return
+      try:
+         if self.rotate_at is not None and time.time() >= self.rotate_at:
+            self.rotate()
+         self.file.write(data)
+         self.size+= len(data.encode(self.encoding))
+         if self.maxsize and self.size >= self.maxsize:
+            self.rotate()
+      except OSError as e:
+         self.fail(e)
+
+   def flushFile(self):
+      if self.file is None:
+         return
+      try:
+         self.file.flush()
+      except OSError as e:
+         self.fail(e)
+#
+#  rename the log files and start a new log file
+#
+   def rotate(self):
+      self.file.close()
+      self.file= None
+      for i in range(LOG_ROTATE_COUNT- 1,0,-1):
+         if os.path.exists(self.filename+"."+str(i)):
+            os.replace(self.filename+"."+str(i),self.filename+"."+str(i+1))
+      os.replace(self.filename,self.filename+".1")
+      self.file= open(self.filename,"a",encoding=self.encoding)
+      self.size= 0
+      self.nextRotation()
+
+   def closeFile(self):
+      self.writeBatch()
+      if self.file is not None:
+         try:
+            self.file.close()
+         except OSError as e:
+            self.error= e.strerror
+         self.file= None
+      self.closed.set()
+
+   def fail(self,e):
+      self.error= e.strerror
+      try:
+         if self.file is not None:
+            self.file.close()
+      except OSError:
+         pass
+      self.file= None
+#
+# Log writer thread class -------------------------------------------------------
+#
+class cls_LogWriter(threading.Thread):
+
+   def __init__(self):
+      super().__init__(name="logwriter",daemon=True)
+      self.queue= queue.SimpleQueue()
+      self.files= []
+
+   def run(self):
+      lastflush= time.monotonic()
+      while True:
+#
+#        wait for open and close requests or the next batch
+#
+         try:
+            logfile, op= self.queue.get(timeout=LOG_WRITE_INTERVAL)
+            if op== LOG_OPEN:
+               self.files.append(logfile)
+            elif op== LOG_CLOSE:
+               if logfile in self.files:
+                  self.files.remove(logfile)
+               logfile.closeFile()
+            continue
+         except queue.Empty:
+            pass
+         for logfile in self.files:
+            logfile.writeBatch()
+            if logfile.flushrequest and not logfile.buffered:
+               logfile.flushFile()
+            logfile.flushrequest= False
+#
+#        bounded flush interval for buffered log files
+#
+         if time.monotonic()- lastflush >= LOG_FLUSH_INTERVAL:
+            for logfile in self.files:
+               logfile.flushFile()
+            lastflush= time.monotonic()
+#
+# the log writer thread is shared by all log files and started on first use
+#
+LOGWRITER= None
+logwriter_lock= threading.Lock()
+
+def getLogWriter():
+   global LOGWRITER
+   with logwriter_lock:
+      if LOGWRITER is None:
+         LOGWRITER= cls_LogWriter()
+         LOGWRITER.start()
+   return LOGWRITER
@@ -110,6 +110,9 @@
 # - refactoring of global variables
 # 21.03.2026 jsi
 # - pluggable interfaces and tabs
+# 19.10.2026
+# - use getItem of the output queue
+# - the GUI queue is processed if the device signals new data, no polling
 
 import sys
 import subprocess
@@ -126,7 +129,7 @@ from .pilcore import getEventPosition, decode_version, cls_Tab_Spec
 from .pilconfig import PilConfigError, PILCONFIG
 from .penconfig import PENCONFIG
 from .pildevbase import cls_pildevbase
-from .pilwidgets import cls_tabgeneric, LogCheckboxWidget, T_STRING
+from .pilwidgets import cls_tabgeneric, LogCheckboxWidget, cls_UpdateTimer, T_STRING
 from .pilpdf import cls_pdfprinter
 from .lifcore import add_path
 
@@ -721,19 +724,18 @@ class cls_PlotterWidget(QtWidgets.QWidget):
 #
 #     initialize refresh timer
 #
-      self.UpdateTimer= QtCore.QTimer()
-      self.UpdateTimer.setSingleShot(True)
-      self.UpdateTimer.timeout.connect(self.process_queue)
+      self.UpdateTimer= cls_UpdateTimer(self.process_queue)
 #
 #     set HP-IL device object
 #
    def set_pildevice(self,pildevice):
       self.pildevice=pildevice
+      self.pildevice.setGuiQueueWakeup(self.UpdateTimer.wakeup)
 #
 #     enable: start timer
 #
    def enable(self):
-      self.UpdateTimer.start(PILGLOBALS.Update_Timer)
+      self.UpdateTimer.start()
       self.toggle_active()
       return
 #
@@ -995,7 +997,8 @@ class cls_PlotterWidget(QtWidgets.QWidget):
       self.pen.setWidth(round(pendef[4]))
 
 #
-#  process commands in the GUI command queue, this is called by a timer event
+#  process commands in the GUI command queue, this is called by the update
+#  timer if the device put new commands into the queue
 #
    def process_queue(self):
        items=self.pildevice.getGuiQueueItems()
@@ -1003,7 +1006,6 @@ class cls_PlotterWidget(QtWidgets.QWidget):
           for c in items:
              self.process(c)
        self.plotview.update() 
-       self.UpdateTimer.start(PILGLOBALS.Update_Timer)
        return
 #
 #  GUI command processing
@@ -1696,7 +1698,7 @@ class cls_pilplotter(cls_pildevbase):
       if self.__outqueue__.empty():
          frame= 0x540 # EOT
       else:
-         frame= self.__outqueue__.get_nowait()
+         frame= self.__outqueue__.getItem()
          if self.__outqueue__.empty():
             self.__status__= self.__status__ & 0xEF # clear ready for data bit
       return(frame)
@@ -25,7 +25,7 @@
 from .pilconfig import PILCONFIG
 from .pilwidgets import cls_tabtermgeneric, T_STRING
 from .pildevbase import cls_pildevbase
-from .pilcharconv import CHARSET_HP71, charsets, icharconv
+from .pilcharconv import CHARSET_HP71, charsets, barrconv
 from .pilcore import cls_Tab_Spec, PILGLOBALS
 #
 # Generic printer tab classes -------------------------------------------------
@@ -47,6 +47,8 @@ from .pilcore import cls_Tab_Spec, PILGLOBALS
 # - all queues, locks and shared variables are now part of the pildevbase class
 # 21.03.2026 jsi
 # - pluggable interfaces and tabs
+# 19.10.2026
+# - output gui queue items to the terminal and to the log as one chunk
 #
 class cls_tabprinter(cls_tabtermgeneric):
 
@@ -94,12 +96,11 @@ class cls_tabprinter(cls_tabtermgeneric):
 #   output gui queue items to the terminal and perform logging
 #
    def out_device(self,items):
-      for i in items:
-         self.guiobject.HPTerminal.process(i)
-         if i !=8 and  i!= 13:
-            self.cbLogging.logWrite(icharconv(i,self.charset))
-         if i== 10:
-            self.cbLogging.logFlush()
+      data= bytes(items)
+      self.guiobject.HPTerminal.process_bytes(data)
+      self.cbLogging.logWrite(barrconv(data.translate(None,b"\x08\x0d"),self.charset))
+      if 10 in data:
+         self.cbLogging.logFlush()
 #
 #  callback reset terminal
 #
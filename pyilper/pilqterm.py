@@ -190,11 +190,23 @@
 # - refactoring of global variables
 # 29.94.2026 jsi
 # - fixed out_terminal call
+# 19.10.2026
+# - reset_terminal puts the escape sequence as one buffer into the gui queue
+# - display updates which are not caused by terminal output are requested
+#   from the update timer of the tab
+# - the backend tracks the changed rows of the line buffer, the terminal
+#   widget builds only the changed rows and moves the graphics items of the
+#   other rows if the line buffer or the view is scrolled
+# - process_bytes: output of runs of printable characters as one slice of
+#   the line buffer
+# - dumb_echo: fixed line length of the new line after the automatic CR/LF
+# - added get_buffersize
 #
 # to do:
-# fix the reason for a possible index error in HPTerminal.dump()
+# fix the reason for a possible index error in HPTerminal.dump_row()
 
 import array
+import re
 import threading
 import time
 
@@ -205,7 +217,7 @@ if PILGLOBALS.QT_Bindings=="PyQt5":
    from PyQt5 import QtCore, QtGui, QtWidgets
 
 from .pilcore import  getEventPosition
-from .pilcharconv import icharconv, CHARSET_HP71, CHARSET_HP75, CHARSET_HP41
+from .pilcharconv import icharconv, convert_to_unicode, CHARSET_HP71, CHARSET_HP75, CHARSET_HP41
 from .shortcutconfig import SHORTCUTCONFIG, SHORTCUT_EXEC, SHORTCUT_EDIT, SHORTCUT_INSERT
 from .pilconfig import PILCONFIG
 from .pilkeymap import *
@@ -236,6 +248,10 @@ CHAR_ATTRIB = [
         CHAR_ATTRIB_NONE       # Roman-8 charset
 ]
 #
+# run of characters which are not processed as control characters
+#
+PRINTABLE_RUN= re.compile(rb"[^\x08\x0a\x0d\x1b\x7f]+")
+#
 # scrolled terminal widget class ---------------------------------------------
 #
 class QScrolledTerminalWidget(QtWidgets.QWidget):
@@ -329,6 +345,14 @@ class QScrolledTerminalWidget(QtWidgets.QWidget):
     def redraw(self):
        return
 #
+#   request a refresh of the terminal by the update timer of the tab
+#
+    def request_update(self):
+        try:
+           self.tabwidget.UpdateTimer.schedule()
+        except AttributeError:
+           pass
+#
 #   set pildevice
 #
     def set_pildevice(self,device):
@@ -350,6 +374,11 @@ class QScrolledTerminalWidget(QtWidgets.QWidget):
     def get_rows(self):
       return self.terminalwidget.get_rows()
 #
+#   get number of lines of the terminal line buffer
+#
+    def get_buffersize(self):
+      return self.HPTerminal.h
+#
 #  Select area custom class ---------------------------------------------
 #
 class cls_SelectArea(QtWidgets.QGraphicsItem):
@@ -491,7 +520,9 @@ class QTerminalWidget(QtWidgets.QGraphicsView):
         self._scrollupbuffersize= -1  # dto
         self._keyboard_type=-1        # keyboard type (HP-71 or HP-75)
         self._HPTerminal= None        # backend object,set by setHPterminal
-        self._screen = []             # frontend screen buffer
+        self._rowitems= {}            # graphics items of the visible rows,
+                                      # key is the row in the line buffer
+        self._view_y0= 0              # first visible row of the last update
         self._cursor_col = 0          # cursor position
         self._cursor_row = 0          # dto.
         self._kbdfunc= None           # function that is called to send keyboard input
@@ -532,6 +563,7 @@ class QTerminalWidget(QtWidgets.QGraphicsView):
         self.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
         self.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
         self._cursorItem=None
+        self._selectAreaItem=None
 #
 #       widget cursor type
 #
@@ -596,6 +628,7 @@ class QTerminalWidget(QtWidgets.QGraphicsView):
         self._color_scheme=self.color_schemes[self._color_scheme_index]
         self._cursor_color=self._color_scheme[2]
         self.setBackgroundBrush(QtGui.QBrush(self._color_scheme[0]))
+        self.remove_rows()
 #
 #       now shrink all parent windows to minimum size
 #
@@ -977,92 +1010,105 @@ class QTerminalWidget(QtWidgets.QGraphicsView):
        if self._cursorItem is not None:
           self._cursorItem.start()
        self._isVisible=True
-# 
-#   draw terminal content, this is called by the backend
-#    
-    def update_term(self,dump):
-#
-#      do nothing if not visible
-#
-       if not self._isVisible:
-          return
-#
-#      fetch screen buffer dump from backend
 #
-       (self._cursor_col, self._cursor_row, self._cursor_attr, start_row, start_col, end_row, end_col), self._screen = dump()
+#   remove the graphics items of all rows, they are rebuilt at the next update
 #
-#      clear scene, remove and delete display items
-#
-       olditemlist= self._scene.items()
-       for item in olditemlist:
+    def remove_rows(self):
+       for item in self._rowitems.values():
           self._scene.removeItem(item)
-          item=None
-       self._cursorItem=None
-       y=0
-       text=[]
+       self._rowitems= {}
 #
-#      initialize attributes (bg/fg-color, invers attribute
+#   build the graphics items of a row, the row is a list of [attribute,
+#   string]. Blank strings without attribute need no item
 #
-       background_color = self._color_scheme[0]
-       foreground_color = self._color_scheme[1]
-       fgbrush=QtGui.QBrush(foreground_color)
-       bgbrush=QtGui.QBrush(background_color)
+    def build_row(self,row):
+       group= QtWidgets.QGraphicsItemGroup()
+       col=0
+       for attr, text in row:
+          length= len(text)
+          if attr== 0 and text.isspace():
+             col+= length
+             continue
+          if attr== CHAR_ATTRIB_INVERSE_SHORT:
+             background_color = self._color_scheme[1]
+             foreground_color = self._color_scheme[0]
+#
+#            if inverse flag set, add background rectangle
+#
+             fillItem=QtWidgets.QGraphicsRectItem(0,0,self._true_w[col+length]- self._true_w[col],self._char_height)
+             fillItem.setBrush(QtGui.QBrush(background_color))
+             fillItem.setPos(self._true_w[col],0)
+             fillItem.setParentItem(group)
+          else:
+             foreground_color = self._color_scheme[1]
+          self._font.setUnderline(attr == CHAR_ATTRIB_UNDERLINE_SHORT)
+          txtItem=QtWidgets.QGraphicsSimpleTextItem(text)
+          txtItem.setFont(self._font)
+          txtItem.setPos(self._true_w[col],0)
+          txtItem.setBrush(QtGui.QBrush(foreground_color))
+          txtItem.setParentItem(group)
+          col+= length
        self._font.setUnderline(False)
-       invers_flag= False
-#
-#      loop over each row
-#
-       for row,line in enumerate(self._screen):
-          col=0
-          text_line=""
-#
-#         loop over each item in a row
-#
-          for item in line:
+       return group
+# 
+#   draw terminal content, this is called by the backend. Only the rows that
+#   were changed are built again. If the line buffer or the view was
+#   scrolled, the items of the unchanged rows are moved.
+#    
+    def update_term(self,dump):
 #
-#             item is a string
+#      do nothing if not visible, the backend keeps the changes
 #
-              if isinstance (item,str):
-                 x=self._true_w[col]
-                 length= len(item)
+       if not self._isVisible:
+          return
 #
-#                if inverse flag set, add background rectangle to scene
+#      fetch cursor, selection and changed rows from backend
 #
-                 if invers_flag:
-                    fillItem=QtWidgets.QGraphicsRectItem(0,0,self._true_w[col+length]- self._true_w[col],self._char_height)
-                    fillItem.setBrush(bgbrush)
-                    fillItem.setPos(x,y)
-                    self._scene.addItem(fillItem)
+       (self._cursor_col, self._cursor_row, self._cursor_attr, start_row, start_col, end_row, end_col), (view_y0, view_y1, shift, dirty) = dump()
 #
-#                add text to scene
+#      remove cursor and selection
 #
-                 txtItem=QtWidgets.QGraphicsSimpleTextItem(item)
-                 txtItem.setFont(self._font)
-                 txtItem.setPos(x,y)
-                 txtItem.setBrush(fgbrush)
-                 self._scene.addItem(txtItem)
-                 col += length
-              else:
-#
-#                item is attribute, set fg/bg color
-# 
-                 if item== CHAR_ATTRIB_INVERSE_SHORT:
-                    background_color = self._color_scheme[1]
-                    foreground_color = self._color_scheme[0]
-                    invers_flag= True
-                 else:
-                    background_color = self._color_scheme[0]
-                    foreground_color = self._color_scheme[1]
-                    invers_flag= False
-                 fgbrush=QtGui.QBrush(foreground_color)
-                 bgbrush=QtGui.QBrush(background_color)
-#
-#                underline
-#
-                 self._font.setUnderline(False)
-                 if item == CHAR_ATTRIB_UNDERLINE_SHORT:
-                    self._font.setUnderline(True)
-          y += self._char_height
+       if self._cursorItem is not None:
+          self._scene.removeItem(self._cursorItem)
+          self._cursorItem=None
+       if self._selectAreaItem is not None:
+          self._scene.removeItem(self._selectAreaItem)
+          self._selectAreaItem=None
+#
+#      the line buffer was scrolled up by shift lines, renumber the rows,
+#      remove rows that were changed or are not visible any more
+#
+       if dirty is None:
+          self.remove_rows()
+       elif shift:
+          rowitems= {}
+          for y, item in self._rowitems.items():
+             if y- shift >= 0:
+                rowitems[y- shift]= item
+             else:
+                self._scene.removeItem(item)
+          self._rowitems= rowitems
+       if dirty:
+          for y in dirty:
+             item= self._rowitems.pop(y,None)
+             if item is not None:
+                self._scene.removeItem(item)
+       for y in [y for y in self._rowitems if y < view_y0 or y > view_y1]:
+          self._scene.removeItem(self._rowitems.pop(y))
+#
+#      build the missing rows, move the other rows if the view changed
+#
+       moved= shift != 0 or view_y0 != self._view_y0
+       self._view_y0= view_y0
+       for y in range(view_y0, view_y1+1):
+          item= self._rowitems.get(y)
+          if item is None:
+             item= self.build_row(self._HPTerminal.dump_row(y))
+             item.setPos(0,(y- view_y0)* self._char_height)
+             self._scene.addItem(item)
+             self._rowitems[y]= item
+          elif moved:
+             item.setPos(0,(y- view_y0)* self._char_height)
 #
 #      add selection area to scene
 #
@@ -1076,11 +1122,11 @@ class QTerminalWidget(QtWidgets.QGraphicsView):
           cursoridx= self._cursor_row* self._cols + self._cursor_col
           if cursoridx >= startidx and cursoridx <= endidx:
              cursor_in_selection= True
-          selectAreaItem= cls_SelectArea(start_row, start_col, end_row, end_col,
+          self._selectAreaItem= cls_SelectArea(start_row, start_col, end_row, end_col,
                           self._cols, self._char_height, self._true_w,
                           self._cursor_color)
-          selectAreaItem.setPos(0,start_row* self._char_height)
-          self._scene.addItem(selectAreaItem)
+          self._selectAreaItem.setPos(0,start_row* self._char_height)
+          self._scene.addItem(self._selectAreaItem)
           
 #
 #      add cursor at cursor position to scene
@@ -1093,7 +1139,6 @@ class QTerminalWidget(QtWidgets.QGraphicsView):
           self._cursorItem= TermCursor(self._cursor_width,self._cursor_height,self._cursortype, cursor_foreground_color)
           self._cursorItem.setPos(self._true_w[self._cursor_col],self._cursor_row*self._char_height)
           self._scene.addItem(self._cursorItem)
-       self._font.setUnderline(False)
 
 #
 # Terminal backend class -----------------------------------------------------------
@@ -1125,6 +1170,9 @@ class HPTerminal:
         self.view_y1=0                    # top of buffer view
         self.blink_counter=0              # counter that controls cursor blink
         self.charset=CHARSET_HP71         # character set used for output
+        self.cells=None                   # lookup table character code ->
+                                          # attribute and unicode of charset,
+                                          # initialized by process_bytes
         self.cx=0                         # actual cursor position
         self.cy=0 
         self.insert=False                 # inser mode flag
@@ -1142,6 +1190,10 @@ class HPTerminal:
                                           # reconfigure, becomes_visible, 
                                           # scroll_view_up, scroll_view_down, 
                                           # terminal output
+        self.dirty=None                   # rows of the line buffer changed
+                                          # since the last dump, None: all
+        self.shift=0                      # number of lines the line buffer
+                                          # was scrolled up since the last dump
         self.press_row= 0                 # row, col of selection press position
         self.press_col=0
         self.start_row= 0                 # row, col of selection (upper left)
@@ -1165,7 +1217,7 @@ class HPTerminal:
        if w != self.w:
           self.w= w
           self.reset_hard()
-       self.needsUpdate=True
+       self.request_update()
        return
 #
 #   Reset functions
@@ -1186,6 +1238,8 @@ class HPTerminal:
     def reset_screen(self):
         # Screen
         self.screen = array.array('i', [CHAR_ATTRIB_NONE | 0x20] * self.w * self.h)
+        self.dirty=None
+        self.shift=0
         self.linelength= array.array('i', [0] * self.h)
         self.linewrapped= array.array('i',[False] * self.h)
         # Scroll parameters
@@ -1234,7 +1288,7 @@ class HPTerminal:
         if self.actual_h >= self.view_h:
            self.win.scrollbar.setMaximum(self.actual_h-self.view_h+1)
         self.win.scrollbar.setPageStep(self.view_h)
-        self.needsUpdate=True
+        self.request_update()
 #
 #   Low-level terminal functions on terminal line buffer
 #
@@ -1244,6 +1298,8 @@ class HPTerminal:
     def poke(self, y, x, s):
         pos = self.w * y + x
         self.screen[pos:pos + len(s)] = s
+        if self.dirty is not None:
+           self.dirty.update(range(y, (pos + len(s) - 1) // self.w + 1))
 
     def fill(self, y0, x0, y1, x1, char):
         n = self.w * (y1 - y0 - 1) + (x1 - x0)
@@ -1310,7 +1366,10 @@ class HPTerminal:
 #   the method returns the new value of self.cy
 #
     def scroll_screenbuffer_up(self,n):
-        self.poke(0, 0, self.peek(0 + n, 0, self.h, self.w))
+        self.screen[0:self.w * (self.h - n)] = self.screen[self.w * n:self.w * self.h]
+        if self.dirty is not None:
+           self.dirty= {y - n for y in self.dirty if y >= n}
+        self.shift+= n
         self.clear(self.h - n, 0, self.h, self.w)
         self.linelength[0:self.h-n]=self.linelength[n:]
         self.linewrapped[0:self.h-n]=self.linewrapped[n:]
@@ -1383,14 +1442,14 @@ class HPTerminal:
        if self.view_y1< self.cy:
           self.view_y0+=1
           self.view_y1+=1
-          self.needsUpdate=True
+          self.request_update()
           self.win.scrollbar.setValue(self.view_y0)
 
     def scroll_view_up(self):
        if self.view_y0 >0:
           self.view_y0-=1
           self.view_y1-=1
-          self.needsUpdate=True
+          self.request_update()
           self.win.scrollbar.setValue(self.view_y0)
 
     def scroll_page_down(self):
@@ -1402,7 +1461,7 @@ class HPTerminal:
        else:
           self.view_y1+= self.view_h 
           self.view_y0+= self.view_h
-       self.needsUpdate=True
+       self.request_update()
        self.win.scrollbar.setValue(self.view_y0)
 
 
@@ -1415,7 +1474,7 @@ class HPTerminal:
        else:
           self.view_y0-= self.view_h
           self.view_y1-= self.view_h
-       self.needsUpdate=True
+       self.request_update()
        self.win.scrollbar.setValue(self.view_y0)
 
 #
@@ -1568,6 +1627,7 @@ class HPTerminal:
 #             print("dumb_echo cr/lf")
               self.ctrl_CR()
               self.ctrl_LF()
+              oldwrappedlinelength=self.get_wrapped_linelength(self.cy)
            self.poke(self.cy, self.cx, array.array('i', [self.attr | char]))
 #
 #          do not increase line length if we overwrite existing text
@@ -1577,52 +1637,47 @@ class HPTerminal:
               self.set_wrapped_linelength(self.cy,oldwrappedlinelength+1)
         self.cursor_right()
 #
-#   dump screen to terminal window, the data are painted during a paint event
+#   dump cursor, selection and the rows changed since the last dump to the
+#   terminal window. The rows are fetched with dump_row
 #
     def dump(self):
-        screen = []
-        attr_ = -1
-        cursor_char=0x20
-        cursor_attr= -1
         cx, cy = min(self.cx, self.w - 1), self.cy
-        for y in range(self.view_y0, self.view_y1+1):
-            wx = 0
-            line = [""]
-            for x in range(0, self.w):
-                try:
-                   d = self.screen[y * self.w + x] # fix possible index out of range error
-                except IndexError:
-                   print("self.screen Index error %d %d"% (y,x))
-                   continue
-                char = d & 0xffff
-                attr = d >> 16
-                if x== cx and y== cy:
-                   cursor_char=char
-                   cursor_attr=attr
-#
-#               Attributes 
-#
-                if attr != attr_:
-                    if attr_ != -1:
-                        line.append("")
-                    line.append(attr)
-                    line.append("")
-                    attr_ = attr
-                wx += 1
-                if wx <= self.w:
-                    line[-1] += chr(char)
-            screen.append(line)
-
+        try:
+           cursor_attr= self.screen[cy * self.w + cx] >> 16
+        except IndexError:
+           cursor_attr= -1
         if cy >= self.view_y0 and cy <= self.view_y1:
            cy= cy- self.view_y0
         else:
            cy= -1
            cx= -1
+           cursor_attr= -1
         if self.showSelection:
            (start_row, start_col, end_row, end_col)= self.getSelection()
         else:
            (start_row, start_col, end_row, end_col)= (None,None,None,None)
-        return (cx, cy, cursor_attr,start_row, start_col, end_row, end_col), screen
+        changes= (self.view_y0, self.view_y1, self.shift, self.dirty)
+        self.dirty= set()
+        self.shift= 0
+        return (cx, cy, cursor_attr,start_row, start_col, end_row, end_col), changes
+#
+#   dump a row of the line buffer as list of [attribute, string]
+#
+    def dump_row(self,y):
+        if y < 0 or y >= self.h:
+           return []
+        row= self.screen[y * self.w:(y + 1) * self.w]
+        if max(row) <= 0xffff:
+           return [[0, "".join(map(chr,row))]]
+        line= []
+        attr_= -1
+        for d in row:
+           attr= d >> 16
+           if attr != attr_:
+              line.append([attr, ""])
+              attr_= attr
+           line[-1][1]+= chr(d & 0xffff)
+        return line
 #
 #   process terminal output queue and refresh display
 #        
@@ -1630,6 +1685,13 @@ class HPTerminal:
        if self.needsUpdate:
           self.win.terminalwidget.update_term(self.dump)
        self.needsUpdate=False
+#
+#   the display needs an update which was not caused by terminal output,
+#   let the tab call refresh
+#
+    def request_update(self):
+       self.needsUpdate=True
+       self.win.request_update()
        
 #
 #   process output to display
@@ -1746,6 +1808,69 @@ class HPTerminal:
                    self.attr= CHAR_ATTRIB_NONE
                 self.dumb_echo(ord(cc)) 
        return
+#
+#   process a chunk of output to display. Runs of printable characters
+#   are converted with a lookup table and written to the line buffer with
+#   one slice operation per row, all other characters, escape sequences
+#   and output in insert mode are handled by process
+#
+    def process_bytes(self,data):
+       data= bytes(data)
+       n= len(data)
+       i= 0
+       while i < n:
+          if not self.fesc and self.movecursor==0 and not self.insert:
+             m= PRINTABLE_RUN.match(data,i)
+             if m is not None:
+                self.echo_run(data[i:m.end()])
+                i= m.end()
+                continue
+          self.process(data[i])
+          i+=1
+       return
+#
+#   output a run of printable characters, does the same as dumb_echo
+#   for each character
+#
+    def echo_run(self,run):
+       self.needsUpdate=True
+       self.scroll_view_to_bottom()
+       if self.cells is None:
+          attr= CHAR_ATTRIB[self.charset]
+          table= convert_to_unicode[self.charset]
+          self.cells= [(attr if t > 127 else CHAR_ATTRIB_NONE) | ord(table[t]) for t in range(256)]
+       cells= array.array('i', map(self.cells.__getitem__, run))
+       if run[-1] > 127:
+          self.attr= CHAR_ATTRIB[self.charset]
+       else:
+          self.attr= CHAR_ATTRIB_NONE
+       n= len(cells)
+       i= 0
+       while i < n:
+          ll= self.get_wrapped_linelength(self.cy)
+          if ll == self.w*2:
+             self.ctrl_CR()
+             self.ctrl_LF()
+             ll= self.get_wrapped_linelength(self.cy)
+#
+#         write up to the end of the row, one character if the line is
+#         still full
+#
+          if ll == self.w*2:
+             k= 1
+          else:
+             k= max(1, min(n-i, self.w-self.cx))
+          self.poke(self.cy, self.cx, cells[i:i+k])
+#
+#         do not increase line length if we overwrite existing text
+#
+          cursor_pos= self.get_wrapped_cursor_x(self.cx,self.cy)
+          if cursor_pos <= ll and cursor_pos+k > ll:
+             self.set_wrapped_linelength(self.cy,cursor_pos+k)
+          self.cx+= k-1
+          self.cursor_right()
+          i+= k
+       return
  
 #
 #   External interface
@@ -1755,17 +1880,17 @@ class HPTerminal:
 #
     def set_charset(self,charset):
        self.charset= charset
+       self.cells= None
 #
 #   reset terminal, send ESC e
 # 
     def reset_terminal(self):
-       self.win.pildevice.putGuiQueueItem(0x1b)
-       self.win.pildevice.putGuiQueueItem(0x65)
+       self.win.pildevice.putGuiQueueItems(b"\x1be")
 #
 #    becomes visible, call update_term to redraw the view
 #
     def becomes_visible(self):
-       self.needsUpdate=True
+       self.request_update()
 #
 #    becomes_invisible: nothing to do
 #
@@ -1777,7 +1902,7 @@ class HPTerminal:
     def scroll_to(self,value):
        self.view_y0= value
        self.view_y1= value + self.view_h-1
-       self.needsUpdate=True
+       self.request_update()
 #
 #   Get true (scrolled!) row column in terminal line buffer from click position
 #
@@ -1823,7 +1948,7 @@ class HPTerminal:
 #
     def selectionStop(self):
        self.showSelection=False
-       self.needsUpdate=True
+       self.request_update()
 #
 #   Selection move, process actual position, show selection
 #
@@ -1847,7 +1972,7 @@ class HPTerminal:
           temp=self.start_row
           self.start_row= self.move_row
           self.move_row=temp
-       self.needsUpdate=True
+       self.request_update()
        return True
 #
 #   return Text of selection
@@ -64,6 +64,19 @@
 # - refactoring of global variables
 # 21.03.2026 jsi
 # - pluggable interfaces and tabs
+# 19.10.2026
+# - the scopes store raw frames in a ring buffer, the frames are decoded
+#   when the ring buffer is read by the GUI. If the GUI falls behind, the
+#   oldest frames are overwritten and the dropped frames are counted
+# - the outbound scope output is displayed again
+# - trigger and filter
+# - ring buffer, frame decoding and trigger moved to scopecore.py
+# - binary log format (scope capture files)
+# - the ring buffer is read if a scope signals new frames, no polling
+# - capture blocks are compressed and written by the log writer thread
+# - only the frames which fit into the terminal line buffer are decoded if
+#   there is no text log, the output is passed to the terminal with
+#   process_bytes
 
 
 import datetime
@@ -73,19 +86,21 @@ if PILGLOBALS.QT_Bindings=="PySide6":
    from PySide6 import QtWidgets
 if PILGLOBALS.QT_Bindings=="PyQt5":
    from PyQt5 import QtWidgets
-from .pilconfig import PILCONFIG
-from .pilwidgets import cls_tabtermgeneric, T_BOOLEAN, T_STRING,O_DEFAULT
+from .pilconfig import PILCONFIG, PilConfigError
+from .pilwidgets import cls_tabtermgeneric, LogCheckboxWidget, T_BOOLEAN, T_STRING,O_DEFAULT
 from .pildevbase import cls_pildevbase
 from .pilcore import cls_Tab_Spec
+from .scopecore import *
+from .scopecapture import cls_ScopeCaptureLog, ScopeCaptureError, getDefaultCompression, SCOPE_CAPTURE_EXTENSION
 
 
 LOG_INBOUND=0
 LOG_OUTBOUND=1
 LOG_BOTH=2
-DISPLAY_MNEMONIC=0
-DISPLAY_HEX=1
-DISPLAY_BOTH=2
+LOG_TEXT=0
+LOG_BINARY=1
 log_mode= ["Inbound", "Outbound", "Both"]
+log_format= ["Text","Binary"]
 display_mode= ["Mnemonic","Hex","Both"]
 
 class cls_tabscope(cls_tabtermgeneric):
@@ -102,7 +117,7 @@ class cls_tabscope(cls_tabtermgeneric):
 #
 #     add logging
 #
-      self.add_logging()
+      self.add_logging(cls_ScopeLogCheckboxWidget(self.name))
 #
 #     add tag button
 #
@@ -116,11 +131,37 @@ class cls_tabscope(cls_tabtermgeneric):
       self.cBut.add_option("Show IDY frames","showidy",T_BOOLEAN,[True,False])
       self.cBut.add_option("Display Mode","displaymode",T_STRING,display_mode)
       self.cBut.add_option("Log mode","logmode",T_STRING,log_mode)
+      self.cBut.add_option("Log format","logformat",T_STRING,log_format)
 #
-#     create HP-IL devices and let the GUI object know them
+#     add trigger button and trigger engine, an invalid configuration
+#     is reset
 #
-      self.pildevice= cls_pilscope(True,self)
-      self.pildevice2= cls_pilscope(False,self)
+      self.triggerButton=QtWidgets.QPushButton("Trigger")
+      self.add_controlwidget(self.triggerButton)
+      self.triggerButton.clicked.connect(self.do_triggerbutton)
+      self.trigger= cls_scopetrigger()
+      try:
+         self.trigger.configure(PILCONFIG.get(self.name,"filter",""),PILCONFIG.get(self.name,"trigger",""),PILCONFIG.get(self.name,"pretrigger",0),PILCONFIG.get(self.name,"posttrigger",0))
+      except ScopeTriggerError:
+         PILCONFIG.put(self.name,"filter","")
+         PILCONFIG.put(self.name,"trigger","")
+#
+#     add trigger status and dropped frames counter
+#
+      self.triggerwidget=QtWidgets.QLabel("")
+      self.add_statuswidget(self.triggerwidget)
+      self.update_trigger()
+      self.dropwidget=QtWidgets.QLabel("")
+      self.add_statuswidget(self.dropwidget)
+      self.update_dropped(0)
+#
+#     create HP-IL devices and let the GUI object know them. Both devices
+#     write to the same ring buffer
+#
+      self.ring= cls_scopering(SCOPE_RING_SIZE)
+      self.ring.setWakeup(self.UpdateTimer.wakeup)
+      self.pildevice= cls_pilscope(True,self,self.ring)
+      self.pildevice2= cls_pilscope(False,self,self.ring)
       self.guiobject.set_pildevice(self.pildevice)
 
       self.cBut.config_changed_signal.connect(self.do_tabconfig_changed)
@@ -138,12 +179,19 @@ class cls_tabscope(cls_tabtermgeneric):
          self.pildevice2.set_show_idy(self.showIdy)
       elif param=="displaymode":
          self.displayMode= PILCONFIG.get(self.name,"displaymode")
-         self.pildevice.set_displayMode(self.displayMode)
-         self.pildevice2.set_displayMode(self.displayMode)
       elif param=="logmode":
          self.logMode= PILCONFIG.get(self.name,"logmode")
          self.pildevice.setactive(PILCONFIG.get(self.name,"active") and not (self.logMode == LOG_OUTBOUND))
          self.pildevice2.setactive(PILCONFIG.get(self.name,"active") and not (self.logMode == LOG_INBOUND))
+#
+#     a changed log format is used if the log is opened again
+#
+      elif param=="logformat":
+         self.cbLogging.set_logformat(PILCONFIG.get(self.name,"logformat"))
+         if self.logging:
+            self.cbLogging.logClose()
+            if not self.cbLogging.logOpen():
+               self.cbLogging.setChecked(False)
       super().do_tabconfig_changed()
 
    def enable(self):
@@ -151,7 +199,6 @@ class cls_tabscope(cls_tabtermgeneric):
       self.parent.commthread.register(self.pildevice,self.name)
       self.pildevice.setactive(PILCONFIG.get(self.name,"active") and not (self.logMode == LOG_OUTBOUND))
       self.pildevice.set_show_idy(self.showIdy)
-      self.pildevice.set_displayMode(self.displayMode)
       if self.logging:
          self.tagButton.setEnabled(True)
 
@@ -159,7 +206,6 @@ class cls_tabscope(cls_tabtermgeneric):
       self.parent.commthread.register(self.pildevice2,self.name)
       self.pildevice2.setactive(PILCONFIG.get(self.name,"active") and not (self.logMode== LOG_INBOUND))
       self.pildevice2.set_show_idy(self.showIdy)
-      self.pildevice2.set_displayMode(self.displayMode)
 
    def disable(self):
       super().disable()
@@ -204,23 +250,241 @@ class cls_tabscope(cls_tabtermgeneric):
           if self.parent.commthread is not None:
              self.parent.commthread.resume()
 #
+#  exec trigger button, configure filter and trigger
+#
+   def do_triggerbutton(self):
+      result= cls_ScopeTriggerDialog.getTrigger(PILCONFIG.get(self.name,"filter"),PILCONFIG.get(self.name,"trigger"),PILCONFIG.get(self.name,"pretrigger"),PILCONFIG.get(self.name,"posttrigger"))
+      if result is None:
+         return
+      filterspec, triggerspec, pre, post= result
+      self.trigger.configure(filterspec,triggerspec,pre,post)
+      PILCONFIG.put(self.name,"filter",filterspec)
+      PILCONFIG.put(self.name,"trigger",triggerspec)
+      PILCONFIG.put(self.name,"pretrigger",pre)
+      PILCONFIG.put(self.name,"posttrigger",post)
+      try:
+         PILCONFIG.save()
+      except PilConfigError as e:
+         QtWidgets.QMessageBox.critical(self,'Error',e.msg+': '+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+      self.update_trigger()
+#
+#  update trigger status
+#
+   def update_trigger(self):
+      if self.trigger.sequence is None:
+         self.triggerwidget.setText("Trigger: off")
+      else:
+         self.triggerwidget.setText("Trigger: fired {:d}x".format(self.trigger.fired))
+#
+#  update dropped frames counter
+#
+   def update_dropped(self,dropped):
+      self.dropwidget.setText("Dropped frames: {:d}".format(dropped))
+#
+#  read the ring buffer, apply filter and trigger to the raw frames, decode
+#  the remaining frames and trigger update terminalwidget. Dropped frames
+#  are marked in the output
+#
+   def process_queue(self):
+      frames, timestamps, dropped= self.ring.get()
+      if len(frames) and self.logging:
+         self.cbLogging.logFrames(frames,timestamps,dropped)
+      items=[]
+      if dropped:
+         items.append("** {:d} frames dropped ** ".format(dropped))
+         self.update_dropped(self.ring.dropped)
+      if len(frames):
+         fired= self.trigger.fired
+         items.extend(self.trigger.process(frames))
+         if self.trigger.fired != fired:
+            self.update_trigger()
+      if len(items):
+         self.out_device(self.format_items(items))
+      self.guiobject.HPTerminal.refresh()
+      return
+#
+#  decode frames to mnemonic text, strings are markers. Without a text log
+#  only the last items which fill the terminal line buffer are decoded, the
+#  older output would be scrolled out of the buffer anyway
+#
+   def format_items(self,items):
+      inbound= get_scope_table(self.displayMode,True)
+      outbound= get_scope_table(self.displayMode,False)
+      if self.cbLogging.log is not None:
+         return [f if isinstance(f,str) else outbound[f & 0x7FF] if f & SCOPE_OUTBOUND else inbound[f] for f in items]
+      limit= (self.guiobject.get_buffersize()+1)* self.guiobject.get_cols()
+      texts=[]
+      n=0
+      for f in reversed(items):
+         s= f if isinstance(f,str) else outbound[f & 0x7FF] if f & SCOPE_OUTBOUND else inbound[f]
+         texts.append(s)
+         n+= len(s)
+         if n >= limit:
+            break
+      texts.reverse()
+      return texts
 #
 #  Forward items to the terminal frontend widget and do logging
 #  Note: for the scope a single item is a string not the integer representation of a character
+#
+#  The items are broken into lines of the terminal width and the batch is
+#  passed to the terminal with one call of process_bytes. Only the lines
+#  which fit into the terminal line buffer are passed.
 #
    def out_device(self,items):
+      cols= self.guiobject.get_cols()
+      pos= self.scope_charpos
+      out=[]
       for s in items:
          l=len(s)
-         if self.scope_charpos+l>=self.guiobject.get_cols() :
-            self.guiobject.HPTerminal.process(0x0D)
-            self.guiobject.HPTerminal.process(0x0A)
-            self.cbLogging.logWrite("\n")
-            self.cbLogging.logFlush()
-            self.scope_charpos=0
-         for i in range(0,l):
-            self.guiobject.HPTerminal.process(ord(s[i]))
-         self.cbLogging.logWrite(s)
-         self.scope_charpos+=l
+         if pos+l>=cols :
+            out.append("\n")
+            pos=0
+         out.append(s)
+         pos+=l
+      self.scope_charpos=pos
+      text="".join(out)
+      self.cbLogging.logWrite(text)
+      if "\n" in text:
+         self.cbLogging.logFlush()
+#
+#     the line feed before the kept lines is passed, it ends the current
+#     line of the terminal
+#
+      start= len(text)
+      for i in range(self.guiobject.get_buffersize()):
+         start= text.rfind("\n",0,start)
+         if start <= 0:
+            start= 0
+            break
+      self.guiobject.HPTerminal.process_bytes(text[start:].replace("\n","\r\n").encode("latin-1",errors="replace"))
+#
+# Scope log checkbox class -----------------------------------------------------
+#
+# Changelog
+# 19.10.2026
+# - initial version
+#
+# In the binary log format the raw frames of the ring buffer are written to
+# the capture file Scope.cap instead of the text log. Frames are captured
+# before they are filtered. Tags are only written to the text log, the
+# number of dropped frames is stored in the capture file. The capture file
+# is written by the log writer thread.
+#
+class cls_ScopeLogCheckboxWidget(LogCheckboxWidget):
+
+   def __init__(self,name):
+      super().__init__(name)
+      self.logformat= PILCONFIG.get(self.name,"logformat",LOG_TEXT)
+      self.capture= None
+
+   def set_logformat(self,logformat):
+      self.logformat= logformat
+
+   def logOpen(self):
+      if self.logformat== LOG_TEXT:
+         return super().logOpen()
+      self.capture= cls_ScopeCaptureLog(self.name+SCOPE_CAPTURE_EXTENSION,getDefaultCompression())
+      try:
+         self.capture.open()
+         return True
+      except ScopeCaptureError as e:
+         self.capture= None
+         reply=QtWidgets.QMessageBox.critical(self,'Error',"Cannot open capture file "+self.name+SCOPE_CAPTURE_EXTENSION+": "+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+         return False
+
+   def logClose(self):
+      if self.capture is None:
+         super().logClose()
+         return
+      self.capture.close()
+      if self.capture.error is not None:
+         reply=QtWidgets.QMessageBox.critical(self,'Error',"Cannot write capture file: "+self.capture.error,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+      self.capture= None
+#
+#  pass raw frames and the number of frames dropped before them to the
+#  log writer thread. If the writer thread could not write the capture file,
+#  logging is disabled
+#
+   def logFrames(self,frames,timestamps,dropped):
+      if self.capture is None:
+         return
+      if self.capture.error is not None:
+         self.window().emit_message("Cannot write capture file "+self.name+SCOPE_CAPTURE_EXTENSION+": "+self.capture.error+". Logging disabled")
+         self.capture.close(False)
+         self.capture= None
+         return
+      self.capture.write(frames,timestamps,dropped)
+#
+# Scope trigger dialog class --------------------------------------------------
+#
+# Changelog
+# 19.10.2026
+# - initial version
+#
+class cls_ScopeTriggerDialog(QtWidgets.QDialog):
+
+   def __init__(self,filterspec,triggerspec,pre,post):
+      super().__init__()
+      self.setWindowTitle("Scope trigger")
+      self.vlayout = QtWidgets.QVBoxLayout()
+      self.setLayout(self.vlayout)
+      self.glayout = QtWidgets.QGridLayout()
+      self.vlayout.addLayout(self.glayout)
+
+      self.glayout.addWidget(QtWidgets.QLabel("Filter:"),0,0)
+      self.edtfilter=QtWidgets.QLineEdit()
+      self.edtfilter.setText(filterspec)
+      self.edtfilter.setMinimumWidth(300)
+      self.glayout.addWidget(self.edtfilter,0,1)
+      self.glayout.addWidget(QtWidgets.QLabel("Trigger:"),1,0)
+      self.edttrigger=QtWidgets.QLineEdit()
+      self.edttrigger.setText(triggerspec)
+      self.glayout.addWidget(self.edttrigger,1,1)
+      self.glayout.addWidget(QtWidgets.QLabel("Pre-trigger frames:"),2,0)
+      self.spinpre=QtWidgets.QSpinBox()
+      self.spinpre.setMinimum(0)
+      self.spinpre.setMaximum(SCOPE_MAX_DEPTH)
+      self.spinpre.setValue(pre)
+      self.glayout.addWidget(self.spinpre,2,1)
+      self.glayout.addWidget(QtWidgets.QLabel("Post-trigger frames:"),3,0)
+      self.spinpost=QtWidgets.QSpinBox()
+      self.spinpost.setMinimum(0)
+      self.spinpost.setMaximum(SCOPE_MAX_DEPTH)
+      self.spinpost.setValue(post)
+      self.glayout.addWidget(self.spinpost,3,1)
+
+      self.buttonBox = QtWidgets.QDialogButtonBox()
+      self.buttonBox.setStandardButtons(QtWidgets.QDialogButtonBox.Cancel|QtWidgets.QDialogButtonBox.Ok)
+      self.buttonBox.setCenterButtons(True)
+      self.buttonBox.accepted.connect(self.do_ok)
+      self.buttonBox.rejected.connect(self.do_cancel)
+      self.hlayout = QtWidgets.QHBoxLayout()
+      self.hlayout.addWidget(self.buttonBox)
+      self.vlayout.addLayout(self.hlayout)
+#
+#  check filter and trigger before we accept
+#
+   def do_ok(self):
+      try:
+         get_scope_filter(self.edtfilter.text())
+         get_scope_trigger(self.edttrigger.text())
+      except ScopeTriggerError as e:
+         QtWidgets.QMessageBox.critical(self,'Error',e.msg+': '+e.add_msg,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+         return
+      super().accept()
+
+   def do_cancel(self):
+      super().reject()
+
+   @staticmethod
+   def getTrigger(filterspec,triggerspec,pre,post):
+      dialog= cls_ScopeTriggerDialog(filterspec,triggerspec,pre,post)
+      result= dialog.exec()
+      if result== QtWidgets.QDialog.Accepted:
+         return [dialog.edtfilter.text().strip(), dialog.edttrigger.text().strip(), dialog.spinpre.value(), dialog.spinpost.value()]
+      else:
+         return None
 #
 # HP-IL scope class -----------------------------------------------------------
 #
@@ -244,65 +508,26 @@ class cls_tabscope(cls_tabtermgeneric):
 # - new implementation with single table
 # 21.12.2024 jsi:
 # - all queues, locks and shared variables are now part of the pildevbase class
+# 19.10.2026
+# - frames are decoded by a lookup in a precomputed table of all frames
+#   for the display mode
+# - write raw frames to the ring buffer of the scope tab, decoding is done
+#   by the tab
 
 class cls_pilscope(cls_pildevbase):
 
    CONF_SHOW_IDY=1
-   CONF_DISPLAYMODE=2
 
-   def __init__ (self, inbound,parent):
+   def __init__ (self, inbound,parent,ring):
       super().__init__()
       self.__inbound__= inbound
-
-      # opcode, mask, mnemonic
-      self.__mnemo__= [[0x000, 0x700, "DAB"],
-                       [0x100, 0x700, "DSR"],
-                       [0x200, 0x700, "END"],
-                       [0x300, 0x700, "ESR"],
-                       [0x400, 0x7FF, "NUL"],
-                       [0x401, 0x7FF, "GTL"],
-                       [0x404, 0x7FF, "SDC"],
-                       [0x405, 0x7FF, "PPD"],
-                       [0x408, 0x7FF, "GET"],
-                       [0x40F, 0x7FF, "ELN"],
-                       [0x410, 0x7FF, "NOP"],
-                       [0x411, 0x7FF, "LLO"],
-                       [0x414, 0x7FF, "DCL"],
-                       [0x415, 0x7FF, "PPU"],
-                       [0x418, 0x7FF, "EAR"],
-                       [0x43F, 0x7FF, "UNL"],
-                       [0x420, 0x7E0, "LAD"],
-                       [0x45F, 0x7FF, "UNT"],
-                       [0x440, 0x7E0, "TAD"],
-                       [0x460, 0x7E0, "SAD"],
-                       [0x480, 0x7F0, "PPE"],
-                       [0x490, 0x7FF, "IFC"],
-                       [0x492, 0x7FF, "REN"],
-                       [0x493, 0x7FF, "NRE"],
-                       [0x49A, 0x7FF, "AAU"],
-                       [0x49B, 0x7FF, "LPD"],
-                       [0x4A0, 0x7E0, "DDL"],
-                       [0x4C0, 0x7E0, "DDT"],
-                       [0x400, 0x700, "CMD"],
-                       [0x500, 0x7FF, "RFC"],
-                       [0x540, 0x7FF, "ETO"],
-                       [0x541, 0x7FF, "ETE"],
-                       [0x542, 0x7FF, "NRD"],
-                       [0x560, 0x7FF, "SDA"],
-                       [0x561, 0x7FF, "SST"],
-                       [0x562, 0x7FF, "SDI"],
-                       [0x563, 0x7FF, "SAI"],
-                       [0x564, 0x7FF, "TCT"],
-                       [0x580, 0x7E0, "AAD"],
-                       [0x5A0, 0x7E0, "AEP"],
-                       [0x5C0, 0x7E0, "AES"],
-                       [0x5E0, 0x7E0, "AMP"],
-                       [0x500, 0x700, "RDY"],
-                       [0x600, 0x700, "IDY"],
-                       [0x700, 0x700, "ISR"]]
+      if inbound:
+         self.__direction__= 0
+      else:
+         self.__direction__= SCOPE_OUTBOUND
+      self.__ring__= ring
 
       self.__show_idy__=False
-      self.__displayMode__=DISPLAY_MNEMONIC
       self.__parent__= parent
 #
 # public -------
@@ -311,9 +536,6 @@ class cls_pilscope(cls_pildevbase):
    def set_show_idy(self,flag):
       self.putDeviceQueueItem([cls_pilscope.CONF_SHOW_IDY,flag])
 
-   def set_displayMode(self,flag):
-      self.putDeviceQueueItem([cls_pilscope.CONF_DISPLAYMODE,flag])
-
 #
 #  public (overloaded) -------
 #
@@ -323,10 +545,8 @@ class cls_pilscope(cls_pildevbase):
       for i in items:
          if i[0]== cls_pilscope.CONF_SHOW_IDY:
             self.__show_idy__= i[1]
-         if i[0]== cls_pilscope.CONF_DISPLAYMODE:
-            self.__displayMode__= i[1]
 #
-#  convert frame to readable text and call the parent method out_scope
+#  write the raw frame to the ring buffer
 #
    def process (self,frame):
       if not self.getactive():
@@ -342,32 +562,7 @@ class cls_pilscope(cls_pildevbase):
       if ((frame & 0x700) == 0x600) and not self.__show_idy__:
          return(frame)
 
-#
-#     single table solution
-#
-      for i in self.__mnemo__:
-         if (frame & i[1]) == i[0]:
-            # mnemonic
-            s = i[2]
-            # has argument
-            arg = (~i[1]) & 0xFF
-            if arg != 0:
-               # add argument
-               s += " {:02X}".format(frame & arg)
-            break
-
-#
-#     inbound frames are lowercase, outbound frames are uppercase
-#
-      if self.__displayMode__== DISPLAY_MNEMONIC:
-         s="{:6s}  ".format(s)
-      elif self.__displayMode__ == DISPLAY_HEX:
-         s="{:03X}  ".format(frame)
-      elif self.__displayMode__== DISPLAY_BOTH:
-         s="{:6s} ({:03X}) ".format(s,frame)
-      if not self.__inbound__:
-         s= s.lower()
-      self.putGuiQueueItem(s)
+      self.__ring__.put((frame & 0x7FF) | self.__direction__)
       return (frame)
 
 def pilscope_spec():
@@ -53,6 +53,9 @@ from .pilcore import cls_Tab_Spec, PILGLOBALS
 # - all queues, locks and shared variables are now part of the pildevbase class
 # 21.03.2026 jsi
 # - pluggable interfaces and tabs
+# 19.10.2026
+# - use getItem of the output queue
+# - output gui queue items to the terminal as one chunk
 
 class cls_tabterminal(cls_tabtermgeneric):
 
@@ -119,8 +122,7 @@ class cls_tabterminal(cls_tabtermgeneric):
 #  output guiqueue content to terminal
 #
    def out_device(self,items):
-      for i in items:
-         self.guiobject.HPTerminal.process(i)
+      self.guiobject.HPTerminal.process_bytes(items)
 #
 # HP-IL virtual terminal object class ---------------------------------------
 #
@@ -208,7 +210,7 @@ class cls_pilterminal(cls_pildevbase):
       if self.__outqueue__.empty():
          frame= 0x540 # EOT
       else:
-         frame= self.__outqueue__.get_nowait()
+         frame= self.__outqueue__.getItem()
          if self.__outqueue__.empty():
             self.__status__= self.__status__ & 0xEF # clear ready for data bit
       self.__status_lock__.release()
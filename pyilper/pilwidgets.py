@@ -235,8 +235,16 @@
 # 25.04.2026 jsi
 # - simplified paramters of loadDocument in cls_HelpWindow
 # - fix in style change code
+# 19.10.2026
+# - added search LIF image files utility menu entry
+# - add_logging can use a subclass of LogCheckboxWidget
+# - log files are written by the background log writer thread, log rotation
+#   option added
+# - cls_UpdateTimer: the queues of the device tabs are processed if the device
+#   signals new data instead of polling
 #
 import datetime
+import time
 import re
 import sys
 import functools
@@ -259,6 +267,7 @@ from .pilcore import *
 from .pilqterm import QScrolledTerminalWidget
 from .pilcharconv import CHARSET_HP71, charsets
 from .pilconfig import PILCONFIG
+from .pillogwriter import cls_LogFile, log_rotation
 
 from .pilthreads import cls_ConfigInterfaceGeneric
 #
@@ -574,6 +583,11 @@ class cls_Tabs(QtWidgets.QTabWidget):
 #
 # Logging check box class --------------------------------------------------
 #
+#
+# The lines are queued to the background log writer thread. Write errors are
+# shown in the status bar, a modal message box would block the output of the
+# device.
+#
 class LogCheckboxWidget(QtWidgets.QCheckBox):
    def __init__(self,name):
       super().__init__("Log "+name)
@@ -581,68 +595,71 @@ class LogCheckboxWidget(QtWidgets.QCheckBox):
       self.filename=self.name+".log"
       self.log= None
       self.buffer_log=PILCONFIG.get(self.name,"buffer_log",True)
+      self.rotation=PILCONFIG.get(self.name,"log_rotation",0)
 #
 #   configure log buffering
 #
    def set_buffering(self,buffer_log):
       self.buffer_log= buffer_log
+      if self.log is not None:
+         self.log.buffered= buffer_log
+#
+#   configure log rotation
+#
+   def set_rotation(self,rotation):
+      self.rotation= rotation
+      if self.log is not None:
+         self.log.setRotation(rotation)
 #
 #   open log file, output BOM only on Windows at the beginning of the file
 #   return true if open and write header succeeded, false otherwise
 #
    def logOpen(self):
+      if PILGLOBALS.isWindows and PILCONFIG.get("pyilper","usebom"):
+         self.log=cls_LogFile(self.filename,"UTF-8-SIG",self.rotation)
+      else:
+         self.log=cls_LogFile(self.filename,"UTF-8",self.rotation)
+      self.log.buffered= self.buffer_log
       try:
-         if PILGLOBALS.isWindows and PILCONFIG.get("pyilper","usebom"):
-            self.log=open(self.filename,"a",encoding="UTF-8-SIG")
-         else:
-            self.log=open(self.filename,"a",encoding="UTF-8")
-         self.log.write("\nBegin log "+self.filename+" at ")
-         self.log.write(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-         self.log.write("\n")
-         return True
+         self.log.open()
       except OSError as e:
+         self.log= None
          reply=QtWidgets.QMessageBox.critical(self,'Error',"Cannot open log file "+self.filename+": "+ e.strerror,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
          return False
+      self.log.write("\nBegin log "+self.filename+" at "+datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")+"\n")
+      return True
 
    def logClose(self):
       if self.log is None:
          return
-      try:
-         self.log.write("\nEnd log "+self.filename+" at ")
-         self.log.write(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-         self.log.write("\n")
-         self.log.close()
-         self.log= None
-      except OSError as e:
-         reply=QtWidgets.QMessageBox.critical(self,'Error',"Cannot close log file: "+ e.strerror,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+      self.log.write("\nEnd log "+self.filename+" at "+datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")+"\n")
+      self.log.close()
+      if self.log.error is not None:
+         reply=QtWidgets.QMessageBox.critical(self,'Error',"Cannot close log file: "+ self.log.error,QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
+      self.log= None
 
    def logWrite(self,line):
       if self.log is None:
          return
-      try:
-         self.log.write(line)
-      except OSError as e:
-         reply=QtWidgets.QMessageBox.critical(self,'Error',"Cannot write to log file: "+ e.strerror+". Logging disabled",QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
-         try:
-            self.log.close()
-         except OSError:
-            pass
-         self.log = None
+      if self.log.error is not None:
+         self.logError()
+         return
+      self.log.write(line)
 
    def logFlush(self):
       if self.log is None:
          return
       if self.buffer_log:
          return
-      try:
-         self.log.flush()
-      except OSError as e:
-         reply=QtWidgets.QMessageBox.critical(self,'Error',"Cannot flush to log file: "+ e.strerror+". Logging disabled",QtWidgets.QMessageBox.Ok,QtWidgets.QMessageBox.Ok)
-         try:
-            self.log.close()
-         except OSError:
-            pass
-         self.log = None
+      self.log.flush()
+#
+#   the log writer thread could not write the log file, disable logging.
+#   The log file is removed from the writer thread without waiting
+#
+   def logError(self):
+      self.window().emit_message("Cannot write to log file "+self.filename+": "+ self.log.error+". Logging disabled")
+      self.log.close(False)
+      self.log= None
 #
 # abstract generic tab class -------------------------------------------------
 #
@@ -712,8 +729,10 @@ class cls_tabgeneric(QtWidgets.QWidget):
 #
 #  insert the cbLogging widget in hbox2 after the cbActive Widget
 #
-   def add_logging(self):
-      self.cbLogging= LogCheckboxWidget(self.name)
+   def add_logging(self,logwidget=None):
+      if logwidget is None:
+         logwidget= LogCheckboxWidget(self.name)
+      self.cbLogging= logwidget
       self.hbox2.insertWidget(1,self.cbLogging)
       self.logging= PILCONFIG.get(self.name,"logging",False)
       self.cbLogging.setChecked(self.logging)
@@ -725,6 +744,7 @@ class cls_tabgeneric(QtWidgets.QWidget):
 #
       if self.cBut is not None:
          self.cBut.add_option("Log buffering","buffer_log",T_BOOLEAN,[True,False])
+         self.cBut.add_option("Log rotation","log_rotation",T_STRING,log_rotation)
 #
 #  insert a status widget
 #
@@ -738,6 +758,8 @@ class cls_tabgeneric(QtWidgets.QWidget):
      param= self.cBut.get_changed_option_name()
      if param== "buffer_log":
          self.cbLogging.set_buffering(PILCONFIG.get(self.name,"buffer_log"))
+     elif param== "log_rotation":
+         self.cbLogging.set_rotation(PILCONFIG.get(self.name,"log_rotation"))
 #
 #  reconfigure, nothing to do here
 #
@@ -790,6 +812,57 @@ class cls_tabgeneric(QtWidgets.QWidget):
       PILCONFIG.put(self.name,"logging",self.logging)
       self.cbLogging.setEnabled(True)
 #
+# update timer class ---------------------------------------------------------
+#
+# Runs the process_queue method of a device tab if the device has new data.
+# The device thread calls wakeup once after the tab drained its queue, this
+# emits a signal which is delivered in the GUI thread. All wakeups until the
+# method runs are coalesced, the method runs at most every
+# PILGLOBALS.Update_Timer ms. schedule requests a run from the GUI thread.
+# An idle tab does not use a timer at all.
+#
+class cls_UpdateTimer(QtCore.QObject):
+
+   if PILGLOBALS.QT_Bindings=="PySide6":
+      wakeup_signal= QtCore.Signal()
+   if PILGLOBALS.QT_Bindings=="PyQt5":
+      wakeup_signal= QtCore.pyqtSignal()
+
+   def __init__(self,func):
+      super().__init__()
+      self.func= func
+      self.enabled= False
+      self.last= 0.0
+      self.timer= QtCore.QTimer()
+      self.timer.setSingleShot(True)
+      self.timer.timeout.connect(self.do_timeout)
+      self.wakeup_signal.connect(self.schedule)
+#
+#  called by the device thread
+#
+   def wakeup(self):
+      self.wakeup_signal.emit()
+#
+#  start: process what was queued while the tab was disabled
+#
+   def start(self):
+      self.enabled= True
+      self.schedule()
+
+   def stop(self):
+      self.enabled= False
+      self.timer.stop()
+
+   def schedule(self):
+      if not self.enabled or self.timer.isActive():
+         return
+      elapsed= (time.monotonic()- self.last)* 1000
+      self.timer.start(max(0,round(PILGLOBALS.Update_Timer- elapsed)))
+
+   def do_timeout(self):
+      self.last= time.monotonic()
+      self.func()
+#
 # generic terminal tab widget ------------------------------------------------
 #
 class cls_tabtermgeneric(cls_tabgeneric):
@@ -830,9 +903,7 @@ class cls_tabtermgeneric(cls_tabgeneric):
 #
 #     initialize refresh timer
 #
-      self.UpdateTimer= QtCore.QTimer()
-      self.UpdateTimer.setSingleShot(True)
-      self.UpdateTimer.timeout.connect(self.process_queue)
+      self.UpdateTimer= cls_UpdateTimer(self.process_queue)
 
 #
 #  handle changes of tab configuration
@@ -870,7 +941,8 @@ class cls_tabtermgeneric(cls_tabgeneric):
    def enable(self):
       super().enable()
       self.guiobject.enable()
-      self.UpdateTimer.start(PILGLOBALS.Update_Timer)
+      self.pildevice.setGuiQueueWakeup(self.UpdateTimer.wakeup)
+      self.UpdateTimer.start()
 
    def disable(self):
       self.UpdateTimer.stop()
@@ -896,7 +968,6 @@ class cls_tabtermgeneric(cls_tabgeneric):
       if len(items):
          self.out_device(items)
       self.guiobject.HPTerminal.refresh()
-      self.UpdateTimer.start(PILGLOBALS.Update_Timer)
       return
 
 #
@@ -1767,6 +1838,7 @@ class cls_ui(QtWidgets.QMainWindow):
 
       self.actionInit=self.menuUtil.addAction("Initialize LIF image file")
       self.actionFix=self.menuUtil.addAction("Fix Header of LIF image file")
+      self.actionSearch=self.menuUtil.addAction("Search LIF image files")
       self.actionDevStatus=self.menuUtil.addAction("Virtual HP-IL device status")
       self.actionCopyPilimage=self.menuUtil.addAction("Copy PILIMAGE.DAT to workdir")
       self.actionInstallCheck=self.menuUtil.addAction("Check LIFUTILS installation")
@@ -214,6 +214,8 @@
 # - remove Python version check (now in pilglobals.py)
 # 25.04.2026 jsi
 # - call system default browser in show_Help method, if no bindings for QtWebkit or QtWebengine exist
+# 19.10.2026
+# - added search LIF image files utility
 #
 import os
 import sys
@@ -238,7 +240,7 @@ from .pilwidgets import cls_ui, cls_AboutWindow, cls_HelpWindow, HelpError, cls_
 from .pilconfig import  PilConfigError, PILCONFIG, cls_pilconfig
 from .penconfig import  PenConfigError, PENCONFIG, cls_PenConfigWindow
 from .shortcutconfig import  ShortcutConfigError, SHORTCUTCONFIG, cls_ShortcutConfigWindow
-from .lifexec import cls_lifinit, cls_liffix, cls_installcheck, check_lifutils
+from .lifexec import cls_lifinit, cls_liffix, cls_lifsearch, cls_installcheck, check_lifutils
 
 from .pilthreads import PilThreadError
 
@@ -326,6 +328,7 @@ class cls_pyilper(QtCore.QObject):
       self.ui.actionExit.triggered.connect(self.do_Exit)
       self.ui.actionInit.triggered.connect(self.do_Init)
       self.ui.actionFix.triggered.connect(self.do_Fix)
+      self.ui.actionSearch.triggered.connect(self.do_Search)
       self.ui.actionCopyPilimage.triggered.connect(self.do_CopyPilimage)
       self.ui.actionInstallCheck.triggered.connect(self.do_InstallCheck)
       self.ui.actionAbout.triggered.connect(self.do_About)
@@ -809,6 +812,12 @@ class cls_pyilper(QtCore.QObject):
       workdir=  PILCONFIG.get(self.name,"workdir")
       cls_liffix.execute(workdir)
 #
+#  callback search LIF image files
+#
+   def do_Search(self):
+      workdir=  PILCONFIG.get(self.name,"workdir")
+      cls_lifsearch.execute(workdir)
+#
 #  callback check LIFUTILS installation
 #
    def do_InstallCheck(self):
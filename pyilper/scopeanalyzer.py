@@ -0,0 +1,242 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# HP-IL trace analyzer
+# (c) 2026 Joachim Siebold
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# HP-IL trace analyzer --------------------------------------------------------
+#
+# Changelog
+# 19.10.2026
+# - initial version
+# - frames dropped by the scope are reported, transactions across a gap are
+#   not counted
+#
+# Analyzes the frames of a scope capture file. The frames are classified with
+# the mnemonic table of the scope (SCOPE_MNEMONICS) by array operations over
+# all frames, there is no loop over frames. Requires NumPy.
+#
+# If the capture contains inbound frames only the inbound frames are
+# analyzed, otherwise the outbound frames. Both directions contain the same
+# loop traffic.
+#
+# Report:
+#
+# mnemonics:  number of frames of each mnemonic
+# devices:    for each talker address the number of transactions, the data
+#             bytes sent, mean and maximum transaction time and the number
+#             of transactions ended with ETE or NRD. A transaction starts
+#             with SDA, SST, SDI or SAI and ends with ETO, ETE or NRD.
+# pairs:      data bytes (DAB, DSR, END, ESR) per talker and listener address,
+#             the listener is the last addressed listener
+# srq:        number and frequency of frames with service request (DSR, ESR,
+#             ISR)
+# errors:     number of ETE and NRD frames
+# throughput: frames, data bytes and dropped frames in each time interval
+# dropped:    number of frames dropped by the scope and number of gaps. The
+#             timing of a transaction across a gap is unknown, these
+#             transactions are not counted
+#
+# Used by the command line: python -m pyilper --capture FILE --analyze
+#
+import csv
+try:
+   import numpy
+except ImportError:
+   numpy= None
+from .scopecore import *
+from .scopecapture import ScopeCaptureError
+
+TRANSACTION_START= ["SDA","SST","SDI","SAI"]
+TRANSACTION_END= ["ETO","ETE","NRD"]
+SRQ_FRAMES= ["DSR","ESR","ISR"]
+#
+# index of SCOPE_MNEMONICS of all 2048 frames
+#
+def getMnemonicTable():
+   return numpy.array([SCOPE_MNEMONICS.index(get_scope_mnemonic(frame)) for frame in range(0x800)],dtype=numpy.uint8)
+
+def getMnemonicIndex(name):
+   for i in range(len(SCOPE_MNEMONICS)):
+      if SCOPE_MNEMONICS[i][2]== name:
+         return i
+#
+# frames of a capture file as NumPy arrays: frames (uint16), times (float64,
+# seconds since the epoch) and gaps [position of the first frame after the
+# gap, number of dropped frames] (int64)
+#
+def loadCapture(reader):
+   if numpy is None:
+      raise ScopeCaptureError("Cannot analyze capture file","the numpy module is not installed")
+   frames=[]
+   times=[]
+   gaps=[]
+   position= 0
+   for n in range(reader.getBlockCount()):
+      f, base, t= reader.getRawBlock(n)
+      if reader.getBlockDropped(n) > 0:
+         gaps.append([position, reader.getBlockDropped(n)])
+      position+= len(f)
+      frames.append(numpy.frombuffer(f,dtype=numpy.uint16))
+      times.append(base+ numpy.frombuffer(t,dtype=numpy.uint32)/ 1000000.0)
+   gaps= numpy.array(gaps,dtype=numpy.int64).reshape(-1,2)
+   if frames==[]:
+      return [numpy.zeros(0,dtype=numpy.uint16), numpy.zeros(0), gaps]
+   return [numpy.concatenate(frames), numpy.concatenate(times), gaps]
+#
+# for each frame the value of the last frame that matches mask, -1 if there is
+# none
+#
+def lastValue(mask,values):
+   pos= numpy.where(mask,numpy.arange(len(mask)),-1)
+   numpy.maximum.accumulate(pos,out=pos)
+   return numpy.where(pos >= 0,values[numpy.maximum(pos,0)],-1)
+#
+# analyze frames, times and gaps (see loadCapture), returns the report as
+# dict
+#
+def analyzeFrames(frames,times,interval=1.0,gaps=None):
+   if gaps is None:
+      gaps= numpy.zeros((0,2),dtype=numpy.int64)
+#
+#  segment number of every frame, the segment changes at every gap
+#
+   segment= numpy.zeros(len(frames),dtype=numpy.int64)
+   segment[gaps[:,0]]= 1
+   segment= numpy.cumsum(segment)
+   gaptimes= times[gaps[:,0]]
+   outbound= (frames & SCOPE_OUTBOUND) != 0
+   if numpy.any(~outbound):
+      direction= "inbound"
+      select= ~outbound
+   else:
+      direction= "outbound"
+      select= outbound
+   frames= (frames[select] & 0x7FF).astype(numpy.int32)
+   times= times[select]
+   segment= segment[select]
+   report= {"frames": int(len(frames)), "direction": direction, "start": 0.0, "duration": 0.0, "mnemonics": { }, "devices": [], "pairs": [], "srq": {"frames": 0, "per_second": 0.0}, "errors": {"ETE": 0, "NRD": 0}, "throughput": [], "dropped": {"frames": int(gaps[:,1].sum()), "gaps": int(len(gaps))}}
+   if len(frames)== 0:
+      return report
+   start= times.min()
+   report["start"]= float(start)
+   duration= float(times.max()- start)
+   report["duration"]= duration
+#
+#  classify
+#
+   m= getMnemonicTable()[frames]
+   counts= numpy.bincount(m,minlength=len(SCOPE_MNEMONICS))
+   for i in numpy.flatnonzero(counts):
+      report["mnemonics"][SCOPE_MNEMONICS[i][2]]= int(counts[i])
+   def isMnemonic(names):
+      return numpy.isin(m,[getMnemonicIndex(name) for name in names])
+   data= (frames & 0x400)== 0
+   address= frames & 0x1F
+#
+#  addressed talker and listener for every frame
+#
+   is_tad= isMnemonic(["TAD"])
+   talker= lastValue(is_tad | isMnemonic(["UNT"]),numpy.where(is_tad,address,-1))
+   is_lad= isMnemonic(["LAD"])
+   listener= lastValue(is_lad | isMnemonic(["UNL"]),numpy.where(is_lad,address,-1))
+#
+#  data bytes per talker and listener
+#
+   key= (talker[data]+ 1)* 33+ listener[data]+ 1
+   keys, nbytes= numpy.unique(key,return_counts=True)
+   for k, n in zip(keys,nbytes):
+      report["pairs"].append({"talker": int(k// 33- 1), "listener": int(k % 33- 1), "bytes": int(n)})
+#
+#  transactions: the end is the next end frame after the start, transactions
+#  across a gap are skipped
+#
+   starts= numpy.flatnonzero(isMnemonic(TRANSACTION_START))
+   ends= numpy.flatnonzero(isMnemonic(TRANSACTION_END))
+   j= numpy.searchsorted(ends,starts)
+   starts= starts[j < len(ends)]
+   ends= ends[j[j < len(ends)]]
+   complete= segment[starts]== segment[ends]
+   starts= starts[complete]
+   ends= ends[complete]
+   if len(starts) > 0:
+      cdata= numpy.cumsum(data)
+      tbytes= cdata[ends]- cdata[starts]
+      ttime= times[ends]- times[starts]
+      terror= m[ends] != getMnemonicIndex("ETO")
+      ttalker= talker[starts]
+      devices, inverse= numpy.unique(ttalker,return_inverse=True)
+      ncount= numpy.bincount(inverse)
+      nbytes= numpy.bincount(inverse,weights=tbytes)
+      ntime= numpy.bincount(inverse,weights=ttime)
+      nerror= numpy.bincount(inverse,weights=terror)
+      maxtime= numpy.zeros(len(devices))
+      numpy.maximum.at(maxtime,inverse,ttime)
+      for i in range(len(devices)):
+         report["devices"].append({"talker": int(devices[i]), "transactions": int(ncount[i]), "bytes": int(nbytes[i]), "mean_time": float(ntime[i]/ ncount[i]), "max_time": float(maxtime[i]), "errors": int(nerror[i])})
+#
+#  service requests and errors
+#
+   nsrq= int(numpy.count_nonzero(isMnemonic(SRQ_FRAMES)))
+   report["srq"]["frames"]= nsrq
+   if duration > 0:
+      report["srq"]["per_second"]= nsrq/ duration
+   report["errors"]["ETE"]= int(numpy.count_nonzero(isMnemonic(["ETE"])))
+   report["errors"]["NRD"]= int(numpy.count_nonzero(isMnemonic(["NRD"])))
+#
+#  throughput
+#
+   bins= ((times- start)// interval).astype(numpy.int64)
+   nframes= numpy.bincount(bins)
+   nbytes= numpy.bincount(bins,weights=data)
+   gapbins= numpy.clip((gaptimes- start)// interval,0,len(nframes)- 1).astype(numpy.int64)
+   ndropped= numpy.bincount(gapbins,weights=gaps[:,1],minlength=len(nframes))
+   for i in range(len(nframes)):
+      report["throughput"].append({"time": i* interval, "frames": int(nframes[i]), "bytes": int(nbytes[i]), "dropped": int(ndropped[i])})
+   return report
+#
+# analyze a capture file
+#
+def analyzeCapture(reader,interval=1.0):
+   if interval <= 0:
+      raise ScopeCaptureError("Invalid interval",str(interval))
+   frames, times, gaps= loadCapture(reader)
+   return analyzeFrames(frames,times,interval,gaps)
+#
+# write the report as CSV, one section for each table
+#
+def writeCsvReport(report,output):
+   writer= csv.writer(output,lineterminator="\n")
+   writer.writerow(["frames",report["frames"]])
+   writer.writerow(["direction",report["direction"]])
+   writer.writerow(["start",report["start"]])
+   writer.writerow(["duration",report["duration"]])
+   writer.writerow(["srq frames",report["srq"]["frames"]])
+   writer.writerow(["srq per second",report["srq"]["per_second"]])
+   writer.writerow(["ETE",report["errors"]["ETE"]])
+   writer.writerow(["NRD",report["errors"]["NRD"]])
+   writer.writerow(["dropped frames",report["dropped"]["frames"]])
+   writer.writerow(["gaps",report["dropped"]["gaps"]])
+   writer.writerow([])
+   writer.writerow(["mnemonic","frames"])
+   for name, n in report["mnemonics"].items():
+      writer.writerow([name,n])
+   for section, columns in [["devices",["talker","transactions","bytes","mean_time","max_time","errors"]],["pairs",["talker","listener","bytes"]],["throughput",["time","frames","bytes","dropped"]]]:
+      writer.writerow([])
+      writer.writerow(columns)
+      for row in report[section]:
+         writer.writerow([row[c] for c in columns])
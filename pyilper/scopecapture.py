@@ -0,0 +1,518 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# HP-IL scope capture files
+# (c) 2026 Joachim Siebold
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# HP-IL scope capture file classes ---------------------------------------------
+#
+# Changelog
+# 19.10.2026
+# - initial version
+# - the number of frames dropped by the scope ring buffer is stored in the
+#   block header, reported by getDroppedCount and marked in exportText
+# - added cls_ScopeCaptureLog, writes a capture file in the log writer thread
+#
+# A capture file stores the raw frames of the scope with their direction and
+# time. The file consists of a header, a sequence of blocks and an index of
+# the blocks at the end of the file:
+#
+# header:  magic "PILSCOPE", version, compression (none, zlib, zstd)
+# block:   "BLCK", number of frames, length of the data, time of the first
+#          frame (seconds since the epoch), number of frames dropped before
+#          the first frame followed by the (compressed) data: the frames
+#          (16 bit, SCOPE_OUTBOUND set for outbound frames) and the time of
+#          each frame in microseconds relative to the first frame (32 bit
+#          unsigned), all little endian
+# index:   offset, number of frames, time of the first and the last frame,
+#          number of dropped frames of each block
+#
+# If the scope ring buffer dropped frames, the frames before the gap are
+# written as a block and the number of dropped frames is stored in the
+# header of the next block. A gap is always between two blocks.
+# trailer: offset of the index, magic "PILINDEX"
+#
+# New captures are appended to an existing file: the index is removed and
+# written again if the capture is closed. If a file has no index because
+# pyILPER was terminated, the index is rebuilt from the block headers.
+#
+# The reader maps the file into memory and decodes only the blocks that are
+# needed. It can export a time range of a capture to the text format of the
+# scope log.
+#
+import os
+import sys
+import time
+import mmap
+import array
+import struct
+import bisect
+import datetime
+import threading
+import collections
+import zlib
+try:
+   import zstandard
+except ImportError:
+   zstandard= None
+from .scopecore import *
+from .pillogwriter import getLogWriter, LOG_OPEN, LOG_CLOSE, LOG_CLOSE_TIMEOUT
+
+SCOPE_CAPTURE_EXTENSION=".cap"
+SCOPE_CAPTURE_VERSION=1
+SCOPE_CAPTURE_BLOCK=65536     # maximum number of frames of a block
+SCOPE_CAPTURE_SPAN=5.0        # maximum time span of a block in seconds
+
+COMPRESS_NONE=0
+COMPRESS_ZLIB=1
+COMPRESS_ZSTD=2
+
+CAPTURE_HEADER= struct.Struct("<8sHH")
+CAPTURE_BLOCK= struct.Struct("<4sIIdI")
+CAPTURE_INDEX= struct.Struct("<QIddI")
+CAPTURE_TRAILER= struct.Struct("<Q8s")
+
+class ScopeCaptureError(Exception):
+   def __init__(self,msg,add_msg=None):
+      self.msg=msg
+      self.add_msg= add_msg
+#
+# best available compression
+#
+def getDefaultCompression():
+   if zstandard is not None:
+      return COMPRESS_ZSTD
+   return COMPRESS_ZLIB
+
+def compressBlock(data,compression):
+   if compression== COMPRESS_ZLIB:
+      return zlib.compress(data,1)
+   if compression== COMPRESS_ZSTD:
+      return zstandard.ZstdCompressor(level=3).compress(data)
+   return data
+
+def decompressBlock(data,compression):
+   if compression== COMPRESS_ZLIB:
+      return zlib.decompress(data)
+   if compression== COMPRESS_ZSTD:
+      return zstandard.ZstdDecompressor().decompress(data)
+   return data
+#
+# convert arrays to and from the little endian file format
+#
+def packArray(a):
+   if sys.byteorder== "big":
+      a= array.array(a.typecode,a)
+      a.byteswap()
+   return a.tobytes()
+
+def unpackArray(typecode,data):
+   a= array.array(typecode)
+   a.frombytes(data)
+   if sys.byteorder== "big":
+      a.byteswap()
+   return a
+#
+# Capture file reader class ----------------------------------------------------
+#
+class cls_ScopeCaptureReader:
+
+   def __init__(self,filename):
+      self.filename= filename
+      self.file= None
+      self.map= None
+      self.compression= COMPRESS_NONE
+      self.index=[]
+      self.starts=[]
+      self.end= 0
+      self.blockcache= None
+#
+#  open and map the capture file, read or rebuild the index
+#
+   def open(self):
+      try:
+         self.file= open(self.filename,"rb")
+         size= os.fstat(self.file.fileno()).st_size
+         if size < CAPTURE_HEADER.size:
+            raise ScopeCaptureError("No scope capture file",self.filename)
+         self.map= mmap.mmap(self.file.fileno(),0,access=mmap.ACCESS_READ)
+      except OSError as e:
+         self.close()
+         raise ScopeCaptureError("Cannot open capture file",e.strerror)
+      except ScopeCaptureError:
+         self.close()
+         raise
+      magic, version, self.compression= CAPTURE_HEADER.unpack_from(self.map,0)
+      if magic != b"PILSCOPE":
+         self.close()
+         raise ScopeCaptureError("No scope capture file",self.filename)
+      if version != SCOPE_CAPTURE_VERSION or self.compression > COMPRESS_ZSTD:
+         self.close()
+         raise ScopeCaptureError("Unsupported capture file version",self.filename)
+      if self.compression== COMPRESS_ZSTD and zstandard is None:
+         self.close()
+         raise ScopeCaptureError("Capture file is zstd compressed","the zstandard module is not installed")
+      if not self.__readindex__(size):
+         self.__scanblocks__(size)
+      self.starts= [i[2] for i in self.index]
+
+   def close(self):
+      if self.map is not None:
+         self.map.close()
+         self.map= None
+      if self.file is not None:
+         self.file.close()
+         self.file= None
+#
+#  read the index at the end of the file, returns False if there is no
+#  valid index
+#
+   def __readindex__(self,size):
+      if size < CAPTURE_HEADER.size+ CAPTURE_TRAILER.size:
+         return False
+      offset, magic= CAPTURE_TRAILER.unpack_from(self.map,size- CAPTURE_TRAILER.size)
+      if magic != b"PILINDEX" or offset < CAPTURE_HEADER.size:
+         return False
+      n, r= divmod(size- CAPTURE_TRAILER.size- offset,CAPTURE_INDEX.size)
+      if n < 0 or r != 0:
+         return False
+      self.index= [list(i) for i in CAPTURE_INDEX.iter_unpack(self.map[offset:size- CAPTURE_TRAILER.size])]
+      self.end= offset
+      return True
+#
+#  rebuild the index from the block headers, an incomplete block at the end
+#  of the file is ignored
+#
+   def __scanblocks__(self,size):
+      self.index=[]
+      offset= CAPTURE_HEADER.size
+      while offset+ CAPTURE_BLOCK.size <= size:
+         magic, frames, length, base, dropped= CAPTURE_BLOCK.unpack_from(self.map,offset)
+         if magic != b"BLCK" or offset+ CAPTURE_BLOCK.size+ length > size:
+            break
+         times= self.__decode__(offset)[1]
+         self.index.append([offset, frames, base, base+ times[-1]/ 1000000.0, dropped])
+         offset+= CAPTURE_BLOCK.size+ length
+      self.end= offset
+#
+#  decode a block, returns frames and relative times in microseconds
+#
+   def __decode__(self,offset):
+      magic, frames, length, base, dropped= CAPTURE_BLOCK.unpack_from(self.map,offset)
+      start= offset+ CAPTURE_BLOCK.size
+      try:
+         data= decompressBlock(self.map[start:start+ length],self.compression)
+      except Exception as e:
+         raise ScopeCaptureError("Corrupt capture block",str(e))
+      if len(data) != frames* 6:
+         raise ScopeCaptureError("Corrupt capture block","at offset "+str(offset))
+      return [unpackArray("H",data[:frames* 2]), unpackArray("I",data[frames* 2:])]
+
+   def getBlockCount(self):
+      return len(self.index)
+
+   def getFrameCount(self):
+      return sum(i[1] for i in self.index)
+#
+#  number of frames dropped by the scope and number of gaps
+#
+   def getDroppedCount(self):
+      return sum(i[4] for i in self.index)
+
+   def getGapCount(self):
+      return sum(1 for i in self.index if i[4] > 0)
+#
+#  number of frames dropped before block n
+#
+   def getBlockDropped(self,n):
+      return self.index[n][4]
+
+   def getStartTime(self):
+      if self.index==[]:
+         return None
+      return self.index[0][2]
+
+   def getEndTime(self):
+      if self.index==[]:
+         return None
+      return self.index[-1][3]
+#
+#  get block n undecoded, returns [frames, time of the first frame, times in
+#  microseconds relative to the first frame]
+#
+   def getRawBlock(self,n):
+      frames, times= self.__decode__(self.index[n][0])
+      return [frames, self.index[n][2], times]
+#
+#  get block n, returns [frames, times], times are seconds since the epoch.
+#  The last decoded block is kept.
+#
+   def getBlock(self,n):
+      if self.blockcache is not None and self.blockcache[0]== n:
+         return self.blockcache[1]
+      frames, base, times= self.getRawBlock(n)
+      result= [frames, [base+ t/ 1000000.0 for t in times]]
+      self.blockcache= [n, result]
+      return result
+#
+#  find the first frame at or after time t, returns [block, position]
+#
+   def findTime(self,t):
+      n= bisect.bisect_right(self.starts,t)- 1
+      if n < 0:
+         return [0, 0]
+      if self.index[n][3] < t:
+         return [n+ 1, 0]
+      frames, times= self.getBlock(n)
+      return [n, bisect.bisect_left(times,t)]
+#
+#  read the frames between the times start and end, filtered by a filter
+#  table (see get_scope_filter). Yields [frames, times, dropped] for each
+#  block, dropped is the number of frames dropped before the first frame of
+#  the block or 0 if the range starts within the block.
+#
+   def read(self,start=None,end=None,passtable=None):
+      if start is None:
+         n, pos= 0, 0
+      else:
+         n, pos= self.findTime(start)
+      while n < len(self.index):
+         if end is not None and self.index[n][2] > end:
+            return
+         frames, times= self.getBlock(n)
+         if pos== 0:
+            dropped= self.index[n][4]
+         else:
+            dropped= 0
+         stop= len(frames)
+         if end is not None and self.index[n][3] > end:
+            stop= bisect.bisect_right(times,end)
+         frames= frames[pos:stop]
+         times= times[pos:stop]
+         if passtable is not None:
+            selected= [i for i in range(len(frames)) if passtable[frames[i] & 0x7FF]]
+            frames= [frames[i] for i in selected]
+            times= [times[i] for i in selected]
+         yield [frames, times, dropped]
+         n+= 1
+         pos= 0
+#
+#  export the frames between the times start and end to the text format of
+#  the scope log. Dropped frames are marked as in the scope log
+#
+   def exportText(self,output,start=None,end=None,filterspec="",displayMode=DISPLAY_MNEMONIC,cols=80):
+      try:
+         passtable= get_scope_filter(filterspec)
+      except ScopeTriggerError as e:
+         raise ScopeCaptureError(e.msg,e.add_msg)
+      inbound= get_scope_table(displayMode,True)
+      outbound= get_scope_table(displayMode,False)
+      name= os.path.basename(self.filename)
+      first= None
+      last= None
+      charpos= 0
+      pending= 0
+      for frames, times, dropped in self.read(start,end,passtable):
+         pending+= dropped
+         if len(frames)== 0:
+            continue
+         if first is None:
+            first= times[0]
+            output.write("\nBegin log "+name+" at "+datetime.datetime.fromtimestamp(first).strftime("%Y-%m-%d %H:%M:%S")+"\n")
+         last= times[-1]
+         items= [outbound[f & 0x7FF] if f & SCOPE_OUTBOUND else inbound[f] for f in frames]
+         if pending > 0:
+            items.insert(0,"** {:d} frames dropped ** ".format(pending))
+            pending= 0
+         for s in items:
+            if charpos+ len(s) >= cols:
+               output.write("\n")
+               charpos= 0
+            output.write(s)
+            charpos+= len(s)
+      if first is not None:
+         output.write("\nEnd log "+name+" at "+datetime.datetime.fromtimestamp(last).strftime("%Y-%m-%d %H:%M:%S")+"\n")
+#
+# Capture file writer class ----------------------------------------------------
+#
+class cls_ScopeCaptureWriter:
+
+   def __init__(self,filename,compression=COMPRESS_ZLIB):
+      self.filename= filename
+      self.compression= compression
+      self.file= None
+      self.index=[]
+      self.frames= array.array("H")
+      self.times= array.array("d")
+      self.dropped= 0
+      self.clock= 0.0
+#
+#  open the capture file, append to an existing file
+#
+   def open(self):
+      try:
+         if os.path.isfile(self.filename) and os.path.getsize(self.filename) > 0:
+            reader= cls_ScopeCaptureReader(self.filename)
+            reader.open()
+            self.compression= reader.compression
+            self.index= reader.index
+            end= reader.end
+            reader.close()
+            self.file= open(self.filename,"r+b")
+            self.file.truncate(end)
+            self.file.seek(end)
+         else:
+            if self.compression== COMPRESS_ZSTD and zstandard is None:
+               self.compression= COMPRESS_ZLIB
+            self.file= open(self.filename,"wb")
+            self.file.write(CAPTURE_HEADER.pack(b"PILSCOPE",SCOPE_CAPTURE_VERSION,self.compression))
+      except OSError as e:
+         self.file= None
+         raise ScopeCaptureError("Cannot open capture file",e.strerror)
+#
+#     the timestamps of the scope ring buffer are values of time.monotonic()
+#
+      self.clock= time.time()- time.monotonic()
+#
+#  add frames with monotonic timestamps, full blocks are written. dropped is
+#  the number of frames dropped before frames, the frames before the gap
+#  are written as a block
+#
+   def write(self,frames,timestamps,dropped=0):
+      if dropped > 0:
+         if len(self.frames) > 0:
+            self.__flush__(len(self.frames))
+         self.dropped+= dropped
+      self.frames.extend(frames)
+      self.times.extend(timestamps)
+      while len(self.frames) > 0:
+         n= bisect.bisect_right(self.times,self.times[0]+ SCOPE_CAPTURE_SPAN)
+         if n < len(self.frames) or n >= SCOPE_CAPTURE_BLOCK:
+            self.__flush__(min(n,SCOPE_CAPTURE_BLOCK))
+         else:
+            break
+#
+#  write the first n frames as block
+#
+   def __flush__(self,n):
+      frames= self.frames[:n]
+      times= self.times[:n]
+      del self.frames[:n]
+      del self.times[:n]
+      base= times[0]
+      us= array.array("I",[round((t- base)* 1000000.0) for t in times])
+      data= compressBlock(packArray(frames)+ packArray(us),self.compression)
+      try:
+         offset= self.file.tell()
+         self.file.write(CAPTURE_BLOCK.pack(b"BLCK",n,len(data),base+ self.clock,self.dropped))
+         self.file.write(data)
+      except OSError as e:
+         raise ScopeCaptureError("Cannot write capture file",e.strerror)
+      self.index.append([offset, n, base+ self.clock, times[-1]+ self.clock, self.dropped])
+      self.dropped= 0
+#
+#  write the remaining frames and the index
+#
+   def close(self):
+      if self.file is None:
+         return
+      try:
+         if len(self.frames) > 0:
+            self.__flush__(len(self.frames))
+         offset= self.file.tell()
+         for i in self.index:
+            self.file.write(CAPTURE_INDEX.pack(*i))
+         self.file.write(CAPTURE_TRAILER.pack(offset,b"PILINDEX"))
+         self.file.close()
+      except OSError as e:
+         raise ScopeCaptureError("Cannot write capture file",e.strerror)
+      finally:
+         self.file= None
+#
+# Capture log class ------------------------------------------------------------
+#
+# Writes a capture file in the log writer thread (see pillogwriter.py), the
+# GUI only appends the frames to a deque. Compression and writing of the
+# blocks is done by the writer thread. Errors are not raised in the writer
+# thread, the capture file is closed and the error is stored in the error
+# attribute, the GUI checks it on the next write.
+#
+class cls_ScopeCaptureLog:
+
+   def __init__(self,filename,compression=COMPRESS_ZLIB):
+      self.capture= cls_ScopeCaptureWriter(filename,compression)
+      self.error= None
+      self.buffered= True
+      self.flushrequest= False
+      self.batches= collections.deque()
+      self.closed= threading.Event()
+#
+#  open the capture file, called by the GUI, raises ScopeCaptureError
+#
+   def open(self):
+      self.capture.open()
+      self.writer= getLogWriter()
+      self.writer.queue.put([self,LOG_OPEN])
+#
+#  called by the GUI: add frames or close the capture file. close waits
+#  until the writer thread has closed the file unless wait is False
+#
+   def write(self,frames,timestamps,dropped=0):
+      self.batches.append([frames,timestamps,dropped])
+
+   def close(self,wait=True):
+      self.writer.queue.put([self,LOG_CLOSE])
+      if wait:
+         self.closed.wait(LOG_CLOSE_TIMEOUT)
+#
+#  called by the writer thread
+#
+   def writeBatch(self):
+      n= len(self.batches)
+      for i in range(n):
+         frames, timestamps, dropped= self.batches.popleft()
+         if self.capture.file is None:
+            continue
+         try:
+            self.capture.write(frames,timestamps,dropped)
+         except ScopeCaptureError as e:
+            self.fail(e)
+
+   def flushFile(self):
+      if self.capture.file is None:
+         return
+      try:
+         self.capture.file.flush()
+      except OSError as e:
+         self.fail(ScopeCaptureError("Cannot write capture file",e.strerror))
+
+   def closeFile(self):
+      self.writeBatch()
+      try:
+         self.capture.close()
+      except ScopeCaptureError as e:
+         self.error= e.add_msg
+      self.closed.set()
+
+   def fail(self,e):
+      self.error= e.add_msg
+      try:
+         if self.capture.file is not None:
+            self.capture.file.close()
+      except OSError:
+         pass
+      self.capture.file= None
@@ -0,0 +1,387 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+# HP-IL scope core functions
+# (c) 2026 Joachim Siebold
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# HP-IL scope core functions ---------------------------------------------------
+#
+# Changelog
+# 19.10.2026
+# - initial version: frame decoding, ring buffer and trigger of the scope tab
+#
+# The module does not depend on Qt, it is used by the scope tab and by the
+# scope capture file viewer.
+#
+import time
+import array
+import re
+import collections
+
+DISPLAY_MNEMONIC=0
+DISPLAY_HEX=1
+DISPLAY_BOTH=2
+SCOPE_RING_SIZE=65536      # number of frames, must be a power of 2
+SCOPE_OUTBOUND=0x8000      # direction flag of a frame in the ring buffer
+SCOPE_MAX_DEPTH=10000      # maximum number of pre- and post-trigger frames
+
+# opcode, mask, mnemonic
+SCOPE_MNEMONICS= [[0x000, 0x700, "DAB"],
+                  [0x100, 0x700, "DSR"],
+                  [0x200, 0x700, "END"],
+                  [0x300, 0x700, "ESR"],
+                  [0x400, 0x7FF, "NUL"],
+                  [0x401, 0x7FF, "GTL"],
+                  [0x404, 0x7FF, "SDC"],
+                  [0x405, 0x7FF, "PPD"],
+                  [0x408, 0x7FF, "GET"],
+                  [0x40F, 0x7FF, "ELN"],
+                  [0x410, 0x7FF, "NOP"],
+                  [0x411, 0x7FF, "LLO"],
+                  [0x414, 0x7FF, "DCL"],
+                  [0x415, 0x7FF, "PPU"],
+                  [0x418, 0x7FF, "EAR"],
+                  [0x43F, 0x7FF, "UNL"],
+                  [0x420, 0x7E0, "LAD"],
+                  [0x45F, 0x7FF, "UNT"],
+                  [0x440, 0x7E0, "TAD"],
+                  [0x460, 0x7E0, "SAD"],
+                  [0x480, 0x7F0, "PPE"],
+                  [0x490, 0x7FF, "IFC"],
+                  [0x492, 0x7FF, "REN"],
+                  [0x493, 0x7FF, "NRE"],
+                  [0x49A, 0x7FF, "AAU"],
+                  [0x49B, 0x7FF, "LPD"],
+                  [0x4A0, 0x7E0, "DDL"],
+                  [0x4C0, 0x7E0, "DDT"],
+                  [0x400, 0x700, "CMD"],
+                  [0x500, 0x7FF, "RFC"],
+                  [0x540, 0x7FF, "ETO"],
+                  [0x541, 0x7FF, "ETE"],
+                  [0x542, 0x7FF, "NRD"],
+                  [0x560, 0x7FF, "SDA"],
+                  [0x561, 0x7FF, "SST"],
+                  [0x562, 0x7FF, "SDI"],
+                  [0x563, 0x7FF, "SAI"],
+                  [0x564, 0x7FF, "TCT"],
+                  [0x580, 0x7E0, "AAD"],
+                  [0x5A0, 0x7E0, "AEP"],
+                  [0x5C0, 0x7E0, "AES"],
+                  [0x5E0, 0x7E0, "AMP"],
+                  [0x500, 0x700, "RDY"],
+                  [0x600, 0x700, "IDY"],
+                  [0x700, 0x700, "ISR"]]
+# frame classes, mask 0x700
+SCOPE_CLASSES= {"DAB":0x000, "DSR":0x100, "END":0x200, "ESR":0x300,
+                "CMD":0x400, "RDY":0x500, "IDY":0x600, "ISR":0x700}
+#
+# get the entry of SCOPE_MNEMONICS for a frame
+#
+def get_scope_mnemonic(frame):
+   for i in SCOPE_MNEMONICS:
+      if (frame & i[1]) == i[0]:
+         return i
+#
+# decoded text of all 2048 frames for a display mode, inbound frames are
+# uppercase, outbound frames are lowercase. The tables are built on first use
+# and shared by all scopes.
+#
+scope_tables= { }
+
+def get_scope_table(displayMode,inbound):
+   table= scope_tables.get((displayMode,inbound))
+   if table is not None:
+      return table
+   table=[]
+   for frame in range(0x800):
+      i= get_scope_mnemonic(frame)
+      # mnemonic
+      s = i[2]
+      # has argument
+      arg = (~i[1]) & 0xFF
+      if arg != 0:
+         # add argument
+         s += " {:02X}".format(frame & arg)
+      if displayMode== DISPLAY_MNEMONIC:
+         s="{:6s}  ".format(s)
+      elif displayMode == DISPLAY_HEX:
+         s="{:03X}  ".format(frame)
+      elif displayMode== DISPLAY_BOTH:
+         s="{:6s} ({:03X}) ".format(s,frame)
+      if not inbound:
+         s= s.lower()
+      table.append(s)
+   scope_tables[(displayMode,inbound)]= table
+   return table
+#
+# Scope trigger and filter ----------------------------------------------------
+#
+# Filter and trigger conditions are compiled to tables of all 2048 frames,
+# a raw frame is checked with a single lookup before it is decoded.
+#
+# A condition is one of:
+#
+# MNEMONIC        frames with this mnemonic, e.g. TAD, SDA, GET
+# CLASS           frames of a frame class: DAB, DSR, END, ESR, CMD, RDY,
+#                 IDY, ISR
+# MNEMONIC nn     frames with this mnemonic and the hex argument nn, e.g.
+#                 TAD 01, LAD 1E
+# CLASS nn        frames of this class with the hex data byte nn, e.g. DAB 41
+# 0xnnn           the frame with the hex value nnn
+# *               all frames
+#
+# Filter: conditions separated by commas. A frame is shown if it matches one
+# of the conditions, conditions with a leading ! hide the matching frames.
+#
+# Trigger: conditions separated by THEN, e.g. TAD 01 THEN SDA. The trigger
+# fires if frames which match the conditions occur in this order, other
+# frames may be in between. The trigger checks all frames, the filter only
+# applies to the output.
+#
+# If the trigger fired, the last pre-trigger frames, a trigger mark, the
+# trigger frame and the next post-trigger frames are output. Then the
+# trigger is armed again. The pre-trigger frames are kept in a ring buffer.
+#
+class ScopeTriggerError(Exception):
+   def __init__(self,msg,add_msg=None):
+      self.msg=msg
+      self.add_msg= add_msg
+#
+# compile a condition to a table of all frames, 1 if the frame matches
+#
+def get_scope_condition(condition):
+   c= condition.strip().upper()
+   table= bytearray(0x800)
+   if c== "*":
+      return bytearray(b"\x01"* 0x800)
+   if c.startswith("0X"):
+      try:
+         frame= int(c[2:],16)
+      except ValueError:
+         raise ScopeTriggerError("Invalid frame value",condition)
+      if frame > 0x7FF:
+         raise ScopeTriggerError("Invalid frame value",condition)
+      table[frame]= 1
+      return table
+   words= c.split()
+   if len(words)== 0 or len(words) > 2:
+      raise ScopeTriggerError("Invalid condition",condition)
+   arg= None
+   if len(words)== 2:
+      try:
+         arg= int(words[1],16)
+      except ValueError:
+         raise ScopeTriggerError("Invalid argument",condition)
+#
+#  frame class
+#
+   if words[0] in SCOPE_CLASSES:
+      frameclass= SCOPE_CLASSES[words[0]]
+      if arg is None:
+         table[frameclass:frameclass+0x100]= b"\x01"* 0x100
+      elif arg > 0xFF:
+         raise ScopeTriggerError("Invalid argument",condition)
+      else:
+         table[frameclass | arg]= 1
+      return table
+#
+#  mnemonic, frames are matched the same way as they are displayed
+#
+   entries= [i for i in SCOPE_MNEMONICS if i[2]== words[0]]
+   if entries== []:
+      raise ScopeTriggerError("Unknown mnemonic",condition)
+   argmask= (~entries[0][1]) & 0xFF
+   if arg is not None and (argmask== 0 or (arg & ~argmask)):
+      raise ScopeTriggerError("Invalid argument",condition)
+   for frame in range(0x800):
+      if get_scope_mnemonic(frame)[2]== words[0]:
+         if arg is None or (frame & argmask)== arg:
+            table[frame]= 1
+   return table
+#
+# compile a filter, returns None for an empty filter
+#
+def get_scope_filter(filterspec):
+   if filterspec.strip()== "":
+      return None
+   show= None
+   hide= bytearray(0x800)
+   for condition in filterspec.split(","):
+      condition= condition.strip()
+      if condition.startswith("!"):
+         hide= bytearray(a | b for a, b in zip(hide,get_scope_condition(condition[1:])))
+      elif show is None:
+         show= get_scope_condition(condition)
+      else:
+         show= bytearray(a | b for a, b in zip(show,get_scope_condition(condition)))
+   if show is None:
+      show= bytearray(b"\x01"* 0x800)
+   return bytes(a & (b ^ 1) for a, b in zip(show,hide))
+#
+# compile a trigger, returns a list of condition tables or None for an
+# empty trigger
+#
+def get_scope_trigger(triggerspec):
+   if triggerspec.strip()== "":
+      return None
+   return [bytes(get_scope_condition(c)) for c in re.split(r"\bTHEN\b",triggerspec,flags=re.IGNORECASE)]
+
+class cls_scopetrigger:
+
+   def __init__(self):
+      self.passtable= None
+      self.sequence= None
+      self.pretrigger= collections.deque(maxlen=0)
+      self.posttrigger= 0
+      self.state= 0
+      self.remaining= 0
+      self.fired= 0
+#
+#  set filter, trigger and trigger depth, raises ScopeTriggerError
+#
+   def configure(self,filterspec,triggerspec,pre,post):
+      passtable= get_scope_filter(filterspec)
+      sequence= get_scope_trigger(triggerspec)
+      self.passtable= passtable
+      self.sequence= sequence
+      self.pretrigger= collections.deque(maxlen=pre)
+      self.posttrigger= post
+      self.state= 0
+      self.remaining= 0
+      self.fired= 0
+#
+#  process raw frames, returns the frames to output and the trigger marks
+#
+   def process(self,frames):
+      passtable= self.passtable
+      sequence= self.sequence
+      if sequence is None:
+         if passtable is None:
+            return frames
+         return [f for f in frames if passtable[f & 0x7FF]]
+      out=[]
+      pretrigger= self.pretrigger
+      state= self.state
+      remaining= self.remaining
+      for f in frames:
+         i= f & 0x7FF
+         show= passtable is None or passtable[i]
+#
+#        output post-trigger frames
+#
+         if remaining:
+            if show:
+               out.append(f)
+               remaining-= 1
+            continue
+         if sequence[state][i]:
+            state+= 1
+            if state== len(sequence):
+               self.fired+= 1
+               out.extend(pretrigger)
+               pretrigger.clear()
+               out.append("** trigger {:d} ** ".format(self.fired))
+               out.append(f)
+               state= 0
+               remaining= self.posttrigger
+               continue
+         if show:
+            pretrigger.append(f)
+      self.state= state
+      self.remaining= remaining
+      return out
+#
+# Scope ring buffer class -----------------------------------------------------
+#
+# Preallocated ring buffer of raw frames and their timestamps. The scopes
+# write in the thread of the communication loop, the GUI reads. Both indexes
+# count the frames ever written or read, they are only incremented by their
+# owner, so no lock is needed. The writer never waits: if the ring buffer is
+# full, the oldest frames are overwritten and counted as dropped by the
+# reader.
+#
+# A frame is stored as 16 bit value with SCOPE_OUTBOUND set for outbound
+# frames. The timestamp is the value of time.monotonic().
+#
+# setWakeup(func) registers a function which the writer calls once if it
+# writes a frame after the reader has read the ring buffer.
+#
+class cls_scopering:
+
+   def __init__(self,size):
+      self.size= size
+      self.mask= size- 1
+      self.frames= array.array("H",bytes(2* size))
+      self.timestamps= array.array("d",bytes(8* size))
+      self.head= 0
+      self.tail= 0
+      self.dropped= 0
+      self.wakeup= None
+      self.armed= False
+
+   def setWakeup(self,func):
+      self.wakeup= func
+      self.armed= func is not None
+#
+#  write a frame, called by the scopes
+#
+   def put(self,frame):
+      i= self.head & self.mask
+      self.frames[i]= frame
+      self.timestamps[i]= time.monotonic()
+      self.head+= 1
+      if self.armed:
+         self.armed= False
+         self.wakeup()
+#
+#  copy the entries from the index start to the index end out of an array
+#
+   def __slice__(self,a,start,end):
+      i= start & self.mask
+      j= end & self.mask
+      if end- start == 0:
+         return a[0:0]
+      if i < j:
+         return a[i:j]
+      return a[i:]+ a[:j]
+#
+#  read all new entries, returns [frames, timestamps, number of dropped
+#  frames]. Entries that were overwritten while they were copied are dropped
+#  as well.
+#
+   def get(self):
+      self.armed= self.wakeup is not None
+      head= self.head
+      tail= self.tail
+      if head- tail > self.size:
+         tail= head- self.size
+      frames= self.__slice__(self.frames,tail,head)
+      timestamps= self.__slice__(self.timestamps,tail,head)
+      lost= self.head- self.size- tail
+      if lost > 0:
+         del frames[:lost]
+         del timestamps[:lost]
+         tail+= lost
+      dropped= tail- self.tail
+      self.dropped+= dropped
+      self.tail= head
+      return [frames, timestamps, dropped]
+#
+#  discard all entries
+#
+   def clear(self):
+      self.tail= self.head